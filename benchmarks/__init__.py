@@ -0,0 +1,3 @@
+"""
+Benchmarks do Body assistant (python -m benchmarks.bench).
+"""
@@ -0,0 +1,440 @@
+"""
+Suíte de benchmarks: calculadores MET/kcal, persistência JSON/Arrow, merge do editor,
+agregação diária, busca no catálogo de alimentos, importação de corridas (GPX/TCX/CSV), relatório em lote,
+histórico de semanas no SQLite e uma rerun completa do app (AppTest).
+
+    python -m benchmarks.bench [--quick] [--out bench_results.json] [--only nome]
+    python -m benchmarks.bench --compare antes.json depois.json
+
+O resultado é um JSON com metadados do ambiente (commit, versões) e, por caso,
+min/mediana/p95 em segundos. --compare mostra a razão das medianas entre duas
+execuções e sai com código 1 se algum caso piorou além de --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from body_core.activities import INTENSITY_LEVELS, get_activity_catalog
+from body_core.editing import PLAN_EDITABLE, EditorMerge, diff_edited_rows, merge_editor_delta
+from body_core.exercise import calc_running_kcal, calc_running_kcal_batch, kcal_from_met, kcal_from_met_batch
+from body_core.storage import ProfileJournal
+from body_core.summary import DailyAggregates, compute_exercise_calc
+
+from .synthetic import (
+    synthetic_exercise, synthetic_food_csv, synthetic_plan, synthetic_profiles, synthetic_track, write_history_db,
+    write_profile_dir,
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCALARS = {"weight_kg": 80.0, "height_cm": 178, "activity_factor": 1.55}
+
+# ============================================================
+# Medição
+# ============================================================
+def measure(fn, repeat: int = 7, number: int = 1, setup=None) -> dict:
+    """
+    Tempo por chamada de fn (segundos). setup roda antes de cada repetição, fora do tempo.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - t0) / number)
+    times.sort()
+    return {
+        "repeat": repeat,
+        "number": number,
+        "min_s": times[0],
+        "median_s": statistics.median(times),
+        "p95_s": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        "mean_s": statistics.fmean(times),
+    }
+
+def _number_for(n_items: int, target: int = 200_000) -> int:
+    # Casos rápidos repetem dentro da medição para não medir só o perf_counter
+    return max(1, target // max(n_items, 1))
+
+# ============================================================
+# Casos
+# ============================================================
+def bench_met_kcal(sizes: dict):
+    rng = np.random.default_rng(0)
+    catalog = get_activity_catalog()
+    strength_met = float(catalog.met(catalog.codes(["Musculação"]), [0.0], [0.0], [2])[0])  # moderada
+    for n in sizes["rows"]:
+        km = rng.uniform(0, 15, n)
+        minutes = rng.uniform(0, 90, n)
+        strength = rng.uniform(0, 60, n)
+        yield "met_kcal.batch", {"rows": n}, measure(
+            lambda: (calc_running_kcal_batch(80.0, km, minutes), kcal_from_met_batch(80.0, strength, strength_met)),
+            number=_number_for(n, 1_000_000),
+        )
+        if n <= sizes["scalar_max_rows"]:
+            km_l, min_l, st_l = km.tolist(), minutes.tolist(), strength.tolist()
+
+            def scalar_loop():
+                for d, m, s in zip(km_l, min_l, st_l):
+                    calc_running_kcal(80.0, d, m)
+                    kcal_from_met(80.0, s, strength_met)
+
+            yield "met_kcal.scalar", {"rows": n}, measure(scalar_loop, repeat=5, number=_number_for(n, 20_000))
+
+        # Catálogo de atividades: lote com todas as atividades misturadas, um searchsorted
+        activities = pd.Categorical.from_codes(rng.integers(0, len(catalog), n), categories=catalog.names)
+        distance = np.where(catalog.param[activities.codes] == 0, km, 0.0)
+        incline = rng.uniform(0, 20, n)
+        intensity = pd.Categorical.from_codes(rng.integers(0, len(INTENSITY_LEVELS), n), categories=INTENSITY_LEVELS)
+        yield "met_kcal.catalog", {"rows": n, "activities": len(catalog)}, measure(
+            lambda: catalog.energy(80.0, activities, minutes, distance, incline, intensity),
+            number=_number_for(n, 1_000_000),
+        )
+
+def bench_json_roundtrip(sizes: dict, workdir: Path):
+    for weeks in sizes["weeks"]:
+        plan, ex = synthetic_plan(weeks), synthetic_exercise(weeks)
+        snapshot, journal = workdir / f"state_w{weeks}.json", workdir / f"state_w{weeks}.journal.jsonl"
+
+        def clear_journal():
+            if journal.exists():
+                journal.unlink()
+
+        # Primeira escrita (sem base em memória) = snapshot completo
+        save = measure(lambda: ProfileJournal(snapshot, journal).write(plan, ex, SCALARS), repeat=5, setup=clear_journal)
+        save["bytes"] = snapshot.stat().st_size
+        yield "json.save_snapshot", {"weeks": weeks, "plan_rows": len(plan)}, save
+        yield "json.load", {"weeks": weeks, "plan_rows": len(plan)}, measure(
+            lambda: ProfileJournal(snapshot, journal).load(), repeat=5,
+        )
+
+        # Escrita incremental: uma célula editada vira uma linha no journal
+        pj = ProfileJournal(snapshot, journal)
+        pj.load()
+        edited = plan.copy()
+        state = {"i": 0}
+
+        def write_delta():
+            state["i"] += 1
+            edited.iat[0, edited.columns.get_loc("Calorias (kcal)")] = 100 + state["i"] % 500
+            pj.write(edited.copy(), ex, SCALARS)
+
+        yield "json.save_delta", {"weeks": weeks, "plan_rows": len(plan)}, measure(write_delta, repeat=5, number=20)
+        clear_journal()
+
+def bench_arrow_roundtrip(sizes: dict, workdir: Path):
+    from body_core.columnar import read_arrow_state, write_arrow_state
+
+    for weeks in sizes["weeks"]:
+        plan, ex = synthetic_plan(weeks), synthetic_exercise(weeks)
+        plan_path, ex_path = workdir / f"state_w{weeks}.plan.arrow", workdir / f"state_w{weeks}.exercise.arrow"
+        params = {"weeks": weeks, "plan_rows": len(plan)}
+        save = measure(lambda: write_arrow_state(plan_path, ex_path, plan, ex, SCALARS), repeat=5)
+        save["bytes"] = plan_path.stat().st_size + ex_path.stat().st_size
+        yield "arrow.save", params, save
+        yield "arrow.load", params, measure(lambda: read_arrow_state(plan_path, ex_path), repeat=5)
+
+def bench_editor_merge(sizes: dict):
+    for weeks in sizes["weeks"]:
+        plan = synthetic_plan(weeks)
+        view_ui = plan.reset_index().drop(columns=["rid"])
+        for k in (1, 10):
+            positions = np.linspace(0, len(plan) - 1, k).astype(int)
+            edited_ui = view_ui.copy()
+            edited_ui.loc[positions, "Calorias (kcal)"] += 10
+            edited_rows = {int(p): {"Calorias (kcal)": int(edited_ui.at[p, "Calorias (kcal)"])} for p in positions}
+            params = {"weeks": weeks, "plan_rows": len(plan), "edits": k}
+            yield "editor.diff_edited_rows", params, measure(
+                lambda: diff_edited_rows(view_ui, edited_ui, PLAN_EDITABLE), number=_number_for(len(plan), 20_000),
+            )
+            yield "editor.merge_delta", params, measure(
+                lambda: merge_editor_delta(plan, plan.index, edited_rows, PLAN_EDITABLE),
+                number=_number_for(len(plan), 20_000),
+            )
+
+def bench_daily_aggregation(sizes: dict):
+    for weeks in sizes["weeks"]:
+        plan, ex = synthetic_plan(weeks), synthetic_exercise(weeks)
+        params = {"weeks": weeks, "plan_rows": len(plan)}
+        ex_calc = compute_exercise_calc.__wrapped__(ex, 80.0)
+        yield "summary.exercise_calc", params, measure(
+            lambda: compute_exercise_calc.__wrapped__(ex, 80.0), number=_number_for(len(ex), 5_000),
+        )
+        yield "summary.full_rebuild", params, measure(
+            lambda: DailyAggregates(plan, ex, ex_calc, 80.0).summary_frame(1500), number=_number_for(len(plan), 5_000),
+        )
+
+        # Rerun típica: merge de uma célula de kcal editada + atualização incremental
+        aggs = DailyAggregates(plan, ex, ex_calc, 80.0)
+        state = {"i": 0}
+
+        def incremental():
+            state["i"] += 1
+            plan_merge = merge_editor_delta(
+                aggs.plan_ref, aggs.plan_ref.index, {0: {"Calorias (kcal)": 100 + state["i"] % 500}}, PLAN_EDITABLE,
+            )
+            ex_merge = EditorMerge(aggs.ex_ref, {})
+            assert aggs.update(aggs.plan_ref, plan_merge, aggs.ex_ref, ex_merge, ex_calc, 80.0)
+            aggs.summary_frame(1500)
+
+        yield "summary.incremental_update", params, measure(incremental, number=50)
+
+def bench_food_catalog(sizes: dict, workdir: Path):
+    import body_core.foods as foods
+
+    foods.INDEX_CACHE_DIR = workdir / "cache"
+    queries = ["frango", "fr", "batata doce vap", "leit desn", "abobrnha", "frnago grelhdo"]
+    for n in sizes["foods"]:
+        csv_path = synthetic_food_csv(workdir / f"foods_{n}.csv", n)
+
+        def clear_cache():
+            shutil.rmtree(foods.INDEX_CACHE_DIR, ignore_errors=True)
+
+        yield "foods.build_index", {"foods": n}, measure(lambda: foods.build_or_load_index(csv_path), repeat=3, setup=clear_cache)
+        yield "foods.load_cached_index", {"foods": n}, measure(lambda: foods.build_or_load_index(csv_path), repeat=5)
+        catalog = foods.build_or_load_index(csv_path)
+        for q in queries:
+            yield "foods.search", {"foods": n, "query": q}, measure(lambda: catalog.search(q), repeat=50)
+
+def bench_track_import(sizes: dict, workdir: Path):
+    """
+    Leitura de um treino a 1 Hz por formato e duração; peak_mb (tracemalloc) fica no
+    tamanho de um bloco de CHUNK_POINTS pontos, qualquer que seja a duração
+    """
+    import tracemalloc
+
+    from body_core.tracks import read_run
+
+    for fmt in ("gpx", "tcx", "csv"):
+        for hours in sizes["track_hours"]:
+            path = synthetic_track(workdir / f"run_{hours}h.{fmt}", hours=hours, fmt=fmt)
+            result = measure(lambda: read_run(path), repeat=3)
+            tracemalloc.start()
+            run = read_run(path)
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            result["points_per_s"] = run.points / result["median_s"]
+            yield "tracks.read_run", {"format": fmt, "hours": hours, "points": run.points}, result
+            path.unlink()
+
+def bench_batch_report(sizes: dict, workdir: Path):
+    from body_core.report import run_report
+
+    class NullWriter:
+        def write(self, rows):
+            pass
+
+    for n in sizes["profiles"]:
+        data_dir = workdir / f"profiles_{n}"
+        write_profile_dir(data_dir, n)
+        result = measure(lambda: run_report(data_dir, NullWriter(), workers=1), repeat=3)
+        result["per_profile_s"] = result["median_s"] / n
+        yield "report.profiles_serial", {"profiles": n}, result
+        shutil.rmtree(data_dir)
+
+def bench_meal_generator(sizes: dict):
+    """
+    Plano da semana pelo limite diário: um perfil e lotes (per_profile_s = custo por perfil)
+    """
+    from body_core.mealgen import generate_week_plans, get_dish_pool
+
+    pool = get_dish_pool()
+    rng = np.random.default_rng(0)
+    for n in sizes["profiles"]:
+        limits = rng.choice([1300, 1500, 1800, 2000, 2400], size=n)
+        result = measure(lambda: generate_week_plans(limits, pool), repeat=3 if n > 100 else 7)
+        result["per_profile_s"] = result["median_s"] / n
+        yield "mealgen.week", {"profiles": n, "dishes": len(pool)}, result
+
+def bench_history(sizes: dict, workdir: Path):
+    """
+    Histórico do SQLite com semanas gravadas: primeira carga (cache de semanas vazio),
+    carga com as semanas completas no cache, a tabela diária e a série de gráfico
+    """
+    from body_core.analytics import WEEK_CACHE_SIZE, downsample, load_history, page_slice
+    from body_core.cache import named_cache
+
+    prof = synthetic_profiles(1)[0]
+    current = (synthetic_plan(1), synthetic_exercise(1), SCALARS["weight_kg"], SCALARS["height_cm"], SCALARS["activity_factor"])
+    week_cache = named_cache("analytics_week", WEEK_CACHE_SIZE)
+    for weeks in sizes["weeks"]:
+        storage = write_history_db(workdir / f"history_w{weeks}.db", weeks, prof.name)
+        params = {"weeks": weeks + 1, "day_rows": 7 * (weeks + 1)}
+        yield "history.load_cold", params, measure(
+            lambda: load_history(prof, storage, current=current), repeat=5, setup=week_cache.clear,
+        )
+        yield "history.load_cached", params, measure(lambda: load_history(prof, storage, current=current), repeat=7)
+        history = load_history(prof, storage, current=current)
+
+        def views():
+            page_slice(history.days.iloc[::-1], 1, 50)
+            downsample(history.rolling(4), 300)
+            history.periods("M")
+
+        yield "history.views", params, measure(views, repeat=7)
+        week_cache.clear()
+
+def bench_app_rerun(sizes: dict, workdir: Path):
+    """
+    Script inteiro via AppTest numa cópia do app (data/ própria): primeira execução
+    (carrega perfil do disco) e reruns com mudança de peso (recalcula tudo abaixo).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app_dir = workdir / "app"
+    shutil.copytree(REPO_ROOT / "body_core", app_dir / "body_core", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy(REPO_ROOT / "bodyassistant.py", app_dir / "bodyassistant.py")
+    cwd = os.getcwd()
+    os.chdir(app_dir)
+    sys.path.insert(0, str(app_dir))
+    try:
+        state = {}
+
+        def first_run():
+            state["at"] = AppTest.from_file("bodyassistant.py", default_timeout=60).run()
+            assert not state["at"].exception, state["at"].exception
+
+        yield "app.first_run", {}, measure(first_run, repeat=sizes["app_repeat"])
+
+        at = state["at"]
+        weights = iter(np.arange(60.0, 200.0, 0.1))
+
+        def rerun_weight():
+            at.number_input(key=f"weight_{at.selectbox[0].value}").set_value(float(round(next(weights), 1))).run()
+            assert not at.exception, at.exception
+
+        yield "app.rerun_weight_change", {}, measure(rerun_weight, repeat=sizes["app_repeat"] * 3)
+    finally:
+        from body_core.storage import get_autosave_writer
+
+        get_autosave_writer().flush()
+        sys.path.remove(str(app_dir))
+        os.chdir(cwd)
+
+CASES = {
+    "met_kcal": lambda sizes, workdir: bench_met_kcal(sizes),
+    "json": bench_json_roundtrip,
+    "arrow": bench_arrow_roundtrip,
+    "editor": lambda sizes, workdir: bench_editor_merge(sizes),
+    "summary": lambda sizes, workdir: bench_daily_aggregation(sizes),
+    "foods": bench_food_catalog,
+    "tracks": bench_track_import,
+    "report": bench_batch_report,
+    "mealgen": lambda sizes, workdir: bench_meal_generator(sizes),
+    "history": bench_history,
+    "app": bench_app_rerun,
+}
+
+SIZES = {
+    "rows": [1_000, 100_000, 1_000_000],
+    "scalar_max_rows": 100_000,
+    "weeks": [1, 52, 260, 1040],
+    "profiles": [1, 100, 1000],
+    "foods": [1_000, 100_000],
+    "track_hours": [1, 4],
+    "app_repeat": 3,
+}
+QUICK_SIZES = {
+    "rows": [1_000, 100_000],
+    "scalar_max_rows": 1_000,
+    "weeks": [1, 52],
+    "profiles": [1, 50],
+    "foods": [1_000, 20_000],
+    "track_hours": [1, 4],
+    "app_repeat": 2,
+}
+
+# ============================================================
+# Execução e comparação
+# ============================================================
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import streamlit
+        streamlit_version = streamlit.__version__
+    except ImportError:
+        streamlit_version = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "streamlit": streamlit_version,
+    }
+
+def run_suite(sizes: dict, only=None) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bodyassistant-bench-") as tmp:
+        for case, bench in CASES.items():
+            if only and case not in only:
+                continue
+            workdir = Path(tmp) / case
+            workdir.mkdir()
+            for name, params, timing in bench(sizes, workdir):
+                results.append({"name": name, "params": params, **timing})
+                label = ", ".join(f"{k}={v}" for k, v in params.items())
+                print(f"{name:<30} {label:<40} median {timing['median_s'] * 1000:10.3f} ms", flush=True)
+    return {"environment": environment(), "sizes": sizes, "results": results}
+
+def _case_key(r: dict) -> str:
+    return r["name"] + json.dumps(r["params"], sort_keys=True)
+
+def compare(before: dict, after: dict, threshold: float = 1.2) -> int:
+    """
+    Razão depois/antes da mediana de cada caso presente nos dois arquivos
+    """
+    old = {_case_key(r): r for r in before["results"]}
+    regressions = 0
+    for r in after["results"]:
+        prev = old.get(_case_key(r))
+        if prev is None or prev["median_s"] <= 0:
+            continue
+        ratio = r["median_s"] / prev["median_s"]
+        flag = "PIOROU" if ratio > threshold else "melhorou" if ratio < 1 / threshold else ""
+        regressions += ratio > threshold
+        label = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+        print(f"{r['name']:<30} {label:<40} {prev['median_s'] * 1000:10.3f} -> {r['median_s'] * 1000:10.3f} ms  x{ratio:5.2f} {flag}")
+    return 1 if regressions else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--quick", action="store_true", help="tamanhos menores (minutos -> segundos)")
+    parser.add_argument("--only", action="append", choices=sorted(CASES), help="roda só estes grupos")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("ANTES", "DEPOIS"))
+    parser.add_argument("--threshold", type=float, default=1.2, help="razão de mediana considerada regressão")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        before, after = (json.loads(p.read_text(encoding="utf-8")) for p in args.compare)
+        return compare(before, after, args.threshold)
+
+    report = run_suite(QUICK_SIZES if args.quick else SIZES, args.only)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"resultados em {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Latência por interação na tela: editar kcal no plano, minutos num exercício, o peso, o
+filtro por dia e a projeção. Cada interação roda como o navegador pede: a rerun só do
+fragmento da seção do widget, seguida da rerun do app quando a seção muda o estado de
+outras (st.rerun(scope="app"), medida junto). Com --full, toda interação é uma rerun do
+app inteiro, como antes das seções em fragmentos.
+
+    python -m benchmarks.interaction_latency [--repeat 30] [--full] [--app bodyassistant.py]
+
+O app roda pelo AppTest do Streamlit numa cópia (data/ própria). O AppTest só faz reruns
+do app inteiro; aqui o runner guarda os fragmentos entre execuções e recebe o fragmento
+da interação, como o servidor faz com a mensagem do navegador. A latência é o tempo de
+parede da rerun (script + montagem das mensagens); "elementos" é quantos deltas ela manda.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+def _runner_class():
+    from streamlit.runtime.fragment import MemoryFragmentStorage
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    class FragmentRunner(LocalScriptRunner):
+        # Fragmentos da última rerun do app (o LocalScriptRunner do AppTest é de uma execução só)
+        fragments = MemoryFragmentStorage()
+        fragment_id = None
+        last = None
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._fragment_storage = FragmentRunner.fragments
+            FragmentRunner.last = self
+
+        def request_rerun(self, rerun_data):
+            if FragmentRunner.fragment_id is not None:
+                rerun_data = dataclasses.replace(rerun_data, fragment_id=FragmentRunner.fragment_id)
+            return super().request_rerun(rerun_data)
+
+    return FragmentRunner
+
+def _user_key(widget_id: str) -> str:
+    # O id de um widget com key muda junto com value/index; o navegador só manda o atual
+    _, _, user_key = widget_id.split("-", 2)
+    return widget_id if user_key == "None" else user_key
+
+class _Session:
+    """
+    Uma aba do navegador: guarda o valor de todos os widgets (o navegador manda todos em
+    cada rerun, também nas de fragmento) e roda interações
+    """
+
+    def __init__(self, app_file: str, runner, full: bool):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(app_file, default_timeout=60)
+        self.runner = runner
+        self.full = full
+        self.states = {}
+        self.run()
+
+    def widget_id(self, key: str) -> str:
+        if key.startswith("$$ID-"):
+            return key  # widget sem key: já é o id
+        return self.at.session_state._state._key_id_mapper.get_id_from_key(key)
+
+    def fragment_of(self, key: str):
+        metadata = self.at.session_state._state._new_widget_state.widget_metadata[self.widget_id(key)]
+        return metadata.fragment_id
+
+    def run(self, key=None, **value) -> tuple:
+        """
+        Muda um widget (value: campo do WidgetState, como o navegador manda) e roda a
+        rerun; devolve (segundos, deltas enviados)
+        """
+        from streamlit.proto.WidgetStates_pb2 import WidgetState, WidgetStates
+        from streamlit.testing.v1 import app_test
+
+        # A árvore de uma rerun de fragmento só tem os widgets dele: os outros continuam
+        # com o último valor conhecido
+        for ws in self.at._tree.get_widget_states().widgets if self.at._tree is not None else ():
+            self.states[_user_key(ws.id)] = ws
+        if value:
+            ws = WidgetState(id=self.widget_id(key))
+            (field, v), = value.items()
+            if field == "double_array_value":
+                ws.double_array_value.data[:] = v
+            else:
+                setattr(ws, field, v)
+            self.states[_user_key(ws.id)] = ws
+        self.runner.fragment_id = None if self.full or key is None else self.fragment_of(key)
+        app_test.LocalScriptRunner = self.runner  # cada sessão com o seu runner (fragmentos dela)
+        t0 = time.perf_counter()
+        self.at._run(WidgetStates(widgets=self.states.values()))
+        elapsed = time.perf_counter() - t0
+        self.runner.fragment_id = None
+        assert not self.at.exception, self.at.exception
+        deltas = sum(1 for m in self.runner.last.forward_msgs() if m.HasField("delta"))
+        return elapsed, deltas
+
+def _interactions(session: "_Session", profile: str):
+    """
+    (nome, função que aplica a interação e roda) — cada chamada muda um valor diferente
+    """
+    from body_core.plans import DAYS
+
+    step = {"n": 0}
+
+    def nxt():
+        step["n"] += 1
+        return step["n"]
+
+    def plan_cell():
+        n = nxt()
+        edit = {"edited_rows": {str(n % 5): {"Calorias (kcal)": 100 + 10 * (n % 30)}}}
+        return session.run(f"plan_editor_{profile}", string_value=json.dumps(edit))
+
+    def exercise_cell():
+        n = nxt()
+        edit = {"edited_rows": {"0": {"Minutos": float(20 + n % 40)}}}
+        return session.run(f"ex_editor_{profile}", string_value=json.dumps(edit))
+
+    def weight():
+        kg = round(70.0 + (nxt() % 50) * 0.1, 1)
+        elapsed = session.run(f"weight_{profile}", double_value=kg)
+        if session.at.session_state.weight[profile] != kg:
+            # O id do campo muda com value= e a edição mandada no id antigo se perde (também
+            # no navegador); como o usuário, digita de novo e mede a rerun que valeu
+            elapsed = session.run(f"weight_{profile}", double_value=kg)
+        return elapsed
+
+    def day_filter():
+        return session.run(f"day_filter_{profile}", int_value=nxt() % (len(DAYS) + 1))  # índice em ["Todos"] + DAYS
+
+    def projection():
+        return session.run(f"proj_weeks_{profile}", double_array_value=[6 + nxt() % 40])
+
+    return [
+        ("plano: kcal de uma refeição", plan_cell),
+        ("exercícios: minutos", exercise_cell),
+        ("perfil: peso", weight),
+        ("plano: filtro por dia", day_filter),
+        ("semana: projeção", projection),
+    ]
+
+def run(repeat: int, full: bool, app: Path) -> list:
+    from streamlit.testing.v1 import app_test
+
+    workdir = Path(tempfile.mkdtemp(prefix="interaction_latency_"))
+    shutil.copytree(REPO_ROOT / "body_core", workdir / "body_core", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy(app, workdir / "bodyassistant.py")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, str(workdir))
+    runner = _runner_class()
+    saved_runner, app_test.LocalScriptRunner = app_test.LocalScriptRunner, runner
+    try:
+        session = _Session("bodyassistant.py", runner, full)
+        profile = session.at.selectbox[0].value
+        # Uma corrida na semana (a tabela de exercícios começa vazia)
+        first_run = {"added_rows": [{"Dia": "Seg", "Atividade": "Corrida", "Minutos": 30.0, "Distância (km)": 5.0}]}
+        session.run(f"ex_editor_{profile}", string_value=json.dumps(first_run))
+        interactions = _interactions(session, profile)
+        for _, interact in interactions:  # aquecimento (caches, primeira leitura do catálogo)
+            interact()
+        samples = {name: [] for name, _ in interactions}
+        deltas = {name: [] for name, _ in interactions}
+        for _ in range(repeat):
+            for name, interact in interactions:
+                elapsed, sent = interact()
+                samples[name].append(elapsed)
+                deltas[name].append(sent)
+    finally:
+        from body_core.storage import get_autosave_writer
+
+        get_autosave_writer().flush()
+        app_test.LocalScriptRunner = saved_runner
+        sys.path.remove(str(workdir))
+        os.chdir(cwd)
+
+    rows = []
+    everything = []
+    for name, values in samples.items():
+        everything += values
+        rows.append(_stats(name, values, deltas[name]))
+    rows.append(_stats("todas", everything, [d for v in deltas.values() for d in v]))
+    return rows
+
+def _stats(name: str, values: list, deltas: list) -> dict:
+    ms = np.array(values) * 1000
+    return {
+        "interação": name,
+        "n": len(ms),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "max_ms": float(ms.max()),
+        "elementos": float(np.median(deltas)),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.interaction_latency", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=30, help="rodadas de cada interação")
+    parser.add_argument("--full", action="store_true", help="toda interação como rerun do app inteiro")
+    parser.add_argument("--app", type=Path, default=REPO_ROOT / "bodyassistant.py")
+    args = parser.parse_args(argv)
+
+    rows = run(args.repeat, args.full, args.app.resolve())
+    print(f"{'rerun do app inteiro' if args.full else 'rerun do fragmento'}, {args.repeat} rodadas")
+    print(f"{'interação':<30} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8} {'elementos':>10}")
+    for r in rows:
+        print(f"{r['interação']:<30} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['max_ms']:>8.1f} {r['elementos']:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Teste de carga do app: N sessões (abas) no mesmo processo do servidor, sem rede.
+
+    python -m benchmarks.load_sessions [--sessions 1 5 10 20] [--steps 10] [--seed 0]
+                                       [--backend json|arrow|sqlite] [--think-s 5] [--out carga.json]
+
+Cada sessão é um AppTest de bodyassistant.py com os fragmentos dela (como o servidor
+guarda por sessão, ver benchmarks.interaction_latency) e segue um roteiro sorteado pela
+seed com os pesos de SCRIPT: editar kcal de uma refeição, editar minutos de um exercício
+(ou adicionar um, com a tabela vazia), trocar de perfil, copiar do outro perfil e resetar.
+As sessões dividem os perfis do cadastro, então o autosave faz merge entre elas. As
+interações são intercaladas (uma de cada sessão por vez, em ordem sorteada): o script das
+sessões roda sob o mesmo GIL, então o processo atende uma rerun por vez como aqui.
+
+Cada N roda num processo novo (spawn), numa cópia do app com data/ própria e
+BODY_ASSISTANT_TIMING=1 para os contadores de escrita. Por N:
+- latência da rerun de cada interação (p50/p95/p99/máx) e vazão (reruns/s)
+- sessões_a_think: quantas sessões o processo atende com uma interação a cada --think-s
+  por sessão (vazão × think-s)
+- RSS do processo no fim e MB por sessão (acima do RSS antes da primeira sessão), e o
+  custo marginal entre um N e o seguinte
+- escritas do autosave (storage_writes), por rerun, KB gravados e conflitos de merge
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.interaction_latency import REPO_ROOT, _runner_class, _Session, _user_key
+
+# Roteiro: (interação, peso)
+SCRIPT = (
+    ("editar refeição", 0.45),
+    ("editar exercício", 0.30),
+    ("trocar perfil", 0.15),
+    ("copiar do outro perfil", 0.05),
+    ("resetar", 0.05),
+)
+PROFILE_LABEL = "Selecione o perfil"
+RESET_LABEL = "🔄 Resetar (perfil atual)"
+COPY_LABEL = "📋 Copiar do outro perfil"
+
+
+def _rss_mb() -> float:
+    """
+    RSS atual do processo (Linux: /proc/self/statm); senão o pico (ru_maxrss)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class _Tab:
+    """
+    Uma sessão do teste: o _Session e o perfil escolhido, com os ids dos widgets sem key
+    (só estão na árvore de uma rerun do app inteiro)
+    """
+
+    def __init__(self, app_file: str, rng: random.Random):
+        self.session = _Session(app_file, _runner_class(), full=False)
+        self.rng = rng
+        self.step = 0
+        self.ids = {}
+        self._remember()
+        self.profiles = list(self.widget(PROFILE_LABEL).options)
+        self.profile = self.widget(PROFILE_LABEL).value
+
+    def widget(self, label: str):
+        at = self.session.at
+        return next(w for w in (*at.selectbox, *at.button) if w.label == label)
+
+    def _remember(self):
+        at = self.session.at
+        for w in (*at.selectbox, *at.button):
+            self.ids[w.label] = w.id
+
+    def _click(self, label: str) -> tuple:
+        widget_id = self.ids[label]
+        elapsed = self.session.run(widget_id, trigger_value=True)
+        self.session.states.pop(_user_key(widget_id), None)  # o clique vale por uma rerun
+        return elapsed
+
+    def _edit(self, table: str, key: str, edit: dict) -> list:
+        """
+        Manda a edição do editor; se o frame não mudou, digita de novo (o id do editor muda
+        com os dados e a edição mandada no id antigo se perde, também no navegador).
+        Devolve as reruns das duas tentativas.
+        """
+        frames = getattr(self.session.at.session_state, table)
+        before = frames[self.profile]
+        elapsed = [self.session.run(key, string_value=json.dumps(edit))[0]]
+        if frames[self.profile] is before:
+            elapsed.append(self.session.run(key, string_value=json.dumps(edit))[0])
+        return elapsed
+
+    def interact(self, name: str) -> list:
+        """
+        Roda a interação; devolve o tempo de cada rerun que ela precisou
+        """
+        self.step += 1
+        n = self.step
+        profile = self.profile
+        if name == "editar refeição":
+            edit = {"edited_rows": {str(n % 35): {"Calorias (kcal)": 100 + 10 * self.rng.randrange(60)}}}
+            return self._edit("plans", f"plan_editor_{profile}", edit)
+        if name == "editar exercício":
+            if len(self.session.at.session_state.exercise[profile]):
+                edit = {"edited_rows": {"0": {"Minutos": float(20 + self.rng.randrange(60))}}}
+            else:
+                edit = {"added_rows": [{"Dia": "Seg", "Atividade": "Corrida", "Minutos": 30.0, "Distância (km)": 5.0}]}
+            return self._edit("exercise", f"ex_editor_{profile}", edit)
+        if name == "trocar perfil":
+            others = [p for p in self.profiles if p != profile]
+            self.profile = self.rng.choice(others) if others else profile
+            elapsed, _ = self.session.run(self.ids[PROFILE_LABEL], int_value=self.profiles.index(self.profile))
+        elif name == "copiar do outro perfil":
+            elapsed, _ = self._click(COPY_LABEL)
+        else:
+            elapsed, _ = self._click(RESET_LABEL)
+        self._remember()
+        return [elapsed]
+
+def _run_scale(sessions: int, steps: int, seed: int, backend: str, app: str) -> dict:
+    """
+    Um N, no processo atual: sobe as sessões, aquece e mede `steps` interações de cada
+    """
+    from streamlit.testing.v1 import app_test
+
+    workdir = Path(tempfile.mkdtemp(prefix="load_sessions_"))
+    shutil.copytree(REPO_ROOT / "body_core", workdir / "body_core", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy(app, workdir / "bodyassistant.py")
+    os.environ["BODY_ASSISTANT_TIMING"] = "1"
+    os.environ["BODY_ASSISTANT_STORAGE"] = backend
+    os.chdir(workdir)
+    sys.path.insert(0, str(workdir))
+    import body_core.instrument as instrument
+    from body_core.storage import get_autosave_writer
+
+    saved_runner = app_test.LocalScriptRunner
+    rng = random.Random(seed)
+    names = [name for name, _ in SCRIPT]
+    weights = [w for _, w in SCRIPT]
+    samples = {name: [] for name in names}
+    try:
+        rss_start = _rss_mb()
+        tabs = [_Tab("bodyassistant.py", random.Random(seed * 1000 + i)) for i in range(sessions)]
+        for tab in tabs:  # aquecimento: uma edição de cada sessão (caches, primeira escrita)
+            tab.interact("editar refeição")
+        get_autosave_writer().flush()
+        instrument.reset_stats()
+
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            for tab in rng.sample(tabs, len(tabs)):
+                name = rng.choices(names, weights)[0]
+                samples[name] += tab.interact(name)
+        elapsed = time.perf_counter() - t0
+        get_autosave_writer().flush()
+        rss_end = _rss_mb()
+        counters = instrument.counter_stats()
+    finally:
+        app_test.LocalScriptRunner = saved_runner
+
+    ms = np.array([v for values in samples.values() for v in values]) * 1000
+    reruns = len(ms)
+    return {
+        "sessões": sessions,
+        "reruns": reruns,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "reruns_por_s": reruns / elapsed,
+        "rss_mb": rss_end,
+        "mb_por_sessão": (rss_end - rss_start) / sessions,
+        "escritas": int(counters.get("storage_writes", 0)),
+        "escritas_por_rerun": counters.get("storage_writes", 0) / reruns,
+        "kb_gravados": counters.get("storage_bytes_written", 0) / 1024,
+        "conflitos": int(counters.get("storage_conflicts", 0)),
+        "p50_ms_por_interação": {name: float(np.percentile(np.array(v) * 1000, 50)) for name, v in samples.items() if v},
+    }
+
+def _scale_entry(args, queue):
+    queue.put(_run_scale(*args))
+
+def run(scales: list, steps: int, seed: int, backend: str, app: Path) -> list:
+    """
+    Um processo novo (spawn) por N: o RSS e os caches de um N não passam para o seguinte
+    """
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for sessions in scales:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_scale_entry, args=((sessions, steps, seed, backend, str(app)), queue))
+        proc.start()
+        rows.append(queue.get())
+        proc.join()
+        if proc.exitcode:
+            raise SystemExit(f"{sessions} sessões: processo saiu com código {proc.exitcode}")
+    for prev, row in zip([None] + rows, rows):
+        row["mb_marginal"] = (
+            None if prev is None else (row["rss_mb"] - prev["rss_mb"]) / (row["sessões"] - prev["sessões"])
+        )
+    return rows
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_sessions", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 20], help="valores de N")
+    parser.add_argument("--steps", type=int, default=10, help="interações medidas por sessão")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=["json", "arrow", "sqlite"], default="json")
+    parser.add_argument("--think-s", type=float, default=5.0, help="segundos entre interações de uma sessão")
+    parser.add_argument("--app", type=Path, default=REPO_ROOT / "bodyassistant.py")
+    parser.add_argument("--out", type=Path, default=None, help="resultados em JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(sorted(set(args.sessions)), args.steps, args.seed, args.backend, args.app.resolve())
+    for r in rows:
+        r["sessões_a_think"] = r["reruns_por_s"] * args.think_s
+    print(f"backend {args.backend}, {args.steps} interações por sessão, uma a cada {args.think_s:g} s")
+    print(
+        f"{'sessões':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>8} {'reruns/s':>9} "
+        f"{'suporta':>8} {'RSS MB':>8} {'MB/sessão':>10} {'marginal':>9} {'escritas':>9} {'/rerun':>7} {'KB':>8} {'conflitos':>9}"
+    )
+    for r in rows:
+        marginal = "" if r["mb_marginal"] is None else f"{r['mb_marginal']:.1f}"
+        print(
+            f"{r['sessões']:>7} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} "
+            f"{r['reruns_por_s']:>9.1f} {r['sessões_a_think']:>8.0f} {r['rss_mb']:>8.0f} {r['mb_por_sessão']:>10.1f} "
+            f"{marginal:>9} {r['escritas']:>9} {r['escritas_por_rerun']:>7.2f} {r['kb_gravados']:>8.0f} {r['conflitos']:>9}"
+        )
+    if args.out:
+        args.out.write_text(json.dumps(rows, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Memória por sessão: N sessões no mesmo perfil, com estado de 1 semana a anos de linhas.
+
+    python -m benchmarks.session_memory [--sessions 20] [--weeks 1 52 260] [--edits 5]
+                                        [--backend json|arrow] [--copies]
+
+Cada sessão (ProfileSession, como no app) abre o perfil, edita --edits vezes uma célula
+própria com merge_editor_delta, grava (autosave síncrono) e faz pull, como a rerun; no fim
+todas fazem mais um pull (a rerun seguinte). Com tracemalloc, mede a memória que fica
+alocada: state_kb é a do estado lido pela primeira sessão, per_session_kb o custo de cada
+sessão além dele, que deve ficar plano quando o estado cresce.
+--copies refaz com o comportamento antigo para comparar: cada sessão lê o próprio estado
+do disco (sem SHARED_STATES), copia o frame inteiro a cada edição e, quando o pull traz o
+mesmo conteúdo, fica com a própria cópia.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+PROFILE = "Memoria"
+SCALARS = {"weight_kg": 80.0, "height_cm": 178, "activity_factor": 1.55}
+
+
+class _Unshared:
+    # Leitura direta do disco por sessão, como antes de SHARED_STATES
+    def load(self, storage, profile_name, token):
+        return storage.load(profile_name)
+
+    def clear(self):
+        pass
+
+def _edit(plan, rid, value: int, copies: bool):
+    from body_core.editing import PLAN_EDITABLE, merge_editor_delta
+
+    if copies:
+        plan = plan.copy()
+        plan.loc[rid, "Calorias (kcal)"] = value
+        return plan
+    return merge_editor_delta(plan, [rid], {0: {"Calorias (kcal)": value}}, PLAN_EDITABLE).df
+
+def run(sessions: int, weeks: int, edits: int, backend: str, copies: bool) -> dict:
+    from body_core import concurrency, storage
+    from body_core.concurrency import ProfileSession, SharedStates, commit_profile_state
+    from body_core.storage import get_autosave_writer
+
+    from .synthetic import synthetic_exercise, synthetic_plan
+
+    os.chdir(tempfile.mkdtemp(prefix="session_memory_"))
+    storage.STORAGE_BACKEND = backend
+    storage._STORAGE = None
+    concurrency.SHARED_STATES = _Unshared() if copies else SharedStates()
+    commit_profile_state(PROFILE, None, {}, synthetic_plan(weeks), synthetic_exercise(weeks), dict(SCALARS))
+    storage._JOURNALS.clear()  # o estado é lido do disco pelas sessões, dentro da medição
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    held = []  # o que cada sessão guarda (como st.session_state)
+
+    def pull(session, plan, ex):
+        pulled = session.pull(plan, ex, dict(SCALARS))
+        if pulled is None or (copies and pulled[3] is None):
+            return plan, ex  # antes: conteúdo igual, a sessão ficava com a própria cópia
+        return pulled[0], pulled[1]
+
+    state_bytes = None
+    for w in range(sessions):
+        session = ProfileSession(PROFILE)
+        plan, ex, _ = session.open()
+        if state_bytes is None:
+            gc.collect()
+            state_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        if copies:
+            plan, ex = plan.copy(), ex.copy()
+        rid = plan.index[w % len(plan)]
+        for i in range(edits):
+            plan = _edit(plan, rid, 1000 + w * edits + i, copies)
+        session.submit(plan, ex, dict(SCALARS))
+        get_autosave_writer().flush(session.key)
+        plan, ex = pull(session, plan, ex)
+        held.append([session, plan, ex])
+    for entry in held:
+        entry[1], entry[2] = pull(*entry)
+
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return {
+        "weeks": weeks,
+        "plan_rows": len(held[0][1]),
+        "state_kb": state_bytes / 1024,
+        "total_kb": total / 1024,
+        "per_session_kb": (total - state_bytes) / sessions / 1024,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.session_memory", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--weeks", type=int, nargs="+", default=[1, 52, 260])
+    parser.add_argument("--edits", type=int, default=5, help="edições por sessão antes do autosave")
+    parser.add_argument("--backend", choices=["json", "arrow"], default="json")
+    parser.add_argument("--copies", action="store_true", help="comportamento antigo: cópia inteira por sessão")
+    args = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    try:
+        results = [run(args.sessions, weeks, args.edits, args.backend, args.copies) for weeks in args.weeks]
+    finally:
+        os.chdir(cwd)
+    mode = "cópias por sessão" if args.copies else "estado compartilhado"
+    print(f"{args.backend}: {args.sessions} sessões, {args.edits} edições cada ({mode})")
+    print(f"{'semanas':>8} {'linhas':>8} {'estado KB':>10} {'total KB':>10} {'por sessão KB':>14}")
+    for r in results:
+        print(
+            f"{r['weeks']:>8} {r['plan_rows']:>8} {r['state_kb']:>10.0f} {r['total_kb']:>10.0f} "
+            f"{r['per_session_kb']:>14.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
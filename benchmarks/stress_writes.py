@@ -0,0 +1,163 @@
+"""
+Teste de carga da escrita concorrente: N sessões gravando o mesmo perfil ao mesmo tempo.
+
+    python -m benchmarks.stress_writes [--sessions 20] [--commits 50] [--mode process|thread]
+                                       [--backend json|arrow|sqlite] [--blind]
+
+Cada sessão (ProfileSession, como no app) faz --commits escritas: muda a própria célula
+(kcal da linha dela) e uma célula disputada por todas (Descrição da última linha), com
+pull() antes de cada edição, como a rerun faz. No fim confere no disco:
+- cada sessão tem o último valor dela na própria célula (nenhuma atualização perdida)
+- a célula disputada tem o último valor de alguma sessão
+- a versão é 1 + sessões × commits (toda escrita ganhou a própria versão)
+--blind grava o estado inteiro sem base (o comportamento antigo) para comparar.
+Sai com código 1 se houver atualização perdida fora do modo --blind.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROFILE = "Stress"
+SCALARS = {"weight_kg": 80.0, "height_cm": 178, "activity_factor": 1.55}
+
+
+def _use_backend(backend: str):
+    from body_core import storage
+
+    storage.STORAGE_BACKEND = backend
+    storage._STORAGE = None
+
+def _session_worker(worker: int, commits: int, blind: bool, start, root: str) -> dict:
+    """
+    Uma sessão: abre o perfil e faz `commits` escritas síncronas (sem o debounce)
+    """
+    from body_core.concurrency import ProfileSession, commit_profile_state
+    from body_core.storage import get_autosave_writer
+
+    os.chdir(root)
+    rng = random.Random(worker)
+    session = ProfileSession(PROFILE)
+    plan, ex, scalars = session.open()
+    scalars = dict(SCALARS)
+    own, hot = plan.index[worker], plan.index[-1]
+    conflicts = 0
+    start.wait()
+    t0 = time.perf_counter()
+    for i in range(commits):
+        if not blind:
+            pulled = session.pull(plan, ex, scalars)
+            if pulled is not None:
+                plan, ex, scalars, found = pulled
+                conflicts += len(found or ())
+        plan = plan.copy()
+        plan.loc[own, "Calorias (kcal)"] = worker * 1000 + i
+        plan.loc[hot, "Descrição"] = f"s{worker}#{i}"
+        if blind:
+            commit_profile_state(PROFILE, None, {}, plan, ex, scalars)
+        else:
+            session.submit(plan, ex, scalars)
+            get_autosave_writer().flush(session.key)
+        time.sleep(rng.uniform(0, 0.002))
+    return {"worker": worker, "elapsed_s": time.perf_counter() - t0, "conflicts": conflicts}
+
+def _process_entry(args, queue):
+    worker, commits, blind, start, root, backend = args
+    _use_backend(backend)
+    queue.put(_session_worker(worker, commits, blind, start, root))
+
+def _seed_profile(root: str, sessions: int):
+    from body_core.concurrency import commit_profile_state
+    from body_core.plans import init_exercise_df, init_week_plan
+
+    os.chdir(root)
+    plan = init_week_plan(PROFILE)
+    if len(plan) <= sessions:
+        raise SystemExit(f"no máximo {len(plan) - 1} sessões (uma linha do plano por sessão)")
+    commit_profile_state(PROFILE, None, {}, plan, init_exercise_df(), dict(SCALARS))
+
+def run(sessions: int, commits: int, mode: str, backend: str, blind: bool) -> dict:
+    from body_core.storage import get_storage
+
+    root = tempfile.mkdtemp(prefix="stress_writes_")
+    _use_backend(backend)
+    _seed_profile(root, sessions)
+
+    if mode == "thread":
+        start = threading.Barrier(sessions)
+        results = [None] * sessions
+
+        def target(w):
+            results[w] = _session_worker(w, commits, blind, start, root)
+
+        threads = [threading.Thread(target=target, args=(w,)) for w in range(sessions)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        start, queue = ctx.Barrier(sessions), ctx.Queue()
+        procs = [
+            ctx.Process(target=_process_entry, args=((w, commits, blind, start, root, backend), queue))
+            for w in range(sessions)
+        ]
+        for p in procs:
+            p.start()
+        results = [queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+    # Tempo depois da barreira (sem a subida dos processos)
+    elapsed = max(r["elapsed_s"] for r in results)
+
+    # Leitura final com um backend novo (nada do cache do processo)
+    _use_backend(backend)
+    plan, _, scalars = get_storage().load(PROFILE)
+    lost = [
+        w for w in range(sessions)
+        if int(plan.loc[plan.index[w], "Calorias (kcal)"]) != w * 1000 + commits - 1
+    ]
+    hot_value = plan.loc[plan.index[-1], "Descrição"]
+    return {
+        "mode": mode,
+        "backend": backend,
+        "blind": blind,
+        "sessions": sessions,
+        "commits": sessions * commits,
+        "elapsed_s": elapsed,
+        "commits_per_s": sessions * commits / elapsed,
+        "conflicts_seen": sum(r["conflicts"] for r in results),
+        "lost_updates": len(lost),
+        "hot_cell_ok": hot_value.endswith(f"#{commits - 1}"),
+        "version": int(scalars.get("version", 0)),
+        "expected_version": 1 + sessions * commits,
+        "data_dir": str(Path(root) / "data"),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stress_writes", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--commits", type=int, default=50, help="escritas por sessão")
+    parser.add_argument("--mode", choices=["process", "thread"], default="process")
+    parser.add_argument("--backend", choices=["json", "arrow", "sqlite"], default="json")
+    parser.add_argument("--blind", action="store_true", help="sem merge: estado inteiro, última escrita vence")
+    args = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    try:
+        result = run(args.sessions, args.commits, args.mode, args.backend, args.blind)
+    finally:
+        os.chdir(cwd)
+    for k, v in result.items():
+        print(f"{k:>16}: {round(v, 3) if isinstance(v, float) else v}")
+    ok = result["lost_updates"] == 0 and result["hot_cell_ok"] and result["version"] == result["expected_version"]
+    return 0 if ok or args.blind else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Dados sintéticos para os benchmarks: planos e exercícios de 1 semana a anos,
+e diretórios com milhares de perfis salvos. Tudo determinístico pela seed.
+"""
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from body_core.macros import as_macro_plan
+from body_core.plans import DAYS, MEALS
+from body_core.profiles import Profile
+
+
+def synthetic_plan(weeks: int = 1, seed: int = 0) -> pd.DataFrame:
+    """
+    Plano com weeks × 7 dias × refeições linhas, no formato de init_week_plan (índice rid)
+    """
+    rng = np.random.default_rng(seed)
+    n = weeks * len(DAYS) * len(MEALS)
+    day = np.tile(np.repeat(DAYS, len(MEALS)), weeks)
+    meal = np.tile(MEALS, weeks * len(DAYS))
+    kcal = rng.integers(50, 800, size=n)
+    return as_macro_plan(pd.DataFrame({
+        "rid": np.arange(1, n + 1),
+        "Dia": day,
+        "Refeição": meal,
+        "Descrição": [f"Refeição {i % 97}" for i in range(n)],
+        "Calorias (kcal)": kcal.astype(int),
+    }).set_index("rid"))
+
+def synthetic_exercise(weeks: int = 1, seed: int = 0) -> pd.DataFrame:
+    """
+    Exercícios no formato de init_exercise_df (uma linha por atividade): corrida em ~2/3 dos
+    dias e musculação em ~3/4, com rids 1..n
+    """
+    rng = np.random.default_rng(seed + 1)
+    n = weeks * len(DAYS)
+    day = np.tile(DAYS, weeks)
+    run_min = rng.uniform(15, 90, size=n).round(0)
+    run_min[rng.random(n) < 0.33] = 0.0
+    run_km = (run_min / 60 * rng.uniform(6, 13, size=n)).round(1)
+    strength_min = rng.choice([0.0, 30.0, 45.0, 60.0], size=n)
+    runs, strength = run_min > 0, strength_min > 0
+    df = pd.concat([
+        pd.DataFrame({"pos": np.flatnonzero(runs) * 2, "Dia": day[runs], "Atividade": "Corrida",
+                      "Minutos": run_min[runs], "Distância (km)": run_km[runs]}),
+        pd.DataFrame({"pos": np.flatnonzero(strength) * 2 + 1, "Dia": day[strength], "Atividade": "Musculação",
+                      "Minutos": strength_min[strength], "Distância (km)": 0.0}),
+    ]).sort_values("pos").drop(columns=["pos"])
+    df["Inclinação (%)"] = 0.0
+    df["Intensidade"] = "Moderada"
+    df["MET (relógio)"] = 0.0
+    df.index = pd.Index(np.arange(1, len(df) + 1), name="rid")
+    return df
+
+def synthetic_profiles(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed + 2)
+    return [
+        Profile(
+            name=f"Perfil {i}",
+            age=int(rng.integers(18, 70)),
+            weight_kg=round(float(rng.uniform(50, 120)), 1),
+            sex="M" if i % 2 else "F",
+            daily_limit_kcal=int(rng.choice([1300, 1500, 1800, 2000])),
+            default_height_cm=int(rng.integers(150, 195)),
+            default_activity_factor=1.55,
+        )
+        for i in range(n)
+    ]
+
+def write_profile_dir(data_dir: Path, n_profiles: int, weeks: int = 1, seed: int = 0) -> list:
+    """
+    Grava profiles.json + um state_*.json por perfil (mesmo formato do backend JSON)
+    """
+    from body_core.paths import _profile_slug
+    from body_core.storage import _write_state_snapshot
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    profiles = synthetic_profiles(n_profiles, seed)
+    (data_dir / "profiles.json").write_text(
+        json.dumps([asdict(p) for p in profiles], ensure_ascii=False), encoding="utf-8"
+    )
+    plan, ex = synthetic_plan(weeks, seed), synthetic_exercise(weeks, seed)
+    for p in profiles:
+        scalars = {"weight_kg": p.weight_kg, "height_cm": p.default_height_cm, "activity_factor": p.default_activity_factor}
+        _write_state_snapshot(data_dir / f"state_{_profile_slug(p.name)}.json", plan, ex, scalars)
+    return profiles
+
+def write_history_db(db_path: Path, weeks: int, profile: str = "Perfil 0", seed: int = 0):
+    """
+    Banco SQLite com `weeks` semanas ISO seguidas do perfil, terminando na semana passada
+    (peso descendo 0,1 kg por semana); devolve o SqliteStorage aberto
+    """
+    from datetime import date, timedelta
+
+    from body_core.storage import SqliteStorage, iso_week
+
+    storage = SqliteStorage(db_path)
+    today = date.today()
+    for i in range(weeks, 0, -1):
+        scalars = {"weight_kg": round(80.0 + 0.1 * i, 1), "height_cm": 178, "activity_factor": 1.55, "version": weeks - i + 1}
+        storage.write(
+            profile, synthetic_plan(1, seed + i), synthetic_exercise(1, seed + i), scalars,
+            week=iso_week(today - timedelta(weeks=i)),
+        )
+    return storage
+
+FOOD_BASES = [
+    "Frango", "Carne bovina", "Peixe", "Ovo", "Arroz", "Feijão", "Batata", "Abóbora", "Abobrinha",
+    "Berinjela", "Alface", "Tomate", "Banana", "Maçã", "Mamão", "Uva", "Pão", "Queijo", "Iogurte", "Leite",
+]
+FOOD_PARTS = ["peito", "coxa", "integral", "branco", "doce", "inglesa", "prata", "nanica", "minas", "desnatado"]
+FOOD_PREP = ["cru", "cozido", "grelhado", "assado", "frito", "refogado", "no vapor", "desidratado"]
+
+def synthetic_food_csv(path: Path, n: int, seed: int = 0) -> Path:
+    """
+    CSV no formato da TACO (';' e vírgula decimal) com n alimentos de nomes combinados
+    """
+    rng = np.random.default_rng(seed + 3)
+    base = rng.integers(0, len(FOOD_BASES), n)
+    part = rng.integers(0, len(FOOD_PARTS), n)
+    prep = rng.integers(0, len(FOOD_PREP), n)
+    kcal = rng.uniform(10, 900, n)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Descrição dos alimentos;Energia (kJ);Energia (kcal);Proteína (g);Carboidrato (g);Lipídeos (g)\n")
+        for i in range(n):
+            name = f"{FOOD_BASES[base[i]]} {FOOD_PARTS[part[i]]} {FOOD_PREP[prep[i]]} marca {i}"
+            f.write(f"{name};{kcal[i] * 4.184:.0f};{kcal[i]:.1f}".replace(".", ",") + ";10,0;20,0;5,0\n")
+    return path
+
+def synthetic_track(path: Path, hours: float = 1.0, fmt: str = "gpx", seed: int = 0,
+                    start: str = "2024-03-04T06:00:00") -> Path:
+    """
+    Corrida gravada a 1 Hz (GPX, TCX ou CSV) com ritmo variando entre 7 e 14 km/h e
+    pausas de 1 min a cada ~20 min; escrita linha a linha, sem montar o arquivo em memória
+    """
+    rng = np.random.default_rng(seed + 4)
+    t0 = np.datetime64(start, "s")
+    lat, lon, dist = -23.55, -46.63, 0.0
+    heading = rng.uniform(0, 2 * np.pi)
+    n = int(hours * 3600)
+    with open(path, "w", encoding="utf-8") as f:
+        if fmt == "gpx":
+            f.write('<?xml version="1.0"?>\n<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>\n')
+        elif fmt == "tcx":
+            f.write('<?xml version="1.0"?>\n<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/'
+                    'TrainingCenterDatabase/v2"><Activities><Activity Sport="Running"><Lap><Track>\n')
+        else:
+            f.write("time,lat,lon,distance\n")
+        i = 0
+        while i < n:
+            if i and i % 1200 == 0:
+                i += 60  # pausa: sem pontos por 1 min
+            speed_ms = (10.5 + 3.5 * np.sin(i / 600.0) + rng.normal(0, 0.3)) / 3.6
+            heading += rng.normal(0, 0.05)
+            lat += speed_ms * np.cos(heading) / 111_195.0
+            lon += speed_ms * np.sin(heading) / (111_195.0 * np.cos(np.radians(lat)))
+            dist += speed_ms
+            when = f"{t0 + np.timedelta64(i, 's')}Z"
+            if fmt == "gpx":
+                f.write(f'<trkpt lat="{lat:.7f}" lon="{lon:.7f}"><ele>760</ele><time>{when}</time></trkpt>\n')
+            elif fmt == "tcx":
+                f.write(f"<Trackpoint><Time>{when}</Time><Position><LatitudeDegrees>{lat:.7f}</LatitudeDegrees>"
+                        f"<LongitudeDegrees>{lon:.7f}</LongitudeDegrees></Position>"
+                        f"<DistanceMeters>{dist:.1f}</DistanceMeters></Trackpoint>\n")
+            else:
+                f.write(f"{when},{lat:.7f},{lon:.7f},{dist:.1f}\n")
+            i += 1
+        if fmt == "gpx":
+            f.write("</trkseg></trk></gpx>\n")
+        elif fmt == "tcx":
+            f.write("</Track></Lap></Activity></Activities></TrainingCenterDatabase>\n")
+    return path
@@ -0,0 +1,99 @@
+"""
+Núcleo do Body assistant, sem Streamlit: cálculos, plano, perfis e persistência.
+
+Os nomes abaixo são resolvidos sob demanda (PEP 562): ``from body_core import
+kcal_from_met`` carrega só ``body_core.exercise``, sem pandas, NumPy ou Streamlit.
+"""
+import importlib
+
+_EXPORTS = {
+    # exercício
+    "RUN_MIN_SPEED_KMH": "exercise",
+    "RUN_SPEED_EDGES_KMH": "exercise",
+    "RUN_MET_BANDS": "exercise",
+    "kcal_from_met": "exercise",
+    "running_met_from_speed_kmh": "exercise",
+    "calc_running_kcal": "exercise",
+    "kcal_from_met_batch": "exercise",
+    "running_met_batch": "exercise",
+    "calc_running_kcal_batch": "exercise",
+    # metabolismo
+    "KCAL_PER_KG": "metabolism",
+    "ACTIVITY_LEVELS": "metabolism",
+    "bmr_mifflin_st_jeor": "metabolism",
+    "bmr_mifflin_st_jeor_batch": "metabolism",
+    "tdee_kcal_day": "metabolism",
+    "daily_energy_budget": "metabolism",
+    # plano
+    "DAYS": "plans",
+    "DAY_ORDER": "plans",
+    "MEALS": "plans",
+    "meal_plan_template": "plans",
+    "init_week_plan": "plans",
+    "init_exercise_df": "plans",
+    "as_activity_rows": "plans",
+    "MACRO_COLUMNS": "plans",
+    "as_macro_plan": "macros",
+    "daily_macro_totals": "macros",
+    "macro_targets": "macros",
+    # catálogo de atividades (MET por faixas)
+    "INTENSITY_LEVELS": "activities",
+    "get_activity_catalog": "activities",
+    # gerador do plano pelo limite diário
+    "generate_week_plan": "mealgen",
+    "generate_week_plans": "mealgen",
+    "get_dish_pool": "mealgen",
+    # corridas do relógio
+    "read_run": "tracks",
+    "import_runs": "tracks",
+    "runs_by_date": "tracks",
+    # catálogo de alimentos
+    "get_food_catalog": "foods",
+    # perfis
+    "Profile": "profiles",
+    "DEFAULT_PROFILES": "profiles",
+    "load_profile_registry": "profiles",
+    # projeção e cenários
+    "simulate_weight_trajectory": "simulation",
+    "weight_projection_frame": "simulation",
+    "scenario_sweep": "simulation",
+    "sweep_heatmap": "simulation",
+    # edição e resumo
+    "EditorMerge": "editing",
+    "merge_editor_delta": "editing",
+    "diff_edited_rows": "editing",
+    "merge_editor_rows": "editing",
+    "compute_exercise_calc": "summary",
+    "DailyAggregates": "summary",
+    # persistência
+    "DATA_DIR": "paths",
+    "state_path": "paths",
+    "save_profile_state": "storage",
+    "load_profile_state": "storage",
+    "get_storage": "storage",
+    "import_json_states": "storage",
+    "ProfileSession": "concurrency",
+    "commit_profile_state": "concurrency",
+    # histórico de longo prazo (SQLite)
+    "History": "analytics",
+    "load_history": "analytics",
+    "page_slice": "analytics",
+    "downsample": "analytics",
+    # cache
+    "memo_stats": "cache",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,163 @@
+"""
+Catálogo de atividades físicas: MET por faixas, no estilo do Compendium of Physical Activities.
+
+Cada atividade tem uma tabela de faixas sobre um parâmetro da linha de exercício:
+- velocidade: km/h, calculada de Distância (km) e Minutos (corrida, ciclismo)
+- inclinacao: Inclinação (%) (caminhada)
+- intensidade: Leve/Moderada/Vigorosa = 1/2/3 (musculação, HIIT, natação, ergométrica)
+O MET de uma faixa vale do seu limite (a_partir_de) até o limite seguinte.
+
+Na carga, as faixas de todas as atividades vão para dois vetores NumPy ordenados: chave =
+código da atividade × KEY_SPAN + limite, e o MET da faixa. O MET de um lote de linhas,
+com qualquer mistura de atividades, é um searchsorted só sobre esses vetores.
+
+O catálogo vem de activities_seed.csv (pacote) ou de DATA_DIR/activities.csv /
+BODY_ASSISTANT_ACTIVITIES, com as colunas atividade,parametro,a_partir_de,met.
+"""
+import csv
+import io
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .exercise import RUN_MIN_SPEED_KMH, kcal_from_met_batch
+from .paths import DATA_DIR
+
+SEED_ACTIVITIES_PATH = Path(__file__).with_name("activities_seed.csv")
+ACTIVITIES_PATH = Path(os.environ.get("BODY_ASSISTANT_ACTIVITIES", DATA_DIR / "activities.csv"))
+
+PARAMS = ("velocidade", "inclinacao", "intensidade")
+SPEED, INCLINE, INTENSITY = range(len(PARAMS))
+INTENSITY_LEVELS = ("Leve", "Moderada", "Vigorosa")  # níveis 1, 2, 3
+DEFAULT_INTENSITY = "Moderada"
+KEY_SPAN = 1e6  # maior que qualquer limite: as faixas de uma atividade não invadem a seguinte
+
+
+class ActivityCatalog:
+    """
+    Atividades e faixas de MET em vetores ordenados (um searchsorted resolve um lote)
+    """
+
+    def __init__(self, names: list, params: list, bands: list):
+        # bands[i] = [(a_partir_de, met), ...] da atividade i, em ordem crescente
+        self.names = list(names)
+        self.version = None  # (arquivo, mtime_ns, tamanho) quando vem de get_activity_catalog
+        self.param = np.asarray([PARAMS.index(p) for p in params], dtype=np.int8)
+        keys, mets = [], []
+        for code, activity_bands in enumerate(bands):
+            for i, (start, met) in enumerate(activity_bands):
+                # A primeira faixa cobre também os valores abaixo do seu limite
+                keys.append(code * KEY_SPAN + (0.0 if i == 0 else float(start)))
+                mets.append(float(met))
+        self.keys = np.asarray(keys)
+        self.mets = np.asarray(mets)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def codes(self, activities) -> np.ndarray:
+        """
+        Código de cada nome de atividade (-1 se não está no catálogo)
+        """
+        import pandas as pd
+
+        return pd.Categorical(activities, categories=self.names).codes.astype(np.int64)
+
+    def met(self, codes, speed_kmh, incline_pct, intensity_level) -> np.ndarray:
+        """
+        MET por linha: cada linha usa o parâmetro da sua atividade. Atividade desconhecida
+        ou atividade por velocidade sem distância/tempo (parada) dá MET 0.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        known = codes >= 0
+        param = self.param[np.where(known, codes, 0)]
+        speed = np.nan_to_num(np.asarray(speed_kmh, dtype=float))
+        values = np.choose(param, [
+            speed,
+            np.nan_to_num(np.asarray(incline_pct, dtype=float)),
+            np.asarray(intensity_level, dtype=float),
+        ])
+        keys = codes * KEY_SPAN + np.clip(values, 0.0, KEY_SPAN / 2)
+        met = self.mets[np.clip(np.searchsorted(self.keys, keys, side="right") - 1, 0, len(self.mets) - 1)]
+        stopped = (param == SPEED) & (speed <= RUN_MIN_SPEED_KMH)
+        return np.where(known & ~stopped, met, 0.0)
+
+    def energy(self, weight_kg, activities, minutes, distance_km, incline_pct, intensity, measured_met=None) -> dict:
+        """
+        Velocidade, MET e kcal de um lote de linhas de exercício (colunas inteiras).
+        measured_met: MET medido por linha (corrida importada do relógio); > 0 vale no
+        lugar do MET do catálogo.
+        """
+        minutes = np.fmax(0.0, np.nan_to_num(np.asarray(minutes, dtype=float)))
+        distance_km = np.fmax(0.0, np.nan_to_num(np.asarray(distance_km, dtype=float)))
+        moving = (minutes > 0.0) & (distance_km > 0.0)
+        speed = np.where(moving, distance_km / np.where(moving, minutes, 1.0) * 60.0, 0.0)
+        met = self.met(self.codes(activities), speed, incline_pct, intensity_levels(intensity))
+        if measured_met is not None:
+            measured = np.nan_to_num(np.asarray(measured_met, dtype=float))
+            met = np.where(measured > 0.0, measured, met)
+        return {"speed": speed, "met": met, "kcal": kcal_from_met_batch(weight_kg, minutes, met)}
+
+def intensity_levels(values) -> np.ndarray:
+    """
+    Leve/Moderada/Vigorosa -> 1/2/3; vazio ou outro texto conta como DEFAULT_INTENSITY
+    """
+    import pandas as pd
+
+    codes = pd.Categorical(values, categories=INTENSITY_LEVELS).codes
+    return np.where(codes >= 0, codes, INTENSITY_LEVELS.index(DEFAULT_INTENSITY)) + 1
+
+def parse_activity_csv(data: bytes) -> ActivityCatalog:
+    """
+    CSV atividade,parametro,a_partir_de,met (',' ou ';', vírgula decimal aceita).
+    As atividades ficam na ordem em que aparecem; as faixas, ordenadas pelo limite.
+    """
+    text = data.decode("utf-8-sig")
+    first_line = text.split("\n", 1)[0]
+    reader = csv.reader(io.StringIO(text), delimiter=";" if first_line.count(";") > first_line.count(",") else ",")
+    header = [h.strip().lower() for h in next(reader)]
+    try:
+        cols = [header.index(c) for c in ("atividade", "parametro", "a_partir_de", "met")]
+    except ValueError:
+        raise ValueError(f"CSV de atividades precisa de atividade,parametro,a_partir_de,met; cabeçalho: {header}")
+    params, bands = {}, {}
+    for row in reader:
+        if len(row) <= max(cols) or not row[cols[0]].strip():
+            continue
+        name, param, start, met = (row[i].strip() for i in cols)
+        if param not in PARAMS:
+            raise ValueError(f"{name}: parâmetro {param!r} (aceitos: {', '.join(PARAMS)})")
+        if params.setdefault(name, param) != param:
+            raise ValueError(f"{name}: faixas com parâmetros diferentes ({params[name]} e {param})")
+        bands.setdefault(name, []).append((float(start.replace(",", ".")), float(met.replace(",", "."))))
+    names = list(bands)
+    return ActivityCatalog(names, [params[n] for n in names], [sorted(bands[n]) for n in names])
+
+_CATALOGS = {}  # caminho -> ((mtime_ns, tamanho), catálogo)
+_CATALOGS_LOCK = threading.Lock()
+
+def get_activity_catalog(csv_path: Path = None) -> ActivityCatalog:
+    """
+    Catálogo do processo: ACTIVITIES_PATH se existir, senão o catálogo-semente do pacote.
+    Recarregado só quando o arquivo muda.
+    """
+    if csv_path is None:
+        csv_path = ACTIVITIES_PATH if ACTIVITIES_PATH.exists() else SEED_ACTIVITIES_PATH
+    st = csv_path.stat()
+    version = (st.st_mtime_ns, st.st_size)
+    with _CATALOGS_LOCK:
+        hit = _CATALOGS.get(str(csv_path))
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        catalog = parse_activity_csv(csv_path.read_bytes())
+        catalog.version = (str(csv_path), *version)
+        _CATALOGS[str(csv_path)] = (version, catalog)
+        return catalog
+
+def activity_catalog_version() -> tuple:
+    """
+    Versão do catálogo em uso: entra nas chaves de cache de tudo que calcula gasto
+    """
+    return get_activity_catalog().version
@@ -0,0 +1,274 @@
+"""
+Histórico de longo prazo: totais por dia e por semana de meses a anos, médias móveis,
+resumos por mês/trimestre/ano, páginas de tabela e séries reduzidas para gráfico.
+
+O histórico são as semanas ISO gravadas no backend SQLite (BODY_ASSISTANT_STORAGE=sqlite);
+nos backends JSON e Arrow só existe a semana atual. Cada semana vira uma matriz
+(7 dias × ingestão, exercício, proteína) mais peso/altura/atividade; o histórico é a
+pilha dessas matrizes, e TDEE, balanço, aderência e janelas saem dela vetorizados.
+
+Semanas completas (anteriores à atual) ficam no cache "analytics_week" pela impressão
+digital da semana (SqliteStorage.week_fingerprints, uma consulta agregada) e pela versão do
+catálogo de atividades: abrir um ano de novo lê só as semanas que mudaram desde a
+última vez, e a semana atual vem da sessão.
+"""
+import numpy as np
+import pandas as pd
+
+from .activities import activity_catalog_version, get_activity_catalog
+from .cache import named_cache
+from .metabolism import KCAL_PER_KG, bmr_mifflin_st_jeor_batch
+from .plans import DAYS
+from .profiles import Profile
+
+WEEK_CACHE_SIZE = 8192  # semanas (≈ 300 bytes cada): perfis × anos
+DAY_METRICS = ["Ingestão (kcal)", "Exercício (kcal)", "Proteína (g)"]
+ROLLING_COLUMNS = ["Ingestão (kcal)", "Exercício (kcal)", "Balanço (kcal)", "Peso (kg)"]
+PERIODS = {"Mês": "M", "Trimestre": "Q", "Ano": "Y"}
+OVER_LIMIT_STYLE = "background-color: rgba(255, 0, 0, 0.18)"
+
+
+def week_monday(weeks) -> pd.DatetimeIndex:
+    """
+    Segunda-feira de cada semana ISO ("2026-W42")
+    """
+    return pd.to_datetime(pd.Index(weeks, dtype=object) + "-1", format="%G-W%V-%u")
+
+def week_matrices(plan: pd.DataFrame, ex: pd.DataFrame, weeks: list, weights) -> np.ndarray:
+    """
+    (semanas × 7 dias × DAY_METRICS) de um lote de semanas. plan tem iso_week, Dia,
+    kcal e proteína; ex as colunas de atividade e iso_week; weights o peso de cada semana
+    (o gasto do exercício é pelo peso da própria semana).
+    """
+    pos = pd.Index(weeks)
+    out = np.zeros((len(weeks), len(DAYS), len(DAY_METRICS)))
+    day_codes = pd.Index(DAYS)
+
+    w, d = pos.get_indexer(plan["iso_week"]), day_codes.get_indexer(plan["Dia"])
+    known = (w >= 0) & (d >= 0)
+    np.add.at(out[..., 0], (w[known], d[known]), plan["kcal"].to_numpy(dtype=float)[known])
+    np.add.at(out[..., 2], (w[known], d[known]), np.nan_to_num(plan["protein_g"].to_numpy(dtype=float))[known])
+
+    if len(ex):
+        w, d = pos.get_indexer(ex["iso_week"]), day_codes.get_indexer(ex["Dia"])
+        energy = get_activity_catalog().energy(
+            np.asarray(weights, dtype=float)[w],
+            ex["Atividade"].to_numpy(dtype=object),
+            ex["Minutos"].to_numpy(dtype=float),
+            ex["Distância (km)"].to_numpy(dtype=float),
+            ex["Inclinação (%)"].to_numpy(dtype=float),
+            ex["Intensidade"].to_numpy(dtype=object),
+            ex["MET (relógio)"].to_numpy(dtype=float) if "MET (relógio)" in ex else None,
+        )
+        known = (w >= 0) & (d >= 0)
+        # Arredondado por linha, como o gasto da tabela de exercícios
+        np.add.at(out[..., 1], (w[known], d[known]), np.rint(energy["kcal"])[known])
+    return out
+
+def _stored_weeks(storage, profile_name: str, first_week: str, current_week: str, with_current: bool):
+    """
+    Semanas gravadas de first_week em diante (até a atual, se with_current): (semanas,
+    matrizes, escalares). Completas vêm do cache; as que faltam são lidas e calculadas
+    num lote só.
+    """
+    from .storage import SqliteStorage
+
+    if not isinstance(storage, SqliteStorage):
+        return [], np.zeros((0, len(DAYS), len(DAY_METRICS))), np.zeros((0, 3))
+    cache = named_cache("analytics_week", maxsize=WEEK_CACHE_SIZE)
+    found = [
+        (w, fp) for w, fp in storage.week_fingerprints(profile_name, first_week, current_week)
+        if with_current or w != current_week
+    ]
+    catalog = activity_catalog_version()  # gasto recalculado se o catálogo de atividades mudar
+    keys = [f"{storage.db_path}|{profile_name}|{w}|{fp}|{catalog}" for w, fp in found]
+    values = [cache.get(k) if w < current_week else None for k, (w, _) in zip(keys, found)]
+    missing = [w for (w, _), v in zip(found, values) if v is None]
+    if missing:
+        plan, ex, measures = storage.week_rows(profile_name, missing)
+        measures = measures.set_index("iso_week").reindex(missing)
+        mats = week_matrices(plan.rename(columns={"day": "Dia"}), ex, missing, measures["weight_kg"].to_numpy(dtype=float))
+        scalars = measures[["weight_kg", "height_cm", "activity_factor"]].to_numpy(dtype=float)
+        computed = {w: (mats[i], scalars[i]) for i, w in enumerate(missing)}
+        for k, (w, _) in zip(keys, found):
+            if w in computed and w < current_week:
+                cache.put(k, computed[w])
+        values = [v if v is not None else computed[w] for (w, _), v in zip(found, values)]
+    weeks = [w for w, _ in found]
+    return (
+        weeks,
+        np.stack([v[0] for v in values]) if values else np.zeros((0, len(DAYS), len(DAY_METRICS))),
+        np.stack([v[1] for v in values]) if values else np.zeros((0, 3)),
+    )
+
+def adherence_pct(within, logged):
+    """
+    Dias no limite / dias registrados em %, com 1 casa; NaN onde não há dia registrado
+    """
+    within, logged = np.asarray(within, dtype=float), np.asarray(logged, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.round(np.where(logged > 0, within / logged * 100, np.nan), 1)
+
+class History:
+    """
+    Histórico de um perfil: `days` (uma linha por dia) e `weekly` (uma por semana,
+    indexado pela segunda-feira), das matrizes de week_matrices
+    """
+
+    def __init__(self, prof: Profile, weeks: list, mats: np.ndarray, scalars: np.ndarray):
+        self.prof = prof
+        self.weeks = list(weeks)
+        n = len(self.weeks)
+        limit = int(prof.daily_limit_kcal)
+        weight, height, activity = scalars[:, 0], scalars[:, 1], scalars[:, 2]
+        tdee_day = bmr_mifflin_st_jeor_batch(np.full(n, prof.sex), weight, height, np.full(n, prof.age)) * activity
+        intake, ex_kcal, protein = mats[..., 0], mats[..., 1], mats[..., 2]
+        balance = intake - (tdee_day[:, None] + ex_kcal)
+        # Dia sem nada registrado (0 kcal) não conta na aderência, nem como dentro nem como fora
+        logged = intake > 0
+        within = logged & (intake <= limit)
+        monday = week_monday(self.weeks)
+
+        self.days = pd.DataFrame({
+            "Semana": np.repeat(self.weeks, len(DAYS)),
+            "Data": (monday.values[:, None] + np.arange(len(DAYS)) * np.timedelta64(1, "D")).reshape(-1),
+            "Dia": np.tile(DAYS, n),
+            "Ingestão (kcal)": intake.reshape(-1).astype(int),
+            "Exercício (kcal)": ex_kcal.reshape(-1).astype(int),
+            "Proteína (g)": np.round(protein.reshape(-1), 1),
+            "Peso (kg)": np.repeat(weight, len(DAYS)),
+            "Limite diário (kcal)": limit,
+            "Balanço (kcal)": np.rint(balance.reshape(-1)).astype(int),
+        })
+        week_tdee = np.rint(tdee_day * len(DAYS))
+        week_balance = intake.sum(axis=1) - (week_tdee + ex_kcal.sum(axis=1))
+        self.weekly = pd.DataFrame({
+            "Semana": self.weeks,
+            "Ingestão (kcal)": intake.sum(axis=1).astype(int),
+            "Exercício (kcal)": ex_kcal.sum(axis=1).astype(int),
+            "TDEE (kcal)": week_tdee.astype(int),
+            "Balanço (kcal)": np.rint(week_balance).astype(int),
+            "Variação prevista (kg)": np.round(week_balance / KCAL_PER_KG, 2),
+            "Peso (kg)": weight,
+            "Proteína (g/dia)": np.round(protein.mean(axis=1), 1),
+            "Dias registrados": logged.sum(axis=1),
+            "Dias no limite": within.sum(axis=1),
+            "Aderência (%)": adherence_pct(within.sum(axis=1), logged.sum(axis=1)),
+        }, index=pd.DatetimeIndex(monday, name="Início"))
+
+    def adherence(self) -> float:
+        """
+        Aderência (%) do período todo: dias no limite / dias registrados (NaN sem registro)
+        """
+        return float(adherence_pct(self.weekly["Dias no limite"].sum(), self.weekly["Dias registrados"].sum()))
+
+    def __len__(self) -> int:
+        return len(self.weeks)
+
+    def rolling(self, window_weeks: int = 4) -> pd.DataFrame:
+        """
+        Médias móveis das últimas window_weeks semanas de calendário (semanas sem registro
+        não contam) e a variação de peso real por semana contra a prevista pelo balanço
+        """
+        weekly = self.weekly
+        window = f"{7 * window_weeks}D"
+        out = weekly[ROLLING_COLUMNS].rolling(window, min_periods=1).mean()
+        days = weekly[["Dias no limite", "Dias registrados"]].rolling(window, min_periods=1).sum()
+        out["Aderência (%)"] = adherence_pct(days["Dias no limite"], days["Dias registrados"])
+        elapsed = weekly.index.to_series().diff().dt.days.to_numpy() / 7.0
+        real = weekly["Peso (kg)"].diff().to_numpy() / np.where(elapsed > 0, elapsed, np.nan)
+        out["Variação real (kg/sem)"] = pd.Series(real, index=weekly.index).rolling(window, min_periods=1).mean()
+        out["Variação prevista (kg/sem)"] = weekly["Variação prevista (kg)"].rolling(window, min_periods=1).mean()
+        return out.round(2).rename(columns=lambda c: f"{c} · {window_weeks} sem")
+
+    def periods(self, freq: str = "M") -> pd.DataFrame:
+        """
+        Um resumo por mês ("M"), trimestre ("Q") ou ano ("Y"), pela semana de início
+        """
+        weekly = self.weekly
+        groups = weekly.groupby(weekly.index.to_period(freq))
+        out = groups.agg(**{
+            "Semanas": ("Semana", "size"),
+            "Ingestão (kcal/dia)": ("Ingestão (kcal)", "sum"),
+            "Exercício (kcal)": ("Exercício (kcal)", "sum"),
+            "Balanço (kcal)": ("Balanço (kcal)", "sum"),
+            "Peso inicial (kg)": ("Peso (kg)", "first"),
+            "Peso final (kg)": ("Peso (kg)", "last"),
+            "Dias registrados": ("Dias registrados", "sum"),
+            "Dias no limite": ("Dias no limite", "sum"),
+        })
+        out["Aderência (%)"] = adherence_pct(out["Dias no limite"], out["Dias registrados"])
+        # Média pelos dias registrados (como a aderência); vazio (NA) no período sem registro
+        logged = out["Dias registrados"].where(out["Dias registrados"] > 0)
+        out["Ingestão (kcal/dia)"] = np.rint(out["Ingestão (kcal/dia)"] / logged).astype("Int64")
+        out["Variação (kg)"] = out["Peso final (kg)"] - out["Peso inicial (kg)"]
+        out["Variação prevista (kg)"] = out["Balanço (kcal)"] / KCAL_PER_KG
+        out.index = out.index.astype(str)
+        out.index.name = "Período"
+        return out.round(2)
+
+def load_history(
+    prof: Profile, storage=None, first_week: str = "0000-W01", current=None, current_week: str = None,
+) -> History:
+    """
+    Histórico de first_week até a semana atual. current = (plano, exercícios, peso, altura,
+    atividade) da sessão para a semana atual (edições ainda não gravadas); sem ele, a semana
+    atual é a gravada.
+    """
+    from .storage import get_storage, iso_week
+
+    storage = storage or get_storage()
+    current_week = current_week or iso_week()
+    weeks, mats, scalars = _stored_weeks(storage, prof.name, first_week, current_week, with_current=current is None)
+    if current is not None:
+        plan_df, ex_df, weight_kg, height_cm, activity_factor = current
+        plan = pd.DataFrame({
+            "iso_week": current_week,
+            "Dia": plan_df["Dia"].to_numpy(dtype=object),
+            "kcal": plan_df["Calorias (kcal)"].to_numpy(dtype=float),
+            "protein_g": plan_df["Proteína (g)"].to_numpy(dtype=float) if "Proteína (g)" in plan_df else 0.0,
+        })
+        ex = ex_df.assign(iso_week=current_week) if len(ex_df) else ex_df
+        weeks = weeks + [current_week]
+        mats = np.concatenate([mats, week_matrices(plan, ex, [current_week], [float(weight_kg)])])
+        scalars = np.concatenate([scalars, [[float(weight_kg), float(height_cm), float(activity_factor)]]])
+    return History(prof, weeks, mats, scalars)
+
+# ============================================================
+# Tabelas e gráficos
+# ============================================================
+def page_slice(df: pd.DataFrame, page: int, page_size: int):
+    """
+    (linhas da página, número de páginas): só a fatia vai para a tela
+    """
+    pages = max(1, -(-len(df) // page_size))
+    page = min(max(int(page), 1), pages)
+    return df.iloc[(page - 1) * page_size:page * page_size], pages
+
+def downsample(df: pd.DataFrame, max_points: int = 300) -> pd.DataFrame:
+    """
+    Série com no máximo max_points linhas: média de baldes de linhas seguidas (o índice é
+    o da primeira linha do balde). Série menor volta como está.
+    """
+    n = len(df)
+    if n <= max_points:
+        return df
+    starts = np.flatnonzero(np.diff(np.arange(n) * max_points // n, prepend=-1))
+    sizes = np.diff(np.append(starts, n))
+    values = df.to_numpy(dtype=float)
+    filled = np.nan_to_num(values)
+    counts = np.add.reduceat(~np.isnan(values), starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.add.reduceat(filled, starts, axis=0) / np.where(counts > 0, counts, np.nan)
+    out = pd.DataFrame(means, index=df.index[starts], columns=df.columns)
+    out.attrs["bucket_rows"] = int(sizes.max())
+    return out
+
+def over_limit_styles(frame: pd.DataFrame, column: str, limit) -> pd.DataFrame:
+    """
+    CSS de cada célula (Styler.apply com axis=None): linha inteira marcada quando
+    `column` passa do limite, sem função por linha
+    """
+    over = frame[column].to_numpy() > limit
+    css = np.where(over, OVER_LIMIT_STYLE, "")
+    return pd.DataFrame(np.repeat(css[:, None], frame.shape[1], axis=1), index=frame.index, columns=frame.columns)
@@ -0,0 +1,143 @@
+"""
+Cache por processo, compartilhado entre sessões.
+
+Resultados ficam em MemoCache nomeados (LRU + TTL opcional). A chave é o hash do
+conteúdo dos argumentos, então um DataFrame ou array igual (mesmo que outro objeto)
+acerta o cache. Quem chama uma função memoized recebe a própria cópia do valor
+guardado (rasa com o copy-on-write do pandas ligado), então alterá-la no lugar não
+muda o cache.
+"""
+import copy
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+
+def _feed(h, a, pd, np):
+    if pd is not None and isinstance(a, (pd.DataFrame, pd.Series)):
+        if isinstance(a, pd.DataFrame):
+            h.update(repr(("df", list(a.columns), [str(t) for t in a.dtypes])).encode())
+        else:
+            h.update(repr(("s", a.name, str(a.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(a, index=True).to_numpy().tobytes())
+    elif np is not None and isinstance(a, np.ndarray):
+        # Os bytes, não o repr: o repr de array grande é abreviado com "..."
+        h.update(repr(("nd", a.dtype.str, a.shape)).encode())
+        h.update(repr(a.tolist()).encode() if a.dtype.hasobject else np.ascontiguousarray(a).tobytes())
+    elif isinstance(a, (list, tuple)):
+        h.update(f"{type(a).__name__}[{len(a)}](".encode())
+        for item in a:
+            _feed(h, item, pd, np)
+            h.update(b",")
+        h.update(b")")
+    else:
+        h.update(repr(a).encode())
+
+def content_key(*args) -> str:
+    # Sem DataFrame/array nos argumentos não precisa importar pandas/numpy
+    pd, np = sys.modules.get("pandas"), sys.modules.get("numpy")
+    h = hashlib.blake2b(digest_size=16)
+    for a in args:
+        _feed(h, a, pd, np)
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def private_copy(value):
+    """
+    Cópia do valor guardado para quem chama. DataFrame/Series: rasa com o copy-on-write
+    do pandas ligado (os dados só são copiados se alguém escrever), senão profunda.
+    dict/list/set e arrays são copiados; o resto (tuplas de números, texto) é imutável.
+    """
+    pd, np = sys.modules.get("pandas"), sys.modules.get("numpy")
+    if pd is not None and isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=pd.get_option("mode.copy_on_write") is not True)  # "warn" ainda altera no lugar
+    if np is not None and isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, (dict, list, set)):
+        return copy.copy(value)
+    return value
+
+class MemoCache:
+    def __init__(self, maxsize: int = 256, ttl_s: float = None):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # chave -> (criado_em, valor)
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        """
+        Valor guardado para a chave (conta acerto/erro), sem calcular
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (self.ttl_s is None or now - item[0] < self.ttl_s):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+        return default
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_or_compute(self, key: str, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_memo_caches() -> dict:
+    return _CACHES
+
+def named_cache(name: str, maxsize: int = 256, ttl_s: float = None) -> MemoCache:
+    """
+    O MemoCache `name` do processo (criado na primeira chamada)
+    """
+    cache = _CACHES.get(name)
+    if cache is None:
+        with _CACHES_LOCK:
+            cache = _CACHES.setdefault(name, MemoCache(maxsize, ttl_s))
+    return cache
+
+def memoized(name: str, maxsize: int = 256, ttl_s: float = None, depends_on=None):
+    """
+    Memoiza fn no MemoCache `name` pela chave de conteúdo dos argumentos. depends_on():
+    versão do que fn lê fora dos argumentos (ex.: um catálogo recarregável), também na chave.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args):
+            cache = named_cache(name, maxsize, ttl_s)
+            key = content_key(*args) if depends_on is None else content_key(depends_on(), *args)
+            return private_copy(cache.get_or_compute(key, lambda: fn(*args)))
+        return wrapper
+    return decorator
+
+def memo_stats() -> dict:
+    """
+    Contadores de acerto/erro de cada cache nomeado
+    """
+    return {name: cache.stats() for name, cache in sorted(get_memo_caches().items())}
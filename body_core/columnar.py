@@ -0,0 +1,237 @@
+"""
+Formato colunar do estado (Arrow IPC / Feather v2), lido por memory map.
+
+Cada perfil vira dois arquivos, state_<perfil>.plan.arrow e state_<perfil>.exercise.arrow,
+com dtypes explícitos: Dia, Refeição e Intensidade como dicionário (categorical no
+pandas, na ordem da UI), kcal em int32, macros em float32, minutos/km/inclinação em float64. Peso, altura e
+atividade vão nos metadados do schema, e a versão do estado nos dois arquivos. Os arquivos
+são gravados sem compressão para que a leitura por memory map não copie as colunas numéricas.
+
+    BODY_ASSISTANT_STORAGE=arrow streamlit run app.py
+    python -m body_core.columnar to-arrow [--data-dir data]   # state_*.json -> .arrow
+    python -m body_core.columnar to-json  [--data-dir data]   # .arrow -> state_*.json
+
+pyarrow já vem como dependência do Streamlit; é importado só aqui, sob demanda.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from .activities import INTENSITY_LEVELS
+from .files import write_bytes_atomic
+from .instrument import count, span
+from .paths import DATA_DIR, arrow_paths
+from .macros import as_macro_plan
+from .plans import DAYS, MACRO_COLUMNS, MEALS, as_activity_rows
+from .storage import (
+    LOAD_RETRIES, PROFILE_SCALARS, VERSION_KEY, ProfileJournal, _stat_key, _write_state_snapshot, quarantine_file,
+    read_saved_state,
+)
+
+log = logging.getLogger(__name__)
+
+PLAN_SUFFIX = ".plan.arrow"
+EX_SUFFIX = ".exercise.arrow"
+# Colunas de dicionário -> categorias conhecidas, na ordem da UI
+DICTIONARY_ORDER = {"Dia": DAYS, "Refeição": MEALS, "Intensidade": list(INTENSITY_LEVELS)}
+
+
+def _schemas():
+    import pyarrow as pa
+
+    day = pa.dictionary(pa.int16(), pa.string())
+    plan = pa.schema([
+        ("rid", pa.int64()),
+        ("Dia", day),
+        ("Refeição", pa.dictionary(pa.int16(), pa.string())),
+        ("Descrição", pa.string()),
+        ("Calorias (kcal)", pa.int32()),
+        *((col, pa.float32()) for col in MACRO_COLUMNS),
+    ])
+    exercise = pa.schema([
+        ("rid", pa.int64()),
+        ("Dia", day),
+        ("Atividade", pa.string()),  # texto livre: um dicionário recusaria atividade nova na edição
+        ("Minutos", pa.float64()),
+        ("Distância (km)", pa.float64()),
+        ("Inclinação (%)", pa.float64()),
+        ("Intensidade", pa.dictionary(pa.int16(), pa.string())),
+        ("MET (relógio)", pa.float64()),
+    ])
+    return plan, exercise
+
+def _dictionary_array(values, known: list):
+    """
+    Dicionário com as categorias conhecidas primeiro (ordem da UI) e as demais depois
+    """
+    import pyarrow as pa
+
+    values = pd.Series(values, dtype=object).fillna("")
+    extra = sorted(set(values) - set(known))
+    cat = pd.Categorical(values, categories=list(known) + extra)
+    return pa.DictionaryArray.from_arrays(pa.array(cat.codes, type=pa.int16()), pa.array(cat.categories, type=pa.string()))
+
+def frame_to_table(df: pd.DataFrame, schema, metadata: dict = None):
+    import pyarrow as pa
+
+    flat = df.reset_index() if len(df.columns) else pd.DataFrame(index=range(len(df)))
+    arrays = []
+    for field in schema:
+        # Frame vazio vindo do JSON ("plan": []) não tem colunas: grava tabela vazia
+        col = flat[field.name] if field.name in flat else pd.Series(index=flat.index, dtype=object)
+        if pa.types.is_dictionary(field.type):
+            arrays.append(_dictionary_array(col, DICTIONARY_ORDER.get(field.name, [])))
+        elif pa.types.is_string(field.type):
+            arrays.append(pa.array(col.fillna("").astype(str), type=field.type))
+        else:
+            arrays.append(pa.array(col.to_numpy(), type=field.type))
+    meta = {k: json.dumps(v) for k, v in (metadata or {}).items()}
+    return pa.Table.from_arrays(arrays, schema=schema.with_metadata(meta))
+
+def table_to_frame(table) -> pd.DataFrame:
+    """
+    Tabela Arrow -> DataFrame indexado por rid (Dia/Refeição como categorical)
+    """
+    return table.to_pandas(split_blocks=True).set_index("rid")
+
+def _write_table(path: Path, table):
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    buf = sink.getvalue()
+    write_bytes_atomic(path, memoryview(buf))
+    count("storage_bytes_written", buf.size)
+
+def read_table(path: Path):
+    """
+    Lê um arquivo Arrow IPC por memory map: as colunas apontam para as páginas do arquivo
+    """
+    import pyarrow as pa
+
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+def write_arrow_state(plan_path: Path, ex_path: Path, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict):
+    plan_schema, ex_schema = _schemas()
+    version = int(scalars.get(VERSION_KEY, 0))
+    scalars = {k: scalars[k] for k in PROFILE_SCALARS if k in scalars}
+    # Exercícios primeiro, plano por último: os escalares valem pelo arquivo do plano
+    _write_table(ex_path, frame_to_table(as_activity_rows(ex_df), ex_schema, {VERSION_KEY: version}))
+    _write_table(plan_path, frame_to_table(as_macro_plan(plan_df), plan_schema, {"scalars": scalars, VERSION_KEY: version}))
+
+def _meta_version(table) -> int:
+    return json.loads((table.schema.metadata or {}).get(VERSION_KEY.encode(), b"0"))
+
+def read_arrow_state(plan_path: Path, ex_path: Path):
+    """
+    (plan_df, ex_df, scalars), ou None se o perfil não tem arquivos colunares
+    """
+    if not plan_path.exists() or not ex_path.exists():
+        return None
+    for attempt in range(LOAD_RETRIES):
+        # Leitura sem lock: se uma escrita trocou só um dos arquivos, as versões diferem e relê
+        plan_table = read_table(plan_path)
+        ex_table = read_table(ex_path)
+        if _meta_version(plan_table) == _meta_version(ex_table):
+            break
+        time.sleep(0.002 * (attempt + 1))
+    else:
+        log.warning("Versões diferentes em %s e %s; usando o par lido por último", plan_path, ex_path)
+    scalars = json.loads((plan_table.schema.metadata or {}).get(b"scalars", b"{}"))
+    scalars[VERSION_KEY] = _meta_version(plan_table)
+    # Arquivo de exercícios do formato antigo (uma linha por dia) lido já convertido
+    # Arquivos de antes dos macros: estimados na leitura (as_macro_plan)
+    return as_macro_plan(table_to_frame(plan_table)), as_activity_rows(table_to_frame(ex_table)), scalars
+
+class ArrowStorage:
+    """
+    Backend colunar: como o JSON (só a semana atual), mas em Arrow IPC com leitura por
+    memory map. Na primeira carga de um perfil importa o state_*.json existente, que
+    daí em diante não muda mais (só serve à importação; to-json volta para o JSON).
+    """
+
+    def load(self, profile_name: str):
+        plan_path, ex_path = arrow_paths(profile_name)
+        if not plan_path.exists():
+            loaded = read_saved_state(profile_name, quarantine=True)  # importa o JSON, se houver
+            if loaded is not None:
+                self.write(profile_name, *loaded)
+            return loaded
+        import pyarrow as pa
+
+        try:
+            with span("storage.arrow.load"):
+                return read_arrow_state(plan_path, ex_path)
+        except (pa.ArrowInvalid, json.JSONDecodeError):
+            # Como no backend JSON: só arquivo ilegível vai para o lado (*.corrupt)
+            for p in (plan_path, ex_path):
+                quarantine_file(profile_name, p)
+            log.exception("Estado colunar ilegível em %s; movido para *.corrupt", plan_path)
+            return None
+
+    def write(self, profile_name: str, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict):
+        with span("storage.arrow.write"):
+            write_arrow_state(*arrow_paths(profile_name), plan_df, ex_df, scalars)
+        count("storage_writes")
+
+    def state_token(self, profile_name: str):
+        return tuple(_stat_key(p) for p in arrow_paths(profile_name))
+
+# ============================================================
+# Conversão JSON <-> Arrow
+# ============================================================
+def json_to_arrow(data_dir: Path) -> list:
+    """
+    state_<perfil>.json (+ journal) -> .plan.arrow/.exercise.arrow. Retorna os slugs convertidos.
+    """
+    converted = []
+    for snapshot in sorted(data_dir.glob("state_*.json")):
+        slug = snapshot.stem[len("state_"):]
+        loaded = ProfileJournal(snapshot, snapshot.with_name(f"state_{slug}.journal.jsonl")).load()
+        if loaded is None:
+            continue
+        write_arrow_state(data_dir / f"state_{slug}{PLAN_SUFFIX}", data_dir / f"state_{slug}{EX_SUFFIX}", *loaded)
+        converted.append(slug)
+    return converted
+
+def arrow_to_json(data_dir: Path) -> list:
+    """
+    .plan.arrow/.exercise.arrow -> state_<perfil>.json. O journal antigo do perfil é
+    removido: o snapshot novo já é o estado completo.
+    """
+    converted = []
+    for plan_path in sorted(data_dir.glob(f"state_*{PLAN_SUFFIX}")):
+        slug = plan_path.name[len("state_"):-len(PLAN_SUFFIX)]
+        loaded = read_arrow_state(plan_path, data_dir / f"state_{slug}{EX_SUFFIX}")
+        if loaded is None:
+            continue
+        plan_df, ex_df, scalars = loaded
+        # Categorical/int32 voltam para os tipos do JSON (texto e int)
+        plan_df = plan_df.astype({"Dia": str, "Refeição": str, "Calorias (kcal)": int})
+        ex_df = ex_df.astype({"Dia": str})
+        _write_state_snapshot(data_dir / f"state_{slug}.json", plan_df, ex_df, scalars)
+        stale_journal = data_dir / f"state_{slug}.journal.jsonl"
+        if stale_journal.exists():
+            stale_journal.unlink()
+        converted.append(slug)
+    return converted
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m body_core.columnar", description="Converte o estado entre JSON e Arrow")
+    parser.add_argument("direction", choices=["to-arrow", "to-json"])
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args(argv)
+    converted = (json_to_arrow if args.direction == "to-arrow" else arrow_to_json)(args.data_dir)
+    print(f"{len(converted)} perfis convertidos: {', '.join(converted) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""
+Escrita do mesmo perfil por várias sessões (abas, pessoas, processos) sem perder edições.
+
+O estado em disco tem versão, que cresce a cada escrita. Cada sessão guarda a base, o
+estado e a versão de onde seus frames partiram, e o autosave grava por
+commit_profile_state: sob o lock de arquivo do perfil, relê o estado atual e aplica só
+as células que a sessão mudou em relação à base. O que outras sessões gravaram em
+outras células fica; a mesma célula mudada pelas duas é conflito: vale a última
+escrita e o conflito volta para a tela. O lock cobre só a escrita; a leitura não
+bloqueia (ver ProfileJournal e read_arrow_state).
+
+Na rerun, ProfileSession.pull() traz para a sessão o que foi gravado desde a base e
+reaplica por cima as edições locais ainda não gravadas.
+
+As versões lidas ficam em SHARED_STATES, uma por perfil para o processo inteiro: sessões
+na mesma versão usam os mesmos frames, e a sessão que não tem edição pendente troca a
+sua cópia pela compartilhada no pull seguinte ao próprio autosave. A memória por sessão
+fica no que ela editou e ainda não gravou, não no tamanho do estado.
+"""
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from typing import NamedTuple
+
+import pandas as pd
+
+from .editing import _py
+from .instrument import count, span
+from .paths import lock_path
+from .storage import (
+    PROFILE_SCALARS,
+    VERSION_KEY,
+    _diff_table,
+    _replay_journal,
+    get_autosave_writer,
+    get_storage,
+    state_fingerprint,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_MISSING = object()
+
+
+class Conflict(NamedTuple):
+    table: str      # "plan", "exercise" ou "profile"
+    rid: object
+    column: str
+    theirs: object  # valor gravado por outra sessão depois da base
+    ours: object    # valor desta sessão (o que ficou gravado)
+
+@dataclass
+class CommitResult:
+    version: int                                  # versão em disco depois do commit
+    applied: dict = field(default_factory=dict)   # {(tabela, rid, coluna): valor} gravado agora
+    conflicts: list = field(default_factory=list)
+    replaced: bool = False                        # estado inteiro substituído (formato mudou)
+
+# ============================================================
+# Lock de escrita
+# ============================================================
+_THREAD_LOCKS = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+
+@contextmanager
+def profile_lock(profile_name: str):
+    """
+    Exclusão mútua na escrita de um perfil: entre threads (lock do processo) e entre
+    processos (lock no arquivo state_<perfil>.lock). Leituras não passam por aqui.
+    """
+    with _THREAD_LOCKS_GUARD:
+        thread_lock = _THREAD_LOCKS.setdefault(profile_name, threading.Lock())
+    path = lock_path(profile_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with thread_lock, open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# ============================================================
+# Merge por célula
+# ============================================================
+def _same(a, b) -> bool:
+    if a is _MISSING or b is _MISSING:
+        return a is b
+    if pd.isna(a) and pd.isna(b):
+        return True
+    return a == b
+
+def _cell(state, table: str, rid, col: str):
+    plan_df, ex_df, scalars = state
+    if table == "profile":
+        return scalars.get(col)
+    df = plan_df if table == "plan" else ex_df
+    if col not in df.columns or rid not in df.index:
+        return _MISSING
+    return _py(df.at[rid, col])
+
+def _has_row(state, table: str, rid) -> bool:
+    return rid in (state[0] if table == "plan" else state[1]).index
+
+def cell_changes(base, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict):
+    """
+    Células que a sessão mudou em relação à base, como registros [tabela, rid, coluna, valor]
+    (linha removida: coluna None); None se as colunas das tabelas mudaram (grava o estado inteiro)
+    """
+    base_plan, base_ex, base_scalars = base
+    plan_records = _diff_table("plan", base_plan, plan_df)
+    ex_records = _diff_table("exercise", base_ex, ex_df)
+    if plan_records is None or ex_records is None:
+        return None
+    scalar_records = [
+        ["profile", None, k, scalars[k]] for k in PROFILE_SCALARS if not _same(base_scalars.get(k), scalars[k])
+    ]
+    return plan_records + ex_records + scalar_records
+
+def _next_free_rids(current, changes: list, remap: dict) -> dict:
+    # Primeiro rid livre de cada tabela: depois do disco, das linhas da sessão e dos já remapeados
+    taken = {}
+    for table, df in (("plan", current[0]), ("exercise", current[1])):
+        rids = [r for r in df.index] + [rid for t, rid, _, _ in changes if t == table]
+        rids += [new for (t, _), new in remap.items() if t == table]
+        taken[table] = max((int(r) for r in rids), default=0) + 1
+    return taken
+
+def merge_changes(base, current, changes: list, written: dict, remap: dict = None):
+    """
+    (registros a aplicar sobre current, conflitos). Para cada célula mudada pela sessão:
+    - já gravada por esta sessão com o mesmo valor: fica o que está em disco
+    - disco igual à base ou ao último valor gravado por esta sessão: aplica
+    - linha nova desta sessão: aplica; se outra sessão já gravou uma linha com o mesmo rid,
+      a desta vai para o próximo rid livre, anotado em remap {(tabela, rid local): rid gravado}
+    - disco já com o valor da sessão, ou linha removida por outra sessão: nada a fazer
+    - outro valor em disco: conflito; aplica o da sessão (última escrita vence)
+    Linha removida pela sessão sai do disco se ainda estiver lá.
+    """
+    remap = {} if remap is None else remap
+    mine_rows = {(table, rid) for table, rid, _ in written}
+    free = None
+    records, conflicts = [], []
+    for table, rid, col, ours in changes:
+        local_rid, rid = rid, remap.get((table, rid), rid)
+        if (
+            col is not None and table != "profile" and (table, rid) not in mine_rows
+            and not _has_row(base, table, rid) and _has_row(current, table, rid)
+        ):
+            free = free or _next_free_rids(current, changes, remap)
+            remap[(table, local_rid)] = rid = free[table]
+            free[table] += 1
+        mine = written.get((table, rid, col), _MISSING)
+        if _same(ours, mine):
+            continue
+        if col is None:
+            if _has_row(current, table, rid):
+                records.append([table, rid, None, None])
+            continue
+        theirs = _cell(current, table, rid, col)
+        if theirs is _MISSING and _has_row(base, table, rid):
+            continue
+        if _same(theirs, ours):
+            continue
+        if not (theirs is _MISSING or _same(theirs, _cell(base, table, rid, col)) or _same(theirs, mine)):
+            conflicts.append(Conflict(table, rid, col, theirs, ours))
+        records.append([table, rid, col, ours])
+    return records, conflicts
+
+def _state_version(state) -> int:
+    return state[2].get(VERSION_KEY, 0) if state is not None else 0
+
+def commit_profile_state(
+    profile_name: str,
+    base,
+    written: dict,
+    plan_df: pd.DataFrame,
+    ex_df: pd.DataFrame,
+    scalars: dict,
+    remap: dict = None,
+) -> CommitResult:
+    """
+    Grava o estado de uma sessão sobre o estado atual do perfil, com versão atual + 1.
+    base: (plan, ex, scalars) de onde os frames partiram — None sobrescreve tudo;
+    written: células que a sessão já gravou desde a base; remap: rids de linhas novas
+    da sessão gravadas com outro rid (ver merge_changes).
+    """
+    changes = None if base is None else cell_changes(base, plan_df, ex_df, scalars)
+    storage = get_storage()
+    with span("storage.commit"), profile_lock(profile_name):
+        current = storage.load(profile_name)
+        version = _state_version(current) + 1
+        if current is None or changes is None:
+            storage.write(profile_name, plan_df, ex_df, {**scalars, VERSION_KEY: version})
+            return CommitResult(version, replaced=True)
+        if _state_version(base) == version - 1:
+            records, conflicts = changes, []  # ninguém gravou desde a base
+        else:
+            records, conflicts = merge_changes(base, current, changes, written, remap)
+        if not records:
+            return CommitResult(version - 1)
+        plan, ex, new_scalars = _replay_journal(current[0], current[1], dict(current[2]), records)
+        new_scalars[VERSION_KEY] = version
+        storage.write(profile_name, plan, ex, new_scalars)
+    count("storage_conflicts", len(conflicts))
+    return CommitResult(version, {(t, rid, col): v for t, rid, col, v in records}, conflicts)
+
+# ============================================================
+# Estado compartilhado entre sessões
+# ============================================================
+def _warm_index(df: pd.DataFrame):
+    # O índice do pandas monta a tabela de busca na primeira consulta, sem lock: num frame
+    # lido por várias threads ao mesmo tempo isso corrompe a busca. Monta antes de compartilhar.
+    for index in (df.index, df.columns):
+        index.get_indexer(index[:1])
+        index.is_unique, index.is_monotonic_increasing
+
+class SharedStates:
+    """
+    Última versão lida de cada perfil, comum a todas as sessões do processo: quem abre ou
+    puxa um perfil já lido naquela versão (mesmo token de disco) recebe os mesmos frames,
+    sem reler nem copiar. Os frames são imutáveis por convenção: edições passam por
+    merge_editor_delta/set_cells, que copiam só as colunas alteradas.
+    """
+
+    def __init__(self):
+        self._states = {}  # perfil -> (storage, token, (plan, ex, scalars))
+        self._lock = threading.Lock()
+
+    def load(self, storage, profile_name: str, token):
+        """
+        (plan, ex, scalars) do perfil no token dado, ou None se não há estado salvo
+        """
+        with self._lock:
+            hit = self._states.get(profile_name)
+        if token is not None and hit is not None and hit[0] is storage and hit[1] == token:
+            count("shared_state_hits")
+            state = hit[2]
+        else:
+            # O token foi lido antes: o estado lido é dessa versão ou de uma mais nova
+            state = storage.load(profile_name)
+            if state is None:
+                return None
+            if token is not None:
+                for df in state[:2]:
+                    _warm_index(df)
+                with self._lock:
+                    self._states[profile_name] = (storage, token, state)
+        return state[0], state[1], dict(state[2])
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+SHARED_STATES = SharedStates()
+
+# ============================================================
+# Sessão
+# ============================================================
+def _fingerprint(plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict) -> str:
+    return state_fingerprint(plan_df, ex_df, *(scalars[k] for k in PROFILE_SCALARS))
+
+class ProfileSession:
+    """
+    Um perfil aberto numa sessão do app: a base (último estado lido do disco), as células
+    gravadas por esta sessão desde a base e os conflitos ainda não mostrados.
+    """
+
+    def __init__(self, profile_name: str):
+        self.profile_name = profile_name
+        self.key = (profile_name, uuid.uuid4().hex)  # fila própria no autosave
+        self.base = None
+        self.version = 0
+        self._token = None
+        self._written = {}
+        self._remap = {}  # {(tabela, rid local): rid em disco} de linhas novas com rid já usado
+        self._conflicts = []
+        self._generation = 0  # muda a cada pull(): commits agendados antes ficam obsoletos
+        self._lock = threading.Lock()
+
+    def open(self):
+        """
+        Lê o perfil do disco (sem lock) e o guarda como base: (plan, ex, scalars) ou None
+        """
+        storage = get_storage()
+        with self._lock:
+            self._token = storage.state_token(self.profile_name)
+            loaded = SHARED_STATES.load(storage, self.profile_name, self._token)
+            self._set_base(loaded)
+        return loaded
+
+    def _set_base(self, state):
+        self.base = state
+        self.version = _state_version(state)
+        self._written = {}
+        self._remap = {}
+        if state is not None and all(k in state[2] for k in PROFILE_SCALARS):
+            get_autosave_writer().mark_clean(self.key, _fingerprint(*state))
+
+    def submit(self, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict) -> bool:
+        """
+        Agenda o commit do estado da sessão (autosave com debounce). False se nada mudou.
+        """
+        scalars = {k: scalars[k] for k in PROFILE_SCALARS}
+        return get_autosave_writer().submit(
+            self.key,
+            _fingerprint(plan_df, ex_df, scalars),
+            partial(self._commit, self._generation, plan_df, ex_df, scalars),
+        )
+
+    def _commit(self, generation, plan_df, ex_df, scalars):
+        with self._lock:
+            if generation != self._generation:
+                return  # pull() rebaseou depois do submit e reenviou o estado da sessão
+            result = commit_profile_state(
+                self.profile_name, self.base, self._written, plan_df, ex_df, scalars, self._remap
+            )
+            if result.replaced:
+                # Estado inteiro gravado: é a nova base (os frames seguintes partem dele)
+                self.base = (plan_df, ex_df, {**scalars, VERSION_KEY: result.version})
+                self.version = result.version
+                self._written = {}
+                self._remap = {}
+            else:
+                self._written.update(result.applied)
+            self._conflicts.extend(result.conflicts)
+
+    def pull(self, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict):
+        """
+        Traz para a sessão o que foi gravado desde a base (por outras sessões ou pelo
+        autosave desta). None se nada mudou; senão (plan, ex, scalars, conflitos), com as
+        edições locais ainda não gravadas aplicadas sobre o estado em disco. Conflitos None:
+        conteúdo igual ao da sessão, só os frames passam a ser os compartilhados.
+        """
+        storage = get_storage()
+        token = storage.state_token(self.profile_name)
+        if token == self._token:
+            return None
+        with self._lock:
+            current = SHARED_STATES.load(storage, self.profile_name, token)
+            self._token = token
+            if current is None:
+                return None
+            changes = None if self.base is None else cell_changes(self.base, plan_df, ex_df, scalars)
+            if changes is None:
+                # Formato local novo (reset/cópia ainda na fila): prevalece sobre o disco
+                merged, conflicts = (plan_df, ex_df, dict(scalars)), []
+            else:
+                records, conflicts = merge_changes(self.base, current, changes, self._written, self._remap)
+                merged = _replay_journal(current[0], current[1], dict(current[2]), records)
+            merged[2].pop(VERSION_KEY, None)
+            self._set_base(current)
+            self._generation += 1
+            conflicts, self._conflicts = self._conflicts + conflicts, []
+        self.submit(*merged)  # o que ainda não foi gravado, agora sobre a nova base
+        if not conflicts and _fingerprint(*merged) == _fingerprint(plan_df, ex_df, scalars):
+            if merged[0] is plan_df and merged[1] is ex_df:
+                return None
+            # Mesmo conteúdo (a gravação foi desta sessão): troca a cópia da sessão pelos
+            # frames compartilhados da versão em disco; conflitos None = nada novo na tela
+            return (*merged, None)
+        return (*merged, conflicts)
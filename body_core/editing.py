@@ -0,0 +1,161 @@
+"""
+Merge incremental das edições do data_editor: só as células alteradas, aplicadas pelo rid.
+
+Os frames de estado são tratados como imutáveis (podem estar compartilhados entre sessões,
+ver SharedStates): uma edição gera um frame novo que copia só as colunas alteradas e
+reaproveita as demais (set_cells).
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .plans import MACRO_COLUMNS
+
+
+def _py(v):
+    if isinstance(v, np.float32):
+        return float(str(v))  # menor decimal que o float32 representa: 12.3, não 12.300000190734863
+    return v.item() if isinstance(v, np.generic) else v
+
+@dataclass
+class EditorMerge:
+    df: pd.DataFrame
+    changes: dict  # {rid: {coluna: novo valor}} — só células que mudaram de fato
+    previous: dict = field(default_factory=dict)  # {rid: {coluna: valor anterior}}
+    reshaped: bool = False  # linhas adicionadas ou removidas (além das células em changes)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.changes) or self.reshaped
+
+def _as_float(v) -> float:
+    if v is None or pd.isna(v):
+        return 0.0
+    return float(v)
+
+def _as_text(v) -> str:
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return ""
+    return str(v)
+
+def _as_kcal(v) -> int:
+    return int(min(max(_as_float(v), 0.0), 20000.0))
+
+def _as_grams(v) -> float:
+    return round(min(max(_as_float(v), 0.0), 2000.0), 1)
+
+# Colunas editáveis de cada editor -> normalização do valor digitado
+EX_EDITABLE = {
+    "Dia": _as_text,
+    "Atividade": _as_text,
+    "Minutos": _as_float,
+    "Distância (km)": _as_float,
+    "Inclinação (%)": _as_float,
+    "Intensidade": _as_text,
+    "MET (relógio)": _as_float,
+}
+PLAN_EDITABLE = {
+    "Descrição": _as_text,
+    "Calorias (kcal)": _as_kcal,
+    **{col: _as_grams for col in MACRO_COLUMNS},
+}
+
+def set_cells(df: pd.DataFrame, col: str, rids: list, values) -> pd.DataFrame:
+    """
+    Novo frame com values nas linhas rids de col. Copia só essa coluna; as outras continuam
+    as mesmas de df, que fica intacto (copy-on-write por coluna)
+    """
+    out = df.copy(deep=False)
+    column = df[col].copy()
+    if (
+        column.dtype.kind in "iu" and all(isinstance(v, (int, np.integer)) for v in values)
+        or column.dtype.kind == "f" and all(isinstance(v, (int, float, np.number)) for v in values)
+    ):
+        values = np.asarray(values, dtype=column.dtype)  # int32 do Arrow e macros float32 mantêm o dtype
+    column.loc[rids] = values
+    out[col] = column
+    return out
+
+def rows_view(df: pd.DataFrame, mask) -> pd.DataFrame:
+    """
+    Linhas de mask; contíguas (um dia do plano) saem como fatia de df, sem cópia
+    """
+    positions = np.flatnonzero(np.asarray(mask))
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        return df.iloc[positions[0]:positions[-1] + 1]
+    return df.iloc[positions]
+
+def diff_edited_rows(view_ui: pd.DataFrame, edited_ui: pd.DataFrame, editable: dict) -> dict:
+    """
+    Delta posicional {posição: {coluna: valor}} comparando o frame exibido com o devolvido pelo editor
+    """
+    delta = {}
+    for col in editable:
+        before = view_ui[col].to_numpy()
+        after = edited_ui[col].to_numpy()
+        diff = (before != after) & ~(pd.isna(before) & pd.isna(after))
+        for pos in np.flatnonzero(diff):
+            delta.setdefault(int(pos), {})[col] = after[pos]
+    return delta
+
+def merge_editor_delta(base_df: pd.DataFrame, view_index, edited_rows: dict, editable: dict) -> EditorMerge:
+    """
+    Aplica o delta do editor em base_df pelo índice (rid). view_index são os rids das linhas
+    exibidas, na ordem do editor. Sem mudança devolve o próprio base_df; com mudança, copia
+    só as colunas alteradas.
+    """
+    labels = pd.Index(view_index).tolist()
+    changes = {}
+    previous = {}
+    for pos, cells in edited_rows.items():
+        if not 0 <= pos < len(labels):
+            continue
+        rid = labels[pos]
+        for col, raw in cells.items():
+            if col not in editable:
+                continue
+            value = editable[col](raw)
+            old = base_df.at[rid, col]
+            if _py(old) != value:
+                changes.setdefault(rid, {})[col] = value
+                previous.setdefault(rid, {})[col] = _py(old)
+
+    if not changes:
+        return EditorMerge(base_df, {})
+
+    by_col = {}
+    for rid, cells in changes.items():
+        for col, value in cells.items():
+            rids, values = by_col.setdefault(col, ([], []))
+            rids.append(rid)
+            values.append(value)
+
+    merged = base_df
+    for col, (rids, values) in by_col.items():
+        merged = set_cells(merged, col, rids, values)
+    return EditorMerge(merged, changes, previous)
+
+def merge_editor_rows(base_df: pd.DataFrame, view_index, editor_state: dict, editable: dict, new_row: dict) -> EditorMerge:
+    """
+    merge_editor_delta para editor com num_rows="dynamic": editor_state é o estado do widget
+    (edited_rows, added_rows, deleted_rows — posições na ordem do editor). Linhas removidas
+    saem pelo rid; as adicionadas partem de new_row e ganham rids novos depois do maior.
+    """
+    merged = merge_editor_delta(base_df, view_index, editor_state.get("edited_rows", {}), editable)
+    labels = pd.Index(view_index).tolist()
+    deleted = [labels[pos] for pos in editor_state.get("deleted_rows", []) if 0 <= pos < len(labels)]
+    added = [
+        {**new_row, **{col: editable[col](v) for col, v in cells.items() if col in editable and v is not None}}
+        for cells in editor_state.get("added_rows", [])
+    ]
+    if not deleted and not added:
+        return merged
+
+    df = merged.df.drop(index=deleted)
+    if added:
+        first = int(base_df.index.max()) + 1 if len(base_df) else 1
+        new = pd.DataFrame(added, columns=base_df.columns, index=pd.Index(range(first, first + len(added)), name=base_df.index.name))
+        df = pd.concat([df, new.astype(base_df.dtypes.to_dict())]) if len(df) else new.astype(base_df.dtypes.to_dict())
+    changes = {rid: cells for rid, cells in merged.changes.items() if rid not in deleted}
+    return EditorMerge(df, changes, {rid: merged.previous[rid] for rid in changes}, reshaped=True)
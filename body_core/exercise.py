@@ -0,0 +1,67 @@
+"""
+Gasto energético do exercício (MET): motor vetorizado e atalhos escalares.
+
+NumPy só é importado na primeira chamada, então importar este módulo é barato.
+"""
+
+
+# Faixas de velocidade (km/h) -> MET da corrida. Cada limite abre a faixa
+# seguinte (v < limite fica na faixa anterior); abaixo de RUN_MIN_SPEED_KMH
+# considera-se parado (MET 0).
+RUN_MIN_SPEED_KMH = 0.1
+RUN_SPEED_EDGES_KMH = (5.0, 6.5, 8.0, 10.0, 12.0)
+RUN_MET_BANDS = (
+    3.5,   # caminhada
+    5.0,   # caminhada rápida / trote
+    7.0,   # trote / corrida leve
+    9.8,   # corrida moderada
+    11.5,  # forte
+    12.8,  # muito forte
+)
+
+def kcal_from_met_batch(weight_kg, minutes, met):
+    """
+    kcal = MET × 3.5 × peso / 200 × minutos, elemento a elemento (aceita arrays ou escalares)
+    """
+    import numpy as np
+
+    minutes = np.fmax(0.0, np.asarray(minutes, dtype=float))
+    met = np.fmax(0.0, np.asarray(met, dtype=float))
+    return met * 3.5 * np.asarray(weight_kg, dtype=float) / 200.0 * minutes
+
+def running_met_batch(speed_kmh):
+    """
+    MET da corrida por faixa de velocidade (lookup por bucket, sem if encadeado)
+    """
+    import numpy as np
+
+    v = np.fmax(0.0, np.asarray(speed_kmh, dtype=float))
+    met = np.asarray(RUN_MET_BANDS)[np.searchsorted(RUN_SPEED_EDGES_KMH, v, side="right")]
+    return np.where(v <= RUN_MIN_SPEED_KMH, 0.0, met)
+
+def calc_running_kcal_batch(weight_kg, distance_km, minutes):
+    """
+    Versão em lote de calc_running_kcal: devolve arrays (kcal, velocidade, MET)
+    """
+    import numpy as np
+
+    minutes = np.fmax(0.0, np.asarray(minutes, dtype=float))
+    distance_km = np.fmax(0.0, np.asarray(distance_km, dtype=float))
+    valid = (minutes > 0.0) & (distance_km > 0.0)
+
+    hours = np.where(valid, minutes, 1.0) / 60.0
+    speed = np.where(valid, distance_km / hours, 0.0)
+    met = np.where(valid, running_met_batch(speed), 0.0)
+    kcal = np.where(valid, kcal_from_met_batch(weight_kg, minutes, met), 0.0)
+    return kcal, speed, met
+
+# Escalares: atalhos sobre o motor em lote
+def kcal_from_met(weight_kg: float, minutes: float, met: float) -> float:
+    return float(kcal_from_met_batch(float(weight_kg), float(minutes), float(met)))
+
+def running_met_from_speed_kmh(speed_kmh: float) -> float:
+    return float(running_met_batch(float(speed_kmh)))
+
+def calc_running_kcal(weight_kg: float, distance_km: float, minutes: float):
+    kcal, speed, met = calc_running_kcal_batch(float(weight_kg), float(distance_km), float(minutes))
+    return float(kcal), float(speed), float(met)
@@ -0,0 +1,30 @@
+"""
+Escrita atômica de arquivos (usada pela persistência e pelo cadastro de perfis).
+"""
+import os
+import threading
+from pathlib import Path
+
+
+def write_text_atomic(path: Path, text: str):
+    """
+    Escreve em arquivo temporário no mesmo diretório e troca com os.replace:
+    quem lê vê o arquivo antigo inteiro ou o novo inteiro, nunca metade.
+    """
+    write_bytes_atomic(path, text.encode("utf-8"))
+
+def write_bytes_atomic(path: Path, data):
+    """
+    Como write_text_atomic, para bytes ou qualquer objeto com buffer protocol
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
@@ -0,0 +1,353 @@
+"""
+Catálogo de alimentos (kcal, macros e fibra por grama) com busca rápida para a Descrição do plano.
+
+O catálogo vem de um CSV (extrato TACO/USDA ou o foods_seed.csv que acompanha o pacote)
+com valores por 100 g. Na carga monta-se um índice:
+
+- prefixo: tokens normalizados (sem acento, minúsculos) ordenados, cada um com sua lista
+  de alimentos em formato CSR; um prefixo é uma faixa contígua (bisect) desse vetor
+- trigramas: mesma estrutura por trigrama, para achar nomes com erro de digitação
+
+O índice é gravado em DATA_DIR/cache/ como .npz (só arrays, sem pickle) com o hash do CSV
+e a versão do formato no nome e dentro do arquivo, conferidos na carga; é reaproveitado
+entre processos e dentro do processo fica em memória (não é remontado a cada rerun).
+
+    python -m body_core.foods "frang grelh" [--csv alimentos.csv]
+"""
+import bisect
+import csv
+import hashlib
+import io
+import logging
+import os
+import re
+import sys
+import threading
+import unicodedata
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .files import write_bytes_atomic
+from .paths import DATA_DIR
+
+log = logging.getLogger(__name__)
+
+SEED_FOODS_PATH = Path(__file__).with_name("foods_seed.csv")
+FOODS_PATH = Path(os.environ.get("BODY_ASSISTANT_FOODS", DATA_DIR / "foods.csv"))
+INDEX_CACHE_DIR = DATA_DIR / "cache"
+FUZZY_MIN_SHARE = 0.5  # fração mínima dos trigramas da busca presentes no nome
+INDEX_FORMAT = 3  # muda quando o layout do índice muda (invalida os caches antigos)
+
+# Cabeçalhos aceitos (normalizados) -> campo do catálogo
+COLUMN_ALIASES = {
+    "name": ("nome", "alimento", "descricao", "descricao dos alimentos", "name", "description", "food"),
+    "kcal": ("kcal", "energia kcal", "energia", "energy kcal", "energy", "calorias", "calories"),
+    "protein": ("proteina", "proteina g", "protein", "protein g"),
+    "carbs": ("carboidrato", "carboidrato g", "carboidratos", "carbohydrate", "carbohydrate g", "carbs"),
+    "fat": ("lipideos", "lipideos g", "lipidios", "gordura", "gorduras", "fat", "total fat", "fat g"),
+    "fiber": ("fibra", "fibra g", "fibra alimentar", "fibra alimentar g", "fibras", "fiber", "fiber g", "dietary fiber"),
+}
+
+# Atributos do FoodCatalog guardados no cache: arrays numéricos e listas de strings
+_INDEX_ARRAYS = (
+    "kcal_g", "protein_g", "carbs_g", "fat_g", "fiber_g", "name_len",
+    "token_ptr", "token_ids", "n_trigrams", "trigram_ptr", "trigram_ids",
+)
+_INDEX_STRINGS = ("names", "tokens", "trigrams")
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Minúsculas, sem acento, só letras/dígitos separados por um espaço
+    """
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+def _trigrams(norm: str) -> set:
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _csr(keys_per_item: list):
+    """
+    [{chave}] por item -> (chaves ordenadas, ponteiros, ids) com ids de cada chave ordenados
+    """
+    postings = {}
+    for item_id, keys in enumerate(keys_per_item):
+        for k in keys:
+            postings.setdefault(k, []).append(item_id)
+    keys = sorted(postings)
+    ptr = np.zeros(len(keys) + 1, dtype=np.int64)
+    ptr[1:] = np.cumsum([len(postings[k]) for k in keys])
+    ids = np.fromiter((i for k in keys for i in postings[k]), dtype=np.int32, count=int(ptr[-1]))
+    return keys, ptr, ids
+
+@dataclass(frozen=True)
+class Food:
+    id: int
+    name: str
+    kcal_g: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    fiber_g: float = 0.0
+
+    def kcal_for(self, grams: float) -> int:
+        return int(round(self.kcal_g * max(float(grams), 0.0)))
+
+    def macros_for(self, grams: float) -> list:
+        """
+        Proteína, carboidrato, gordura e fibra (g) da quantidade, na ordem de MACRO_COLUMNS
+        """
+        grams = max(float(grams), 0.0)
+        return [round(v * grams, 1) for v in (self.protein_g, self.carbs_g, self.fat_g, self.fiber_g)]
+
+    def describe(self, grams: float) -> str:
+        return f"{self.name} ({float(grams):g}g)"
+
+class FoodCatalog:
+    """
+    Alimentos em arrays (por grama) + índices de prefixo e trigrama
+    """
+
+    def __init__(self, names: list, kcal_g, protein_g, carbs_g, fat_g, fiber_g=None):
+        self.names = list(names)
+        self.kcal_g = np.asarray(kcal_g, dtype=np.float32)
+        self.protein_g = np.asarray(protein_g, dtype=np.float32)
+        self.carbs_g = np.asarray(carbs_g, dtype=np.float32)
+        self.fat_g = np.asarray(fat_g, dtype=np.float32)
+        # CSV sem coluna de fibra: zero
+        self.fiber_g = np.zeros(len(self.names), dtype=np.float32) if fiber_g is None else np.asarray(fiber_g, dtype=np.float32)
+        norms = [normalize(n) for n in self.names]
+        self.name_len = np.array([len(n) for n in norms], dtype=np.int32)
+        self.tokens, self.token_ptr, self.token_ids = _csr([set(n.split()) for n in norms])
+        tris = [_trigrams(n) for n in norms]
+        self.n_trigrams = np.array([len(t) for t in tris], dtype=np.int32)
+        self.trigrams, self.trigram_ptr, self.trigram_ids = _csr(tris)
+        self._trigram_pos = {t: i for i, t in enumerate(self.trigrams)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def to_arrays(self) -> dict:
+        """
+        Arrays do catálogo e do índice para o cache .npz; cada lista de strings vira um
+        vetor de bytes UTF-8 separados por NUL
+        """
+        arrays = {name: getattr(self, name) for name in _INDEX_ARRAYS}
+        for name in _INDEX_STRINGS:
+            arrays[name] = np.frombuffer("\0".join(getattr(self, name)).encode(), dtype=np.uint8)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "FoodCatalog":
+        """
+        Inverso de to_arrays, sem remontar o índice
+        """
+        catalog = cls.__new__(cls)
+        for name in _INDEX_ARRAYS:
+            setattr(catalog, name, arrays[name])
+        for name in _INDEX_STRINGS:
+            text = arrays[name].tobytes().decode()
+            setattr(catalog, name, text.split("\0") if text else [])
+        catalog._trigram_pos = {t: i for i, t in enumerate(catalog.trigrams)}
+        return catalog
+
+    def food(self, food_id: int) -> Food:
+        i = int(food_id)
+        return Food(i, self.names[i], float(self.kcal_g[i]), float(self.protein_g[i]),
+                    float(self.carbs_g[i]), float(self.fat_g[i]), float(self.fiber_g[i]))
+
+    def _prefix_range(self, token: str):
+        """
+        Faixa [início, fim) em token_ids dos alimentos com alguma palavra começando por token
+        """
+        lo = bisect.bisect_left(self.tokens, token)
+        hi = bisect.bisect_left(self.tokens, token + "\uffff", lo)
+        return int(self.token_ptr[lo]), int(self.token_ptr[hi])
+
+    def _top(self, ids, key, limit: int):
+        # Top-k por chave sem ordenar todos os candidatos
+        if len(ids) > limit:
+            part = np.argpartition(key, limit - 1)[:limit]
+            ids, key = ids[part], key[part]
+        return ids[np.argsort(key, kind="stable")]
+
+    def _prefix_search(self, tokens: list, limit: int):
+        ranges = sorted((self._prefix_range(t) for t in tokens), key=lambda r: r[1] - r[0])
+        if ranges[0][0] == ranges[0][1]:
+            return np.empty(0, dtype=np.int32)
+        # Do termo mais seletivo para o menos: candidatos filtrados por máscara (sem ordenar)
+        mask = np.zeros(len(self.names), dtype=bool)
+        mask[self.token_ids[ranges[0][0]:ranges[0][1]]] = True
+        for lo, hi in ranges[1:]:
+            other = np.zeros(len(self.names), dtype=bool)
+            other[self.token_ids[lo:hi]] = True
+            mask &= other
+        ids = np.flatnonzero(mask)
+        # Nomes curtos primeiro (mais próximos do que foi digitado), depois ordem do CSV
+        key = self.name_len[ids].astype(np.int64) * len(self.names) + ids
+        return self._top(ids, key, limit)
+
+    def _fuzzy_search(self, norm: str, limit: int):
+        query = _trigrams(norm)
+        rows = [self._trigram_pos.get(t) for t in query]
+        rows = [r for r in rows if r is not None]
+        if not rows:
+            return np.empty(0, dtype=np.int32)
+        # Trigramas presentes em boa parte do catálogo quase não discriminam e dominam o
+        # custo; ficam de fora da contagem (os mais raros sempre entram)
+        sizes = np.array([self.trigram_ptr[r + 1] - self.trigram_ptr[r] for r in rows])
+        cap = max(len(self.names) // 8, int(np.sort(sizes)[min(2, len(sizes) - 1)]))
+        used = [(r, n) for r, n in zip(rows, sizes) if n <= cap]
+        hits = np.concatenate([self.trigram_ids[self.trigram_ptr[r]:self.trigram_ptr[r + 1]] for r, _ in used])
+        shared = np.bincount(hits, minlength=len(self.names))
+        # Quanto da busca aparece no nome (a busca costuma ser um pedaço do nome);
+        # empate: nome mais curto
+        candidates = np.flatnonzero(shared >= max(1, FUZZY_MIN_SHARE * len(used)))
+        key = -shared[candidates].astype(np.int64) * 1024 + np.minimum(self.name_len[candidates], 1023)
+        return self._top(candidates, key, limit)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Até `limit` ids: todos os termos como prefixo de alguma palavra do nome (nomes
+        curtos primeiro); sem resultado, busca aproximada por trigramas.
+        """
+        norm = normalize(query)
+        if not norm:
+            return []
+        ids = self._prefix_search(norm.split(), limit)
+        if len(ids):
+            return ids.tolist()
+        return self._fuzzy_search(norm, limit).tolist()
+
+# ============================================================
+# CSV e cache do índice
+# ============================================================
+def _match_columns(header: list) -> dict:
+    norm = [normalize(h) for h in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        # Nome exato primeiro; depois com unidade no fim ("energia kcal"), nunca kJ
+        exact = [i for i, h in enumerate(norm) if h in aliases]
+        prefixed = [
+            i for i, h in enumerate(norm)
+            if "kj" not in h.split() and any(h.startswith(a + " ") for a in aliases)
+        ]
+        if exact or prefixed:
+            columns[field] = (exact or prefixed)[0]
+    missing = {"name", "kcal"} - set(columns)
+    if missing:
+        raise ValueError(f"CSV de alimentos sem coluna(s) {sorted(missing)}; cabeçalho: {header}")
+    return columns
+
+def _number(raw: str) -> float:
+    raw = (raw or "").strip().replace(",", ".")
+    try:
+        return float(raw)
+    except ValueError:
+        return 0.0  # TACO usa "NA", "Tr" (traços), "*"
+
+def parse_food_csv(data: bytes, per_grams: float = 100.0) -> FoodCatalog:
+    """
+    CSV com nome, kcal e (opcional) proteína/carboidrato/gordura/fibra por `per_grams` g.
+    Aceita separador ',' ou ';' (extratos da TACO usam ';' e vírgula decimal).
+    """
+    text = data.decode("utf-8-sig")
+    first_line = text.split("\n", 1)[0]
+    reader = csv.reader(io.StringIO(text), delimiter=";" if first_line.count(";") > first_line.count(",") else ",")
+    columns = _match_columns(next(reader))
+    names, values = [], {k: [] for k in ("kcal", "protein", "carbs", "fat", "fiber")}
+    for row in reader:
+        if len(row) <= columns["name"] or not row[columns["name"]].strip():
+            continue
+        names.append(row[columns["name"]].strip())
+        for field, out in values.items():
+            i = columns.get(field)
+            out.append(_number(row[i]) if i is not None and i < len(row) else 0.0)
+    scale = 1.0 / float(per_grams)
+    return FoodCatalog(names, *(np.asarray(values[k], dtype=np.float64) * scale for k in ("kcal", "protein", "carbs", "fat", "fiber")))
+
+def _index_cache_path(digest: str) -> Path:
+    return INDEX_CACHE_DIR / f"foods_{digest}.v{INDEX_FORMAT}.npz"
+
+def _load_index_cache(cache_path: Path, digest: str):
+    """
+    Catálogo do .npz se for desta versão do formato e deste CSV; senão None
+    """
+    try:
+        with np.load(cache_path, allow_pickle=False) as npz:
+            if int(npz["format"]) != INDEX_FORMAT or str(npz["source"]) != digest:
+                log.warning("Índice de alimentos em %s é de outro CSV ou formato; reconstruindo", cache_path)
+                return None
+            return FoodCatalog.from_arrays({name: npz[name] for name in _INDEX_ARRAYS + _INDEX_STRINGS})
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        log.warning("Índice de alimentos ilegível em %s; reconstruindo", cache_path)
+        return None
+
+def build_or_load_index(csv_path: Path, per_grams: float = 100.0) -> FoodCatalog:
+    """
+    Índice do CSV: do cache em disco se o conteúdo já foi indexado, senão monta e grava
+    """
+    data = csv_path.read_bytes()
+    digest = hashlib.blake2b(data + f"|{per_grams}".encode(), digest_size=12).hexdigest()
+    cache_path = _index_cache_path(digest)
+    if cache_path.exists():
+        catalog = _load_index_cache(cache_path, digest)
+        if catalog is not None:
+            return catalog
+    catalog = parse_food_csv(data, per_grams)
+    buf = io.BytesIO()
+    np.savez(buf, format=np.int64(INDEX_FORMAT), source=np.array(digest), **catalog.to_arrays())
+    write_bytes_atomic(cache_path, buf.getbuffer())
+    return catalog
+
+_CATALOGS = {}  # caminho -> ((mtime_ns, tamanho), catálogo)
+_CATALOGS_LOCK = threading.Lock()
+
+def get_food_catalog(csv_path: Path = None) -> FoodCatalog:
+    """
+    Catálogo do processo: FOODS_PATH se existir, senão o catálogo-semente do pacote.
+    Recarregado só quando o arquivo muda.
+    """
+    if csv_path is None:
+        csv_path = FOODS_PATH if FOODS_PATH.exists() else SEED_FOODS_PATH
+    st = csv_path.stat()
+    version = (st.st_mtime_ns, st.st_size)
+    with _CATALOGS_LOCK:
+        hit = _CATALOGS.get(str(csv_path))
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        catalog = build_or_load_index(csv_path)
+        _CATALOGS[str(csv_path)] = (version, catalog)
+        return catalog
+
+def main(argv=None) -> int:
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m body_core.foods", description="Busca no catálogo de alimentos")
+    parser.add_argument("query")
+    parser.add_argument("--csv", type=Path, default=None)
+    parser.add_argument("--grams", type=float, default=100.0)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    catalog = get_food_catalog(args.csv)
+    t1 = time.perf_counter()
+    ids = catalog.search(args.query)
+    t2 = time.perf_counter()
+    print(f"{len(catalog)} alimentos (carga {1000 * (t1 - t0):.1f} ms, busca {1000 * (t2 - t1):.2f} ms)")
+    for i in ids:
+        food = catalog.food(i)
+        print(f"  {food.describe(args.grams):<60} {food.kcal_for(args.grams):>5} kcal")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Confere o orçamento de import dos calculadores puros.
+
+    python -m body_core.importcheck      (também roda em tests/test_import_budget.py)
+
+Importa os calculadores num interpretador novo, mede o tempo e falha (exit 1) se
+passar de IMPORT_BUDGET_MS ou se pandas/NumPy/Streamlit forem carregados junto.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+IMPORT_BUDGET_MS = 50.0
+HEAVY_MODULES = ("pandas", "numpy", "streamlit")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from body_core import (
+    kcal_from_met, calc_running_kcal, running_met_from_speed_kmh,
+    bmr_mifflin_st_jeor, tdee_kcal_day, meal_plan_template,
+)
+elapsed_ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({"ms": elapsed_ms, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(runs: int = 5) -> dict:
+    """
+    Melhor tempo de `runs` interpretadores novos (descarta ruído de disco frio)
+    """
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parents[1],  # este body_core, de qualquer diretório
+        )
+        results.append(json.loads(out.stdout))
+    best = min(results, key=lambda r: r["ms"])
+    heavy = sorted({m for r in results for m in r["heavy"]})
+    return {"ms": best["ms"], "heavy": heavy}
+
+
+def main() -> int:
+    result = measure()
+    ok = result["ms"] <= IMPORT_BUDGET_MS and not result["heavy"]
+    print(
+        f"import dos calculadores: {result['ms']:.1f} ms (orçamento {IMPORT_BUDGET_MS:.0f} ms); "
+        f"módulos pesados carregados: {', '.join(result['heavy']) or 'nenhum'} -> {'OK' if ok else 'FALHOU'}"
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
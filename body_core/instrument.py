@@ -0,0 +1,207 @@
+"""
+Instrumentação das reruns: tempo por seção do script, tempo e bytes da persistência.
+
+Desligada por padrão. BODY_ASSISTANT_TIMING=1 liga a coleta; desligada, section()
+e span() devolvem objetos no-op e o custo é uma chamada de função.
+
+- por rerun: begin_rerun() / section(nome) / end_rerun() marcam as seções do script
+  (cada section fecha a anterior) e end_rerun() devolve o resumo da rerun; a rerun de
+  um fragmento (st.fragment) conta como uma rerun com só as seções que rodaram
+- persistência: `with span("storage.write"):` e count("storage_bytes_written", n),
+  de qualquer thread (o autosave grava fora da rerun)
+- saída: uma linha de log JSON por rerun (logger body_core.instrument) e, com
+  BODY_ASSISTANT_METRICS_FILE=caminho, um arquivo de texto no formato Prometheus
+- cProfile de uma rerun: start_profile() / stop_profile()
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from .files import write_text_atomic
+
+log = logging.getLogger(__name__)
+
+TIMING_ENABLED = os.environ.get("BODY_ASSISTANT_TIMING", "") not in ("", "0")
+METRICS_FILE = os.environ.get("BODY_ASSISTANT_METRICS_FILE") or None
+
+_NULL = nullcontext()
+
+# Agregados do processo (todas as sessões): nome -> [chamadas, soma_s, max_s]
+_TIMINGS = {}
+_COUNTERS = {}
+_LOCK = threading.Lock()
+
+# Rerun em andamento na thread do script (cada sessão roda na sua thread)
+_local = threading.local()
+
+
+def _record(name: str, elapsed: float):
+    with _LOCK:
+        agg = _TIMINGS.get(name)
+        if agg is None:
+            _TIMINGS[name] = [1, elapsed, elapsed]
+        else:
+            agg[0] += 1
+            agg[1] += elapsed
+            agg[2] = max(agg[2], elapsed)
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun["spans"][name] = rerun["spans"].get(name, 0.0) + elapsed
+
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, time.perf_counter() - self.t0)
+        return False
+
+def span(name: str):
+    """
+    Context manager que mede o bloco (no-op com a instrumentação desligada)
+    """
+    return _Span(name) if TIMING_ENABLED else _NULL
+
+def count(name: str, value: float = 1):
+    if not TIMING_ENABLED:
+        return
+    with _LOCK:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + value
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun["counters"][name] = rerun["counters"].get(name, 0) + value
+
+# ============================================================
+# Seções da rerun
+# ============================================================
+def begin_rerun():
+    if not TIMING_ENABLED:
+        return
+    now = time.perf_counter()
+    # Rerun anterior interrompida (st.rerun/st.stop) é descartada
+    _local.rerun = {"t0": now, "section": None, "section_t0": now, "spans": {}, "counters": {}}
+
+def rerun_active() -> bool:
+    """
+    Há uma rerun aberta nesta thread (False com a instrumentação desligada). Um fragmento
+    que roda sozinho abre e fecha a própria; dentro da rerun do app, só marca a seção.
+    """
+    return getattr(_local, "rerun", None) is not None
+
+def section(name: str):
+    """
+    Fecha a seção aberta (se houver) e abre `name`
+    """
+    rerun = getattr(_local, "rerun", None) if TIMING_ENABLED else None
+    if rerun is None:
+        return
+    now = time.perf_counter()
+    if rerun["section"] is not None:
+        _record(f"section.{rerun['section']}", now - rerun["section_t0"])
+    rerun["section"], rerun["section_t0"] = name, now
+
+def end_rerun():
+    """
+    Fecha a rerun: registra o total, emite a linha de log e o arquivo Prometheus.
+    Devolve {"total_s", "spans", "counters"} da rerun, ou None se desligado.
+    """
+    rerun = getattr(_local, "rerun", None) if TIMING_ENABLED else None
+    if rerun is None:
+        return None
+    section(None)
+    _local.rerun = None
+    total = time.perf_counter() - rerun["t0"]
+    _record("rerun", total)
+    summary = {"total_s": total, "spans": rerun["spans"], "counters": rerun["counters"]}
+    log.info(json.dumps({
+        "event": "rerun",
+        "total_ms": round(total * 1000, 3),
+        "spans_ms": {k: round(v * 1000, 3) for k, v in summary["spans"].items()},
+        "counters": summary["counters"],
+    }, ensure_ascii=False))
+    if METRICS_FILE:
+        write_prometheus(Path(METRICS_FILE))
+    return summary
+
+# ============================================================
+# Agregados e exportação
+# ============================================================
+def timing_stats() -> dict:
+    """
+    {nome: {"calls", "total_s", "mean_s", "max_s"}} acumulado no processo
+    """
+    with _LOCK:
+        return {
+            name: {"calls": n, "total_s": total, "mean_s": total / n, "max_s": mx}
+            for name, (n, total, mx) in sorted(_TIMINGS.items())
+        }
+
+def counter_stats() -> dict:
+    with _LOCK:
+        return dict(sorted(_COUNTERS.items()))
+
+def _label(name: str) -> str:
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+def prometheus_text() -> str:
+    lines = [
+        "# HELP bodyassistant_span_seconds_total Tempo acumulado por seção/operação.",
+        "# TYPE bodyassistant_span_seconds_total counter",
+    ]
+    stats = timing_stats()
+    lines += [f'bodyassistant_span_seconds_total{{span="{_label(k)}"}} {v["total_s"]:.6f}' for k, v in stats.items()]
+    lines += ["# HELP bodyassistant_span_calls_total Execuções por seção/operação.",
+              "# TYPE bodyassistant_span_calls_total counter"]
+    lines += [f'bodyassistant_span_calls_total{{span="{_label(k)}"}} {v["calls"]}' for k, v in stats.items()]
+    lines += ["# HELP bodyassistant_span_max_seconds Maior duração observada.",
+              "# TYPE bodyassistant_span_max_seconds gauge"]
+    lines += [f'bodyassistant_span_max_seconds{{span="{_label(k)}"}} {v["max_s"]:.6f}' for k, v in stats.items()]
+    for name, value in counter_stats().items():
+        metric = "bodyassistant_" + "".join(c if c.isalnum() else "_" for c in name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: Path):
+    # Formato do textfile collector do node_exporter; troca atômica para não ler pela metade
+    write_text_atomic(path, prometheus_text())
+
+def reset_stats():
+    with _LOCK:
+        _TIMINGS.clear()
+        _COUNTERS.clear()
+
+# ============================================================
+# cProfile de uma rerun
+# ============================================================
+def start_profile():
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def stop_profile(profiler, out_path: Path = None, limit: int = 30) -> str:
+    """
+    Para o profiler e devolve o top `limit` por tempo acumulado (texto do pstats).
+    Com out_path, grava também o .prof (abre com snakeviz / pstats).
+    """
+    import io
+    import pstats
+
+    profiler.disable()
+    if out_path is not None:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(out_path))
+    buf = io.StringIO()
+    pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(limit)
+    return buf.getvalue()
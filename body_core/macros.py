@@ -0,0 +1,155 @@
+"""
+Macronutrientes do plano: proteína, carboidrato, gordura e fibra de cada refeição.
+
+Os macros são as colunas MACRO_COLUMNS do próprio frame do plano, em float32: a matriz
+refeições × macros fica alinhada às linhas pelo rid em toda edição, no merge entre
+sessões e nos três backends, sem estrutura à parte. as_macro_plan monta as quatro
+colunas num bloco 2D só, mas ele não se mantém: merge_editor_delta copia só a coluna
+editada, que vai para um bloco próprio (as outras continuam compartilhadas com a versão
+anterior), e a leitura Arrow dá um bloco por coluna. macro_matrix junta as colunas numa
+matriz (uma cópia de refeições × 4 float32). Totais por dia e da semana são
+uma redução dessa matriz; metas e alertas comparam a matriz dias × macros com o vetor de
+metas de uma vez.
+
+Os valores vêm do catálogo de alimentos (Preencher), do cardápio do gerador (colunas
+proteina,carboidrato,lipideos,fibra do CSV de pratos) ou da tabela do plano. Refeição
+sem valores (estado antigo, template) recebe a estimativa pela composição média dos
+pratos da mesma refeição no cardápio-semente (MEAL_MACROS_PER_100KCAL).
+"""
+import numpy as np
+import pandas as pd
+
+from .editing import PLAN_EDITABLE, EditorMerge, merge_editor_delta
+from .plans import DAYS, MACRO_COLUMNS, MEALS
+
+# g por 100 kcal de cada refeição: média dos pratos dela em dishes_seed.csv
+MEAL_MACROS_PER_100KCAL = {
+    "Whey pós-treino": (11.3, 8.1, 2.6, 0.5),
+    "Almoço": (9.0, 7.8, 3.6, 1.1),
+    "Lanche": (2.6, 22.2, 1.2, 4.2),
+    "Jantar": (11.2, 5.1, 3.8, 1.1),
+    "Ceia": (3.4, 12.6, 4.5, 1.1),
+}
+DEFAULT_MACROS_PER_100KCAL = (7.5, 11.2, 3.1, 1.6)  # refeição fora de MEALS: média das refeições
+
+# Metas diárias (mínimos). Proteína pelo peso do perfil; gordura e fibra pelo limite diário.
+PROTEIN_G_PER_KG = 1.6  # faixa de 1,6–2,2 g/kg para preservar massa magra no déficit com treino
+FAT_MIN_SHARE = 0.20  # gordura: pelo menos 20% das kcal
+FIBER_G_PER_1000_KCAL = 14.0
+
+_MEAL_RATES = np.array(
+    [MEAL_MACROS_PER_100KCAL.get(m, DEFAULT_MACROS_PER_100KCAL) for m in MEALS] + [DEFAULT_MACROS_PER_100KCAL],
+    dtype=np.float32,
+) / 100.0
+
+
+def day_codes(days) -> np.ndarray:
+    """
+    Posição de cada dia em DAYS (-1 fora dela); aceita texto ou categorical
+    """
+    return pd.Index(DAYS).get_indexer(pd.Index(days, dtype=object))
+
+def estimate_macros(meals, kcal) -> np.ndarray:
+    """
+    (linhas × macros) float32 pela composição média da refeição, proporcional às kcal
+    """
+    codes = pd.Index(MEALS).get_indexer(pd.Index(meals, dtype=object))
+    rates = _MEAL_RATES[np.where(codes < 0, len(MEALS), codes)]
+    kcal = np.asarray(kcal, dtype=np.float32)
+    return np.round(rates * kcal[:, None], 1).astype(np.float32)
+
+def as_macro_plan(plan_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Plano com MACRO_COLUMNS em float32 no fim. Sem as colunas (estado antigo, plano
+    sintético) ou com células vazias (linha do SQLite antigo), usa estimate_macros.
+    Plano já no formato volta o mesmo frame; plano sem colunas volta como está.
+    """
+    if plan_df is None or len(plan_df.columns) == 0:
+        return plan_df
+    if (
+        list(plan_df.columns[-len(MACRO_COLUMNS):]) == MACRO_COLUMNS
+        and (plan_df.dtypes.iloc[-len(MACRO_COLUMNS):] == np.float32).all()
+        and not plan_df[MACRO_COLUMNS].isna().to_numpy().any()
+    ):
+        return plan_df
+    matrix = plan_df.reindex(columns=MACRO_COLUMNS).to_numpy(dtype=np.float32)
+    missing = np.isnan(matrix)
+    if missing.any():
+        estimate = estimate_macros(plan_df["Refeição"], plan_df["Calorias (kcal)"])
+        matrix = np.where(missing, estimate, matrix)
+    # Colunas float32 (refeições × macros) depois das colunas do plano; o bloco 2D do
+    # DataFrame abaixo se divide na primeira edição de macro (ver docstring do módulo)
+    macros = pd.DataFrame(matrix, index=plan_df.index, columns=MACRO_COLUMNS)
+    return pd.concat([plan_df.drop(columns=MACRO_COLUMNS, errors="ignore"), macros], axis=1)
+
+def macro_matrix(plan_df: pd.DataFrame) -> np.ndarray:
+    """
+    Matriz (refeições × macros) float32 do plano, na ordem das linhas
+    """
+    return as_macro_plan(plan_df)[MACRO_COLUMNS].to_numpy(dtype=np.float32)
+
+def daily_macro_totals(plan_df: pd.DataFrame) -> np.ndarray:
+    """
+    Totais (dias de DAYS × macros), somados em float64 numa redução só
+    """
+    codes = day_codes(plan_df["Dia"])
+    known = codes >= 0
+    totals = np.zeros((len(DAYS), len(MACRO_COLUMNS)))
+    np.add.at(totals, codes[known], macro_matrix(plan_df)[known])
+    return totals
+
+def macro_targets(weight_kg: float, daily_limit_kcal: float) -> np.ndarray:
+    """
+    Mínimo diário de cada macro (g), na ordem de MACRO_COLUMNS; NaN sem meta (carboidrato)
+    """
+    return np.array([
+        PROTEIN_G_PER_KG * float(weight_kg),
+        np.nan,
+        FAT_MIN_SHARE * float(daily_limit_kcal) / 9.0,
+        FIBER_G_PER_1000_KCAL * float(daily_limit_kcal) / 1000.0,
+    ])
+
+def macro_shortfalls(daily: np.ndarray, targets: np.ndarray, days: list) -> dict:
+    """
+    {coluna: [(dia, falta em g)]} dos dias abaixo da meta; daily é (dias × macros) nas
+    linhas de `days` (posições em DAYS)
+    """
+    rows = daily[day_codes(days)]
+    with np.errstate(invalid="ignore"):
+        short = targets[None, :] - rows  # NaN (sem meta) nunca passa do > 0
+        below = short > 0.05
+    return {
+        col: [(days[i], float(short[i, k])) for i in np.flatnonzero(below[:, k])]
+        for k, col in enumerate(MACRO_COLUMNS)
+        if below[:, k].any()
+    }
+
+def follow_kcal(merge: EditorMerge) -> EditorMerge:
+    """
+    Refeições com kcal editada e macros não: os macros acompanham a porção (razão entre
+    kcal nova e antiga); de 0 kcal, vêm da estimativa da refeição
+    """
+    rids = [
+        rid for rid, cells in merge.changes.items()
+        if "Calorias (kcal)" in cells and not any(col in cells for col in MACRO_COLUMNS)
+    ]
+    if not rids:
+        return merge
+    old_kcal = np.array([merge.previous[rid]["Calorias (kcal)"] for rid in rids], dtype=np.float64)
+    new_kcal = np.array([merge.changes[rid]["Calorias (kcal)"] for rid in rids], dtype=np.float64)
+    current = merge.df.loc[rids, MACRO_COLUMNS].to_numpy(dtype=np.float64)
+    ratio = np.divide(new_kcal, old_kcal, out=np.zeros_like(new_kcal), where=old_kcal > 0)
+    macros = np.where(
+        (old_kcal > 0)[:, None],
+        current * ratio[:, None],
+        estimate_macros(merge.df.loc[rids, "Refeição"], new_kcal),
+    )
+    scaled = merge_editor_delta(
+        merge.df, rids, {i: dict(zip(MACRO_COLUMNS, row)) for i, row in enumerate(macros.tolist())}, PLAN_EDITABLE
+    )
+    changes = {rid: dict(cells) for rid, cells in merge.changes.items()}
+    previous = {rid: dict(cells) for rid, cells in merge.previous.items()}
+    for rid, cells in scaled.changes.items():
+        changes[rid].update(cells)
+        previous[rid].update(scaled.previous[rid])
+    return EditorMerge(scaled.df, changes, previous, merge.reshaped)
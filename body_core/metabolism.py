@@ -0,0 +1,50 @@
+"""
+Metabolismo: BMR (Mifflin-St Jeor), TDEE e níveis de atividade.
+"""
+from .cache import memoized
+
+KCAL_PER_KG = 7700.0  # 1 kg de peso corporal ~ 7700 kcal
+
+ACTIVITY_LEVELS = [
+    ("Sedentário (1.2)", 1.2),
+    ("Leve (1.375)", 1.375),
+    ("Moderado (1.55)", 1.55),
+    ("Alto (1.725)", 1.725),
+]
+
+def bmr_mifflin_st_jeor(sex: str, weight_kg: float, height_cm: float, age: int) -> float:
+    """
+    BMR (kcal/dia) - Mifflin-St Jeor
+    """
+    w = float(weight_kg)
+    h = float(height_cm)
+    a = float(age)
+    if str(sex).upper() == "M":
+        return 10*w + 6.25*h - 5*a + 5
+    return 10*w + 6.25*h - 5*a - 161
+
+def tdee_kcal_day(bmr: float, activity_factor: float) -> float:
+    """
+    TDEE sem exercício estruturado (kcal/dia)
+    """
+    return float(bmr) * float(activity_factor)
+
+def bmr_mifflin_st_jeor_batch(sex, weight_kg, height_cm, age):
+    """
+    Mifflin-St Jeor elemento a elemento (sex: "M"/"F", array deles, ou array bool True = M)
+    """
+    import numpy as np
+
+    sex = np.asarray(sex)
+    male = sex if sex.dtype == bool else np.char.upper(sex.astype(str)) == "M"
+    base = 10 * np.asarray(weight_kg, dtype=float) + 6.25 * np.asarray(height_cm, dtype=float) \
+        - 5 * np.asarray(age, dtype=float)
+    return base + np.where(male, 5.0, -161.0)
+
+@memoized("energy_budget", maxsize=1024, ttl_s=3600)
+def daily_energy_budget(sex: str, weight_kg: float, height_cm: float, age: int, activity_factor: float):
+    """
+    (BMR, TDEE sem exercício estruturado) em kcal/dia
+    """
+    bmr = bmr_mifflin_st_jeor(sex, weight_kg, height_cm, age)
+    return bmr, tdee_kcal_day(bmr, activity_factor)
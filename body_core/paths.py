@@ -0,0 +1,34 @@
+"""
+Onde cada perfil é guardado em disco.
+"""
+from pathlib import Path
+
+DATA_DIR = Path("data")
+
+
+def _profile_slug(profile_name: str) -> str:
+    return (
+        profile_name.lower()
+        .replace("ã", "a").replace("á", "a").replace("â", "a")
+        .replace(" ", "_")
+    )
+
+def state_path(profile_name: str, data_dir: Path = None) -> Path:
+    return (data_dir or DATA_DIR) / f"state_{_profile_slug(profile_name)}.json"
+
+def journal_path(profile_name: str, data_dir: Path = None) -> Path:
+    return (data_dir or DATA_DIR) / f"state_{_profile_slug(profile_name)}.journal.jsonl"
+
+def arrow_paths(profile_name: str, data_dir: Path = None):
+    """
+    (plano, exercícios) do backend colunar (Arrow IPC)
+    """
+    slug = _profile_slug(profile_name)
+    data_dir = data_dir or DATA_DIR
+    return data_dir / f"state_{slug}.plan.arrow", data_dir / f"state_{slug}.exercise.arrow"
+
+def lock_path(profile_name: str) -> Path:
+    """
+    Arquivo de lock da escrita do perfil (vale para todos os backends)
+    """
+    return DATA_DIR / f"state_{_profile_slug(profile_name)}.lock"
@@ -0,0 +1,202 @@
+"""
+Dias, refeições e o plano alimentar sugerido de cada perfil.
+"""
+from typing import TYPE_CHECKING
+
+from .cache import memoized
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DAYS = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+DAY_ORDER = {d: i for i, d in enumerate(DAYS)}
+MEALS = ["Whey pós-treino", "Almoço", "Lanche", "Jantar", "Ceia"]
+# Macros de cada refeição do plano (g), em float32 depois de Calorias (kcal): ver body_core.macros
+MACRO_COLUMNS = ["Proteína (g)", "Carboidratos (g)", "Gordura (g)", "Fibra (g)"]
+
+# Exercícios: uma linha por atividade (quantas quiser por dia). Cada atividade usa só as
+# colunas do seu parâmetro no catálogo (body_core.activities); as demais ficam ignoradas.
+EXERCISE_ROW_DEFAULTS = {
+    "Dia": "Seg",
+    "Atividade": "Corrida",
+    "Minutos": 0.0,
+    "Distância (km)": 0.0,
+    "Inclinação (%)": 0.0,
+    "Intensidade": "Moderada",
+    "MET (relógio)": 0.0,  # MET médio dos segmentos da corrida importada; 0 = pelo catálogo
+}
+LEGACY_EXERCISE_COLUMNS = ("Dia", "Corrida (km)", "Corrida (min)", "Musculação (min)")
+
+
+# Plano alimentar sugerido (fechando por dia no limite)
+@memoized("meal_plan_template", maxsize=64)
+def meal_plan_template(profile_name: str) -> dict:
+    if profile_name == "Vitor":
+        plan = {
+            "Seg": {
+                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
+                "Almoço": ("Frango (180g) + salada (alface/rúcula/tomate) + abobrinha + arroz parboilizado (1/2 xíc)", 600),
+                "Lanche": ("Banana", 150),
+                "Jantar": ("Omelete (3 ovos) + salada grande + berinjela", 400),
+                "Ceia": ("Café com leite (sem açúcar)", 100),
+            },
+            "Ter": {
+                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
+                "Almoço": ("Frango (180g) + abóbora assada + salada + batata pequena", 600),
+                "Lanche": ("Mamão (300g)", 150),
+                "Jantar": ("Frango (150g) + salada + abobrinha", 400),
+                "Ceia": ("1 fruta (tangerina/pera pequena)", 100),
+            },
+            "Qua": {  # carne vermelha
+                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
+                "Almoço": ("Carne vermelha magra (150g) + salada + berinjela + arroz (1/3–1/2 xíc)", 650),
+                "Lanche": ("Uva (200g)", 150),
+                "Jantar": ("Creme de abóbora + frango desfiado (120g) + salada", 350),
+                "Ceia": ("Café com leite (sem açúcar)", 100),
+            },
+            "Qui": {
+                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
+                "Almoço": ("Frango (180g) + salada + abobrinha + batata média", 600),
+                "Lanche": ("Morango (250g)", 120),
+                "Jantar": ("Atum (1 lata) + 2 ovos + salada", 430),
+                "Ceia": ("Café com leite (sem açúcar)", 100),
+            },
+            "Sex": {  # carne vermelha
+                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
+                "Almoço": ("Frango (180g) + salada + abóbora + arroz (1/2 xíc)", 600),
+                "Lanche": ("Goiaba", 150),
+                "Jantar": ("Carne vermelha magra (130g) + salada + abobrinha", 400),
+                "Ceia": ("Café com leite (sem açúcar)", 100),
+            },
+            "Sáb": {  # refeição livre no almoço
+                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
+                "Almoço": ("REFEIÇÃO LIVRE (almoço)", 700),
+                "Lanche": ("Fruta leve (morangos ou tangerina)", 100),
+                "Jantar": ("Salada grande + frango (150g) (bem limpo)", 350),
+                "Ceia": ("Café com leite (sem açúcar)", 100),
+            },
+            "Dom": {
+                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
+                "Almoço": ("Frango (180g) + salada + legumes + arroz (1/2 xíc)", 600),
+                "Lanche": ("Pera", 150),
+                "Jantar": ("Omelete (3 ovos) + salada + abobrinha", 400),
+                "Ceia": ("Café com leite (sem açúcar)", 100),
+            },
+        }
+    else:
+        plan = {
+            "Seg": {
+                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
+                "Almoço": ("Frango (120g) + salada (alface/rúcula/tomate) + abobrinha + arroz (1/3–1/2 xíc)", 520),
+                "Lanche": ("Banana pequena", 120),
+                "Jantar": ("Omelete (2 ovos) + salada grande + berinjela", 380),
+                "Ceia": ("Café com leite (sem açúcar)", 80),
+            },
+            "Ter": {
+                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
+                "Almoço": ("Frango (120g) + abóbora assada + salada + batata pequena", 520),
+                "Lanche": ("Mamão (250–300g)", 130),
+                "Jantar": ("Frango (100g) + salada + abobrinha", 370),
+                "Ceia": ("Café com leite (sem açúcar)", 80),
+            },
+            "Qua": {  # carne vermelha
+                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
+                "Almoço": ("Carne vermelha magra (100g) + salada + berinjela + arroz (1/3 xíc)", 560),
+                "Lanche": ("Uva (150g)", 110),
+                "Jantar": ("Creme de abóbora + frango desfiado (80g) + salada", 350),
+                "Ceia": ("Café com leite (sem açúcar)", 80),
+            },
+            "Qui": {
+                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
+                "Almoço": ("Frango (120g) + salada + abobrinha + batata pequena", 520),
+                "Lanche": ("Morango (200g)", 100),
+                "Jantar": ("Atum (1 lata) OU frango (100g) + salada", 400),
+                "Ceia": ("Café com leite (sem açúcar)", 80),
+            },
+            "Sex": {  # carne vermelha
+                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
+                "Almoço": ("Frango (120g) + salada + abóbora + arroz (1/3–1/2 xíc)", 520),
+                "Lanche": ("Goiaba", 120),
+                "Jantar": ("Carne vermelha magra (90g) + salada + abobrinha", 380),
+                "Ceia": ("Café com leite (sem açúcar)", 80),
+            },
+            "Sáb": {  # refeição livre no almoço
+                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
+                "Almoço": ("REFEIÇÃO LIVRE (almoço)", 600),
+                "Lanche": ("Fruta leve", 100),
+                "Jantar": ("Salada grande + frango (100g)", 320),
+                "Ceia": ("Café com leite (sem açúcar)", 80),
+            },
+            "Dom": {
+                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
+                "Almoço": ("Frango (120g) + salada + legumes + arroz (1/3–1/2 xíc)", 520),
+                "Lanche": ("Pera ou tangerina", 120),
+                "Jantar": ("Omelete (2 ovos) + salada + abobrinha", 380),
+                "Ceia": ("Café com leite (sem açúcar)", 80),
+            },
+        }
+
+    tpl = {}
+    for d in DAYS:
+        for m in MEALS:
+            desc, kcal = plan[d][m]
+            tpl[(d, m)] = (desc, int(kcal))
+    return tpl
+
+@memoized("init_week_plan", maxsize=64)
+def init_week_plan(profile_name: str) -> "pd.DataFrame":
+    """
+    Plano do template, com os macros estimados pela refeição e kcal
+    """
+    import pandas as pd
+
+    from .macros import as_macro_plan
+
+    tpl = meal_plan_template(profile_name)
+    rows = []
+    rid = 1
+    for d in DAYS:
+        for m in MEALS:
+            desc, kcal = tpl.get((d, m), ("", 0))
+            rows.append({"rid": rid, "Dia": d, "Refeição": m, "Descrição": desc, "Calorias (kcal)": int(kcal)})
+            rid += 1
+    return as_macro_plan(pd.DataFrame(rows).set_index("rid"))
+
+@memoized("init_exercise_df", maxsize=1)
+def init_exercise_df() -> "pd.DataFrame":
+    """
+    Semana sem exercícios: tabela vazia no formato de linhas de atividade
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame({col: pd.Series(dtype=type(v)) for col, v in EXERCISE_ROW_DEFAULTS.items()})
+    return frame.set_axis(pd.Index([], dtype="int64", name="rid"))
+
+def as_activity_rows(ex_df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Exercícios no formato atual (uma linha por atividade). O formato antigo, uma linha por
+    dia com Corrida (km)/Corrida (min)/Musculação (min), vira uma linha de Corrida e uma de
+    Musculação moderada por dia com valor; rids novos em ordem, sempre os mesmos para a
+    mesma tabela. Tabela vazia (sem colunas) vira init_exercise_df(); coluna que faltar
+    (gravada antes dela) entra com o valor padrão.
+    """
+    import pandas as pd
+
+    if ex_df is None or len(ex_df.columns) == 0:
+        return init_exercise_df()
+    if "Atividade" in ex_df.columns or not set(LEGACY_EXERCISE_COLUMNS) <= set(ex_df.columns):
+        missing = {col: v for col, v in EXERCISE_ROW_DEFAULTS.items() if col not in ex_df.columns}
+        return ex_df.assign(**missing) if missing and "Atividade" in ex_df.columns else ex_df
+    legacy = ex_df.sort_values("Dia", key=lambda d: d.map(DAY_ORDER), kind="stable")
+    rows = []
+    for day, km, run_min, strength_min in zip(*(legacy[c].tolist() for c in LEGACY_EXERCISE_COLUMNS)):
+        if km or run_min:
+            rows.append({**EXERCISE_ROW_DEFAULTS, "Dia": day, "Atividade": "Corrida",
+                         "Minutos": float(run_min), "Distância (km)": float(km)})
+        if strength_min:
+            rows.append({**EXERCISE_ROW_DEFAULTS, "Dia": day, "Atividade": "Musculação", "Minutos": float(strength_min)})
+    if not rows:
+        return init_exercise_df()
+    frame = pd.DataFrame(rows, columns=list(EXERCISE_ROW_DEFAULTS))
+    frame.index = pd.Index(range(1, len(rows) + 1), name="rid")
+    return frame
@@ -0,0 +1,76 @@
+"""
+Perfis: cadastro em disco (data/profiles.json) com os perfis iniciais como semente.
+"""
+import json
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from .files import write_text_atomic
+from .paths import DATA_DIR
+
+
+@dataclass
+class Profile:
+    name: str
+    age: int
+    weight_kg: float
+    sex: str  # "M" / "F"
+    daily_limit_kcal: int
+    default_height_cm: int
+    default_activity_factor: float
+
+# Perfis iniciais: semeiam data/profiles.json na primeira execução. Depois disso o
+# cadastro vale pelo arquivo (PROFILES_PATH), não por este dicionário.
+DEFAULT_PROFILES = {
+    "Vitor": Profile(
+        name="Vitor",
+        age=35,
+        weight_kg=97.0,
+        sex="M",
+        daily_limit_kcal=1500,
+        default_height_cm=180,
+        default_activity_factor=1.55,  # moderado
+    ),
+    "Thayná": Profile(
+        name="Thayná",
+        age=32,
+        weight_kg=63.0,
+        sex="F",
+        daily_limit_kcal=1300,
+        default_height_cm=169,
+        default_activity_factor=1.55,  # moderado
+    ),
+}
+
+PROFILES_PATH = DATA_DIR / "profiles.json"
+
+# path -> (mtime_ns, linhas): editar o arquivo muda o mtime e invalida a leitura
+_REGISTRY_CACHE = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def _read_profile_registry(path: Path) -> list:
+    mtime_ns = path.stat().st_mtime_ns
+    with _REGISTRY_LOCK:
+        hit = _REGISTRY_CACHE.get(str(path))
+        if hit is not None and hit[0] == mtime_ns:
+            return hit[1]
+    rows = json.loads(path.read_text(encoding="utf-8"))
+    with _REGISTRY_LOCK:
+        _REGISTRY_CACHE[str(path)] = (mtime_ns, rows)
+    return rows
+
+def load_profile_registry(path: Path = PROFILES_PATH, write_defaults: bool = True) -> dict:
+    """
+    Cadastro de perfis em disco (lista de objetos com os campos de Profile).
+    Lido uma vez por processo (cache) e recarregado quando o arquivo muda. Sem o arquivo,
+    grava DEFAULT_PROFILES nele; com write_defaults=False (só leitura) só os devolve.
+    """
+    if not path.exists():
+        if not write_defaults:
+            return dict(DEFAULT_PROFILES)
+        write_text_atomic(
+            path,
+            json.dumps([asdict(p) for p in DEFAULT_PROFILES.values()], ensure_ascii=False, indent=2),
+        )
+    return {r["name"]: Profile(**r) for r in _read_profile_registry(path)}
@@ -0,0 +1,288 @@
+"""
+Relatório em lote: resumo diário e balanço semanal de todos os perfis salvos.
+
+    python -m body_core.report --out relatorio.csv [--data-dir data] [--workers 8] [--backend json|arrow|sqlite]
+
+Percorre os perfis do cadastro (profiles.json), lê o estado de cada um como o app lê no
+backend escolhido (padrão: BODY_ASSISTANT_STORAGE), calcula cada perfil num pool de
+processos com a mesma lógica da tela (DailyAggregates + daily_energy_budget) e grava as
+linhas em streaming num único CSV, JSONL ou Parquet. Só uma janela de perfis fica em
+memória por vez, então o número de perfis não limita a execução.
+
+- json / arrow: os arquivos state_* do perfil, no formato gravado por último
+  (read_saved_state: .arrow ou snapshot + journal)
+- sqlite: a última semana gravada no bodyassistant.db até a atual; perfil ainda fora do
+  banco sai dos arquivos, como o app o importaria
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+from .paths import DATA_DIR
+from .profiles import Profile, load_profile_registry
+
+log = logging.getLogger(__name__)
+
+REPORT_COLUMNS = [
+    "Perfil",
+    "Dia",
+    "Ingestão (kcal)",
+    "Gasto total exercício (kcal)",
+    "Limite diário (kcal)",
+    "Diferença (Limite - Ingestão)",
+    "TDEE (kcal)",
+    "Balanço (kcal)",
+    "Variação estimada (kg)",
+]
+WEEK_ROW = "Semana"  # linha de totais de cada perfil, depois dos dias
+PARQUET_BATCH_ROWS = 4096
+BACKENDS = ("json", "arrow", "sqlite")
+
+# ============================================================
+# Cálculo de um perfil (roda no processo filho)
+# ============================================================
+_SQLITE = {}  # caminho do banco -> SqliteStorage deste processo
+
+def load_report_state(profile_name: str, backend: str, data_dir: Path):
+    """
+    (plan, ex, scalars) do perfil como o app o carregaria no backend, sem gravar nada;
+    None se não há estado salvo
+    """
+    from .storage import SQLITE_PATH, SqliteStorage, read_saved_state
+
+    if backend == "sqlite":
+        db_path = data_dir / SQLITE_PATH.name
+        if db_path.exists():  # sem banco, só os arquivos (não cria o banco)
+            storage = _SQLITE.get(str(db_path))
+            if storage is None:
+                storage = _SQLITE[str(db_path)] = SqliteStorage(db_path, read_only=True)
+            loaded = storage.read_latest(profile_name)
+            if loaded is not None:
+                return loaded
+    return read_saved_state(profile_name, data_dir)
+
+def profile_report_rows(profile: dict, backend: str, data_dir: str) -> list:
+    """
+    Linhas do relatório de um perfil: uma por dia e a de totais da semana.
+    Lista vazia se o perfil não tem estado salvo legível.
+    """
+    from .metabolism import KCAL_PER_KG, daily_energy_budget
+    from .summary import DailyAggregates, compute_exercise_calc
+
+    prof = Profile(**profile)
+    try:
+        loaded = load_report_state(prof.name, backend, Path(data_dir))
+    except (ValueError, OSError, sqlite3.DatabaseError):
+        # Relatório só lê: arquivo ilegível (JSON, Arrow) fica como está, para a tela tratar
+        log.exception("Estado ilegível de %s; perfil fora do relatório", prof.name)
+        return []
+    if loaded is None:
+        log.warning("Perfil sem estado salvo: %s", prof.name)
+        return []
+    plan, ex, scalars = loaded
+    weight_kg = float(scalars.get("weight_kg", prof.weight_kg))
+    height_cm = int(scalars.get("height_cm", prof.default_height_cm))
+    activity_factor = float(scalars.get("activity_factor", prof.default_activity_factor))
+
+    aggs = DailyAggregates(plan, ex, compute_exercise_calc(ex, weight_kg), weight_kg)
+    daily = aggs.summary_frame(prof.daily_limit_kcal)
+    _, tdee_day = daily_energy_budget(prof.sex, weight_kg, height_cm, prof.age, activity_factor)
+
+    rows = []
+    for r in daily.itertuples(index=False):
+        intake, ex_kcal = int(r[1]), int(r[2])
+        balance = int(round(intake - (tdee_day + ex_kcal)))
+        rows.append([prof.name, r[0], intake, ex_kcal, int(r[3]), int(r[4]),
+                     int(round(tdee_day)), balance, round(balance / KCAL_PER_KG, 3)])
+
+    # Mesmo cálculo do balanço semanal da tela: TDEE arredondado da semana inteira
+    week_tdee = int(round(tdee_day * 7))
+    week_balance = int(round(aggs.week_intake - (week_tdee + aggs.week_ex)))
+    week_limit = prof.daily_limit_kcal * len(rows)
+    rows.append([prof.name, WEEK_ROW, aggs.week_intake, aggs.week_ex, week_limit,
+                 week_limit - aggs.week_intake, week_tdee, week_balance, round(week_balance / KCAL_PER_KG, 3)])
+    return rows
+
+def _report_task(task):
+    return profile_report_rows(*task)
+
+# ============================================================
+# Saída em streaming
+# ============================================================
+class CsvReportWriter:
+    def __init__(self, f):
+        self._w = csv.writer(f)
+        self._w.writerow(REPORT_COLUMNS)
+
+    def write(self, rows: list):
+        self._w.writerows(rows)
+
+    def close(self):
+        pass
+
+class JsonlReportWriter:
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, rows: list):
+        self._f.writelines(
+            json.dumps(dict(zip(REPORT_COLUMNS, r)), ensure_ascii=False) + "\n" for r in rows
+        )
+
+    def close(self):
+        pass
+
+class ParquetReportWriter:
+    """
+    Grava em row groups de PARQUET_BATCH_ROWS linhas (pyarrow, que vem com o Streamlit)
+    """
+
+    def __init__(self, path: Path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            (c, pa.string() if c in ("Perfil", "Dia") else pa.float64() if c == "Variação estimada (kg)" else pa.int64())
+            for c in REPORT_COLUMNS
+        ])
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+        self._buffer = []
+
+    def write(self, rows: list):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            columns = list(zip(*self._buffer))
+            self._writer.write_table(self._pa.table(
+                {c: self._pa.array(v, type=self._schema.field(c).type) for c, v in zip(REPORT_COLUMNS, columns)},
+                schema=self._schema,
+            ))
+            self._buffer = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+REPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+def _format_from_path(out: str) -> str:
+    suffix = Path(out).suffix.lower().lstrip(".")
+    return {"json": "jsonl", "ndjson": "jsonl", "pq": "parquet"}.get(suffix, suffix if suffix in REPORT_FORMATS else "csv")
+
+# ============================================================
+# Execução
+# ============================================================
+def newer_backends(data_dir: Path, backend: str) -> list:
+    """
+    Backends com gravação mais nova que a do backend lido: o relatório estaria lendo
+    estado velho (ex.: state_*.json depois de trocar para Arrow ou SQLite)
+    """
+    from .storage import SQLITE_PATH
+
+    latest = {"json": 0, "arrow": 0, "sqlite": 0}
+    for e in os.scandir(data_dir):
+        if e.name.startswith(SQLITE_PATH.name):  # o banco e o -wal
+            kind = "sqlite"
+        elif e.name.startswith("state_") and e.name.endswith(".arrow"):
+            kind = "arrow"
+        elif e.name.startswith("state_") and e.name.endswith((".json", ".journal.jsonl")):
+            kind = "json"
+        else:
+            continue
+        latest[kind] = max(latest[kind], e.stat().st_mtime_ns)
+    # json e arrow são lidos juntos (o formato mais novo de cada perfil)
+    read = max(latest["json"], latest["arrow"]) if backend != "sqlite" else latest["sqlite"]
+    others = ["sqlite"] if backend != "sqlite" else []
+    return [b for b in others if latest[b] > read]
+
+def run_report(data_dir: Path, writer, workers: int = None, window: int = None, backend: str = None) -> dict:
+    """
+    Calcula os perfis do cadastro de data_dir em paralelo e entrega as linhas ao writer
+    na ordem do cadastro. No máximo `window` perfis ficam pendentes (enviados e não gravados).
+    """
+    from .storage import STORAGE_BACKEND
+
+    backend = backend or STORAGE_BACKEND
+    # Só leitura: sem profiles.json, os perfis padrão (como o app), sem gravar o arquivo
+    registry = load_profile_registry(data_dir / "profiles.json", write_defaults=False)
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    stats = {"profiles": 0, "rows": 0, "skipped": 0}
+
+    def tasks():
+        for name in sorted(registry):
+            yield asdict(registry[name]), backend, str(data_dir)
+
+    def consume(rows):
+        if rows:
+            writer.write(rows)
+            stats["profiles"] += 1
+            stats["rows"] += len(rows)
+        else:
+            stats["skipped"] += 1
+
+    if workers == 1:
+        for task in tasks():
+            consume(_report_task(task))
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks():
+            pending.append(pool.submit(_report_task, task))
+            if len(pending) >= window:
+                consume(pending.popleft().result())
+        while pending:
+            consume(pending.popleft().result())
+    return stats
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m body_core.report", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="pasta com profiles.json e o estado salvo")
+    parser.add_argument("--backend", choices=BACKENDS, default=None, help="padrão: BODY_ASSISTANT_STORAGE (json)")
+    parser.add_argument("--out", default="-", help="arquivo de saída (- = stdout)")
+    parser.add_argument("--format", choices=REPORT_FORMATS, help="padrão: pela extensão de --out (csv)")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: núcleos da máquina)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    from .storage import SQLITE_PATH, STORAGE_BACKEND
+
+    backend = args.backend or STORAGE_BACKEND
+    if backend == "sqlite" and not (args.data_dir / SQLITE_PATH.name).exists():
+        log.warning("Sem %s em %s; o relatório lê os arquivos state_*", SQLITE_PATH.name, args.data_dir)
+    for newer in newer_backends(args.data_dir, backend):
+        log.warning("Há gravações mais novas no backend %s; o relatório lê %s (--backend %s)", newer, backend, newer)
+
+    fmt = args.format or _format_from_path(args.out)
+    if fmt == "parquet":
+        if args.out == "-":
+            parser.error("Parquet precisa de --out com um arquivo")
+        writer, f = ParquetReportWriter(Path(args.out)), None
+    else:
+        f = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8", newline="")
+        writer = CsvReportWriter(f) if fmt == "csv" else JsonlReportWriter(f)
+    try:
+        stats = run_report(args.data_dir, writer, workers=args.workers, backend=backend)
+    finally:
+        writer.close()
+        if f is not None and f is not sys.stdout:
+            f.close()
+    log.info("%d perfis, %d linhas, %d ignorados", stats["profiles"], stats["rows"], stats["skipped"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Projeção de peso em várias semanas e varreduras de cenários (NumPy, vários cenários por vez).
+"""
+import numpy as np
+import pandas as pd
+
+from .activities import DEFAULT_INTENSITY, get_activity_catalog, intensity_levels
+from .cache import memoized
+from .exercise import kcal_from_met_batch
+from .metabolism import KCAL_PER_KG, bmr_mifflin_st_jeor_batch
+
+
+def simulate_weight_trajectory(
+    sex,
+    weight_kg,
+    height_cm,
+    age,
+    activity_factor,
+    week_intake_kcal,
+    week_ex_kcal,
+    weeks: int,
+) -> dict:
+    """
+    Projeta o peso semana a semana repetindo a mesma semana de ingestão e exercício.
+    A cada passo BMR/TDEE são recalculados com o peso novo, e o gasto do exercício
+    (proporcional ao peso pela fórmula do MET) é reescalado a partir do peso inicial.
+    Todos os argumentos (menos weeks) podem ser arrays de N cenários (broadcast).
+    Devolve arrays (weeks + 1, N) de peso e (weeks, N) de TDEE semanal e balanço.
+    """
+    sex, w0, h, a, af, intake, ex0 = np.broadcast_arrays(
+        np.asarray(sex, dtype=str),
+        np.asarray(weight_kg, dtype=float),
+        np.asarray(height_cm, dtype=float),
+        np.asarray(age, dtype=float),
+        np.asarray(activity_factor, dtype=float),
+        np.asarray(week_intake_kcal, dtype=float),
+        np.asarray(week_ex_kcal, dtype=float),
+    )
+    shape = np.atleast_1d(w0).shape
+    male = (np.char.upper(sex) == "M").reshape(shape)
+    h, a, w0, af, intake, ex0 = (x.reshape(shape) for x in (h, a, w0, af, intake, ex0))
+
+    weights = np.empty((weeks + 1,) + shape)
+    week_tdee = np.empty((weeks,) + shape)
+    balance = np.empty((weeks,) + shape)
+    weights[0] = w0
+    for k in range(weeks):
+        w = weights[k]
+        week_tdee[k] = bmr_mifflin_st_jeor_batch(male, w, h, a) * af * 7
+        balance[k] = intake - (week_tdee[k] + ex0 * w / w0)
+        weights[k + 1] = w + balance[k] / KCAL_PER_KG
+    return {"weight_kg": weights, "week_tdee_kcal": week_tdee, "week_balance_kcal": balance}
+
+def scenario_sweep(
+    sex: str,
+    age: int,
+    height_cm: float,
+    week_intake_kcal: float,
+    activity_factors,
+    weights_kg,
+    run_km_week,
+    strength_min_week,
+    run_speed_kmh: float = 9.0,
+    strength_intensity: str = DEFAULT_INTENSITY,
+) -> pd.DataFrame:
+    """
+    Balanço semanal e variação de peso estimada para o produto cartesiano das grades
+    (atividade × peso × km de corrida/semana × minutos de musculação/semana), numa
+    única passada com broadcast. Corrida em run_speed_kmh de média e musculação na
+    intensidade dada, com o MET do catálogo de atividades (o mesmo da tabela de exercícios).
+    Devolve um DataFrame "tidy", uma linha por combinação.
+    """
+    af, w, km, musc = np.meshgrid(
+        np.asarray(activity_factors, dtype=float),
+        np.asarray(weights_kg, dtype=float),
+        np.asarray(run_km_week, dtype=float),
+        np.asarray(strength_min_week, dtype=float),
+        indexing="ij",
+    )
+    run_min = km / run_speed_kmh * 60.0 if run_speed_kmh > 0 else np.zeros_like(km)
+    catalog = get_activity_catalog()
+    run_code, strength_code = catalog.codes(["Corrida", "Musculação"])
+    run_met = catalog.met(
+        np.full(km.shape, run_code), np.where(run_min > 0, float(run_speed_kmh), 0.0), 0.0,
+        intensity_levels([DEFAULT_INTENSITY])[0],
+    )
+    strength_met = catalog.met(np.full(musc.shape, strength_code), 0.0, 0.0, intensity_levels([strength_intensity])[0])
+    week_tdee = bmr_mifflin_st_jeor_batch(sex, w, height_cm, age) * af * 7
+    week_ex = kcal_from_met_batch(w, run_min, run_met) + kcal_from_met_batch(w, musc, strength_met)
+    balance = float(week_intake_kcal) - (week_tdee + week_ex)
+    return pd.DataFrame({
+        "Atividade": af.ravel(),
+        "Peso (kg)": w.ravel(),
+        "Corrida (km/sem)": km.ravel(),
+        "Musculação (min/sem)": musc.ravel(),
+        "TDEE semanal (kcal)": week_tdee.ravel().round(),
+        "Exercício semanal (kcal)": week_ex.ravel().round(),
+        "Balanço semanal (kcal)": balance.ravel().round(),
+        "Variação (kg/sem)": (balance / KCAL_PER_KG).ravel().round(3),
+    })
+
+def sweep_heatmap(sweep: pd.DataFrame, index: str, columns: str, values: str = "Variação (kg/sem)", **fixed) -> pd.DataFrame:
+    """
+    Tabela índice × colunas de uma varredura, filtrando as demais dimensões por fixed
+    (ex.: sweep_heatmap(df, "Peso (kg)", "Corrida (km/sem)", Atividade=1.55))
+    """
+    mask = np.ones(len(sweep), dtype=bool)
+    for col, value in fixed.items():
+        mask &= np.isclose(sweep[col].to_numpy(), value)
+    return sweep[mask].pivot_table(index=index, columns=columns, values=values, aggfunc="mean")
+
+@memoized("weight_projection", maxsize=256, ttl_s=3600)
+def weight_projection_frame(
+    sex: str,
+    weight_kg: float,
+    height_cm: float,
+    age: int,
+    activity_factor: float,
+    week_intake_kcal: float,
+    week_ex_kcal: float,
+    weeks: int,
+) -> pd.DataFrame:
+    """
+    Série semanal de um perfil para o gráfico (semana 0 = peso atual)
+    """
+    sim = simulate_weight_trajectory(
+        sex, weight_kg, height_cm, age, activity_factor, week_intake_kcal, week_ex_kcal, weeks
+    )
+    return pd.DataFrame({
+        "Semana": np.arange(weeks + 1),
+        "Peso projetado (kg)": sim["weight_kg"][:, 0].round(2),
+        "Balanço semanal (kcal)": np.append(sim["week_balance_kcal"][:, 0].round(), np.nan),
+    })
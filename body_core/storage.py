@@ -0,0 +1,976 @@
+"""
+Persistência do estado de cada perfil.
+
+- autosave com fingerprint (pula escrita sem mudança) e debounce numa thread por processo
+- estado versionado: cada escrita grava versão + 1 (merge entre sessões em body_core.concurrency)
+- backend JSON: snapshot state_*.json + journal de células state_*.journal.jsonl
+- backend SQLite (BODY_ASSISTANT_STORAGE=sqlite): histórico por semana ISO
+- backend colunar (BODY_ASSISTANT_STORAGE=arrow): Arrow IPC, ver body_core.columnar
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .editing import _as_text, _py, set_cells
+from .files import write_text_atomic
+from .instrument import count, span
+from .macros import as_macro_plan
+from .paths import DATA_DIR, _profile_slug, arrow_paths, journal_path, state_path
+from .plans import MACRO_COLUMNS, as_activity_rows, init_exercise_df
+from .profiles import load_profile_registry
+
+# Autosave: a escrita sai da rerun e vai para uma thread única por processo.
+# Rajadas de edições do mesmo perfil dentro de AUTOSAVE_DEBOUNCE_S viram uma escrita só.
+AUTOSAVE_DEBOUNCE_S = 0.5
+
+log = logging.getLogger(__name__)
+
+def state_fingerprint(
+    plan_df: pd.DataFrame,
+    ex_df: pd.DataFrame,
+    weight_kg: float,
+    height_cm: int,
+    activity_factor: float,
+) -> str:
+    """
+    Hash do estado do perfil (escalares + conteúdo dos DataFrames), sem serializar para JSON
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((float(weight_kg), int(height_cm), float(activity_factor))).encode())
+    for df in (plan_df, ex_df):
+        h.update(repr(list(df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+class AutosaveWriter:
+    """
+    Fila de escrita com debounce: guarda só o último estado pendente por arquivo e
+    escreve depois de AUTOSAVE_DEBOUNCE_S sem novas alterações. Também lembra o
+    fingerprint do último estado enviado para pular escritas sem mudança.
+    """
+
+    def __init__(self, delay_s: float = AUTOSAVE_DEBOUNCE_S):
+        self.delay_s = delay_s
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # ordena as escritas entre a thread e flush()
+        self._pending = {}       # chave (perfil) -> (deadline, write)
+        self._fingerprints = {}  # chave (perfil) -> fingerprint do último estado enviado
+        self._thread = threading.Thread(target=self._run, name="autosave-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def mark_clean(self, key, fingerprint: str):
+        with self._cond:
+            self._fingerprints[key] = fingerprint
+
+    def submit(self, key, fingerprint: str, write) -> bool:
+        """
+        Agenda write() para key. Retorna False (e não agenda) se o estado não mudou.
+        """
+        with self._cond:
+            if self._fingerprints.get(key) == fingerprint:
+                return False
+            self._fingerprints[key] = fingerprint
+            self._pending[key] = (time.monotonic() + self.delay_s, write)
+            self._cond.notify()
+            return True
+
+    def flush(self, key=None):
+        """
+        Escreve já (na thread de quem chamou) o que estiver pendente — tudo ou só key
+        """
+        with self._io_lock:
+            with self._cond:
+                if key is None:
+                    due = list(self._pending.items())
+                    self._pending.clear()
+                elif key in self._pending:
+                    due = [(key, self._pending.pop(key))]
+                else:
+                    due = []
+            self._write_all(due)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                wait_s = min(deadline for deadline, _ in self._pending.values()) - time.monotonic()
+                if wait_s > 0:
+                    self._cond.wait(wait_s)
+                    continue
+            with self._io_lock:
+                now = time.monotonic()
+                with self._cond:
+                    due = [(k, item) for k, item in self._pending.items() if item[0] <= now]
+                    for k, _ in due:
+                        del self._pending[k]
+                self._write_all(due)
+
+    def _write_all(self, due):
+        for key, (_, write) in due:
+            try:
+                write()
+            except Exception:
+                log.exception("Falha ao salvar %s", key)
+                with self._cond:
+                    self._fingerprints.pop(key, None)  # força nova tentativa no próximo save
+
+_WRITER = None
+_SINGLETON_LOCK = threading.Lock()
+
+def get_autosave_writer() -> AutosaveWriter:
+    global _WRITER
+    with _SINGLETON_LOCK:
+        if _WRITER is None:
+            _WRITER = AutosaveWriter()
+        return _WRITER
+
+# Journal: cada autosave acrescenta só as células alteradas em state_*.journal.jsonl
+# (uma linha JSON [tabela, rid, coluna, valor] por célula; escalares usam a tabela
+# "profile" e rid null). O snapshot state_*.json só é reescrito na compactação,
+# quando o journal passa de JOURNAL_COMPACT_BYTES, ou quando o formato das tabelas muda.
+# Cada lote de um autosave termina com ["profile", null, "version", n]: só lotes
+# fechados valem na leitura, que assim dispensa lock mesmo com um append em andamento.
+JOURNAL_COMPACT_BYTES = 256 * 1024
+PROFILE_SCALARS = ("weight_kg", "height_cm", "activity_factor")
+VERSION_KEY = "version"
+LOAD_RETRIES = 5  # releituras quando o snapshot é trocado no meio de uma leitura
+
+def _records(df: pd.DataFrame) -> list:
+    flat = df.reset_index()
+    for col in flat.columns:
+        if flat[col].dtype == np.float32:
+            # Macros pelo menor decimal do float32 (como _py no journal): 12.3, não 12.300000190734863
+            flat[col] = flat[col].to_numpy().astype(str).astype(float)
+    return flat.to_dict(orient="records")
+
+def _write_state_snapshot(path: Path, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict):
+    payload = {
+        "weight_kg": float(scalars["weight_kg"]),
+        "height_cm": int(scalars["height_cm"]),
+        "activity_factor": float(scalars["activity_factor"]),
+        "version": int(scalars.get(VERSION_KEY, 0)),
+        "plan": _records(plan_df),
+        "exercise": ex_df.reset_index().to_dict(orient="records"),
+    }
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    write_text_atomic(path, text)
+    count("storage_bytes_written", len(text.encode("utf-8")))
+
+def _diff_table(table: str, old: pd.DataFrame, new: pd.DataFrame):
+    """
+    Registros de journal das diferenças entre old e new (None se as colunas mudaram):
+    células alteradas, todas as células das linhas novas e [tabela, rid, null, null]
+    para cada linha removida
+    """
+    if list(old.columns) != list(new.columns):
+        return None
+    if old.index.equals(new.index):
+        kept, removed, added = new, [], []
+    else:
+        common = new.index.intersection(old.index, sort=False)
+        removed = old.index.difference(new.index, sort=False)
+        added = new.index.difference(old.index, sort=False)
+        old, kept = old.loc[common], new.loc[common]
+    records = [[table, _py(rid), None, None] for rid in removed]
+    for col in new.columns:
+        before = old[col].to_numpy()
+        after = kept[col].to_numpy()
+        diff = (before != after) & ~(pd.isna(before) & pd.isna(after))
+        for pos in np.flatnonzero(diff):
+            records.append([table, _py(kept.index[pos]), col, _py(after[pos])])
+    for rid, values in zip(added, new.loc[added].itertuples(index=False, name=None)):
+        records.extend([table, _py(rid), col, _py(v)] for col, v in zip(new.columns, values))
+    return records
+
+def _append_rows(df: pd.DataFrame, rows: dict) -> pd.DataFrame:
+    # Linhas novas do journal ({rid: {coluna: valor}}) no fim, com os dtypes numéricos de df
+    new = pd.DataFrame.from_dict(rows, orient="index").reindex(columns=df.columns)
+    new.index = pd.Index(new.index, name=df.index.name)
+    for col in df.columns:
+        if df[col].dtype.kind in "iuf" and new[col].notna().all():
+            new[col] = new[col].astype(df[col].dtype)
+    return pd.concat([df, new]) if len(df) else new
+
+def _replay_journal(plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict, records: list):
+    """
+    Aplica os registros sobre o snapshot: última escrita de cada célula vence,
+    uma atribuição por coluna. Registro de rid fora da tabela cria a linha;
+    coluna null remove a linha.
+    """
+    latest = {}   # (tabela, coluna) -> {rid: valor}
+    removed = {}  # tabela -> {rid}
+    for table, rid, col, value in records:
+        if col is None:
+            removed.setdefault(table, set()).add(rid)
+            for (t, _), cells in latest.items():
+                if t == table:
+                    cells.pop(rid, None)
+            continue
+        if rid in removed.get(table, ()):
+            removed[table].discard(rid)
+        latest.setdefault((table, col), {})[rid] = value
+
+    tables = {"plan": plan_df, "exercise": ex_df}
+    for table, rids in removed.items():
+        df = tables.get(table)
+        if df is not None and df.index.isin(list(rids)).any():
+            tables[table] = df.drop(index=[rid for rid in rids if rid in df.index])
+    new_rows = {}  # tabela -> {rid: {coluna: valor}}
+    for (table, col), cells in latest.items():
+        if table == "profile":
+            scalars[col] = list(cells.values())[-1]
+            continue
+        df = tables.get(table)
+        if df is None or col not in df.columns:
+            continue
+        rids = [rid for rid in cells if rid in df.index]
+        for rid in cells:
+            if rid not in df.index:
+                new_rows.setdefault(table, {}).setdefault(rid, {})[col] = cells[rid]
+        if not rids:
+            continue
+        values = [cells[rid] for rid in rids]
+        # Só a coluna muda: os frames de entrada podem ser a versão compartilhada
+        tables[table] = set_cells(df, col, rids, values)
+    for table, rows in new_rows.items():
+        tables[table] = _append_rows(tables[table], rows)
+    return tables["plan"], tables["exercise"], scalars
+
+def _read_journal(path: Path) -> list:
+    """
+    Registros do journal. Só lê: linha sem "\n" no fim (append em andamento ou
+    interrompido) fica de fora, e quem corta o arquivo é a escrita (_repair_tail).
+    """
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    lines = data.splitlines()
+    if data and not data.endswith(b"\n"):
+        lines = lines[:-1]
+    if not lines:
+        return []
+    try:
+        # Um único json.loads para o arquivo todo é bem mais rápido que linha a linha
+        return json.loads(b"[" + b",".join(lines) + b"]")
+    except ValueError:  # inclui UnicodeDecodeError
+        pass
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line.decode("utf-8")))
+        except ValueError:
+            log.warning("Linha inválida ignorada em %s", path)
+    return records
+
+def _repair_tail(path: Path):
+    """
+    Corta a linha incompleta deixada por um append interrompido, para o próximo não colar nela
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            data = f.read()
+    except (FileNotFoundError, OSError):
+        return  # sem arquivo ou vazio
+    with open(path, "r+b") as f:
+        f.truncate(data.rfind(b"\n") + 1)
+    log.warning("Última linha incompleta cortada em %s", path)
+
+def _committed_records(records: list, snapshot_version: int):
+    """
+    Registros dos lotes fechados mais novos que o snapshot. Lote sem o registro de versão
+    no fim é escrita em andamento e fica de fora; journal sem nenhum registro de versão
+    (formato antigo) vale inteiro. None se há buraco entre o snapshot e o primeiro lote:
+    o snapshot foi compactado entre a leitura dele e a do journal, e quem lê relê.
+    """
+    out, batch, versioned = [], [], False
+    expected = snapshot_version + 1
+    for r in records:
+        batch.append(r)
+        if r[0] == "profile" and r[2] == VERSION_KEY:
+            versioned = True
+            if r[3] >= expected:
+                if r[3] != expected:
+                    return None
+                out.extend(batch)
+                expected += 1
+            batch = []
+    return out if versioned else batch
+
+def _stat_key(path: Path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+class ProfileJournal:
+    """
+    Snapshot + journal de um perfil. Guarda em memória o último estado persistido
+    (base) para gravar só a diferença; a base é relida quando os arquivos mudam em disco
+    (outro processo gravou). O lock daqui é só entre threads: a leitura não usa lock de
+    arquivo, e quem escreve de vários processos segura profile_lock (body_core.concurrency).
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self._lock = threading.Lock()
+        self._base = None   # (plan_df, ex_df, scalars) como estão em disco
+        self._token = None  # token() dos arquivos quando a base foi lida/gravada
+        self._journal_bytes = journal_path.stat().st_size if journal_path.exists() else 0
+
+    def token(self):
+        """
+        Identifica o conteúdo em disco (stat do snapshot e do journal): muda a cada escrita
+        """
+        return _stat_key(self.snapshot_path), _stat_key(self.journal_path)
+
+    def load(self):
+        """
+        Snapshot + replay do journal -> (plan_df, ex_df, scalars), ou None se não há snapshot
+        """
+        with self._lock:
+            base = self._refresh()
+            return None if base is None else (base[0], base[1], dict(base[2]))
+
+    def _refresh(self):
+        token = self.token()
+        if token == self._token:
+            return self._base
+        for _ in range(LOAD_RETRIES):
+            try:
+                payload = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._base, self._token = None, token
+                return None
+            scalars = {k: payload[k] for k in PROFILE_SCALARS if k in payload}
+            scalars[VERSION_KEY] = payload.get(VERSION_KEY, 0)
+            records = _committed_records(_read_journal(self.journal_path), scalars[VERSION_KEY])
+            if records is not None:
+                break
+            token = self.token()
+        else:
+            # Compactação a cada releitura: fica com o snapshot (uma versão inteira) e
+            # sem token, para a próxima leitura não confiar nesta base
+            log.warning("Journal de %s mudou durante a leitura; usando só o snapshot", self.snapshot_path)
+            records, token = [], None
+        plan = pd.DataFrame(payload.get("plan", []))
+        ex = pd.DataFrame(payload.get("exercise", []))
+        if not plan.empty and "rid" in plan.columns:
+            plan = plan.set_index("rid")
+        if not ex.empty and "rid" in ex.columns:
+            ex = ex.set_index("rid")
+        # Formatos antigos lidos já convertidos: exercício uma linha por dia, plano sem
+        # macros (o journal depois do snapshot já tem as colunas de macros)
+        ex = as_activity_rows(ex)
+        plan = as_macro_plan(plan)
+
+        self._base = _replay_journal(plan, ex, scalars, records)
+        self._token = token
+        self._journal_bytes = token[1][1] if token and token[1] else 0
+        return self._base
+
+    def write(self, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict):
+        """
+        Grava com a versão de scalars ou, sem ela, com a versão em disco + 1
+        """
+        with self._lock:
+            base = self._refresh()  # diferença sempre contra o que está em disco agora
+            scalars = dict(scalars)
+            if VERSION_KEY not in scalars:
+                scalars[VERSION_KEY] = (base[2].get(VERSION_KEY, 0) if base else 0) + 1
+            records = self._diff(plan_df, ex_df, scalars)
+            if records is None:
+                self._compact(plan_df, ex_df, scalars)
+                return
+            if records:
+                records.append(["profile", None, VERSION_KEY, scalars[VERSION_KEY]])  # fecha o lote
+                lines = "".join(
+                    json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records
+                ).encode("utf-8")
+                _repair_tail(self.journal_path)
+                with open(self.journal_path, "ab") as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                count("storage_bytes_written", len(lines))
+                self._base = (plan_df, ex_df, scalars)
+                self._token = self.token()
+                self._journal_bytes = self._token[1][1]
+            if self._journal_bytes > JOURNAL_COMPACT_BYTES:
+                self._compact(plan_df, ex_df, scalars)
+
+    def _diff(self, plan_df, ex_df, scalars):
+        if self._base is None:
+            return None
+        base_plan, base_ex, base_scalars = self._base
+        plan_records = _diff_table("plan", base_plan, plan_df)
+        ex_records = _diff_table("exercise", base_ex, ex_df)
+        if plan_records is None or ex_records is None:
+            return None
+        scalar_records = [
+            ["profile", None, k, scalars[k]]
+            for k in PROFILE_SCALARS if k in scalars and base_scalars.get(k) != scalars[k]
+        ]
+        return plan_records + ex_records + scalar_records
+
+    def _compact(self, plan_df, ex_df, scalars):
+        # Snapshot novo primeiro, journal depois: se cair no meio, os lotes do journal
+        # antigo têm versão <= a do snapshot e são ignorados na leitura.
+        _write_state_snapshot(self.snapshot_path, plan_df, ex_df, scalars)
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self._journal_bytes = 0
+        self._base = (plan_df, ex_df, dict(scalars))
+        self._token = self.token()
+
+_JOURNALS = {}
+
+def get_profile_journal(profile_name: str) -> ProfileJournal:
+    with _SINGLETON_LOCK:
+        journal = _JOURNALS.get(profile_name)
+        if journal is None:
+            journal = _JOURNALS[profile_name] = ProfileJournal(state_path(profile_name), journal_path(profile_name))
+        return journal
+
+# Arquivos de estado ilegíveis guardados ao lado (*.corrupt), por perfil, para o aviso na tela
+_QUARANTINED = {}
+
+def quarantine_file(profile_name: str, path: Path):
+    """
+    Move o arquivo para <nome>.corrupt (o estado padrão não o sobrescreve) e o registra
+    para quarantined_files. None se o arquivo já não existe.
+    """
+    corrupt = path.with_name(path.name + ".corrupt")
+    try:
+        os.replace(path, corrupt)
+    except FileNotFoundError:
+        return None
+    with _SINGLETON_LOCK:
+        _QUARANTINED.setdefault(profile_name, []).append(corrupt)
+    return corrupt
+
+def quarantined_files(profile_name: str) -> list:
+    """
+    Arquivos do perfil movidos para *.corrupt neste processo e que ainda estão lá
+    """
+    with _SINGLETON_LOCK:
+        moved = list(_QUARANTINED.get(profile_name, ()))
+    return [p for p in moved if p.exists()]
+
+def _mtime_ns(paths) -> int:
+    return max((p.stat().st_mtime_ns for p in paths if p.exists()), default=0)
+
+def read_saved_state(profile_name: str, data_dir: Path = None, quarantine: bool = False):
+    """
+    Estado do perfil nos arquivos dos backends JSON e Arrow: o formato gravado por último.
+    Com BODY_ASSISTANT_STORAGE=arrow o state_*.json para de mudar depois da importação, e
+    voltando para o JSON os .arrow ficam para trás. None se o perfil não tem arquivos.
+    Arquivo ilegível levanta o erro (ferramentas sem tela, só leitura) ou, com quarantine
+    (importação por outro backend), vai para o lado como em JsonStorage.load e dá None.
+    """
+    json_paths = (state_path(profile_name, data_dir), journal_path(profile_name, data_dir))
+    plan_path, ex_path = arrow_paths(profile_name, data_dir)
+    if plan_path.exists() and _mtime_ns((plan_path, ex_path)) >= _mtime_ns(json_paths):
+        import pyarrow as pa  # só com arquivos colunares
+
+        from .columnar import read_arrow_state
+
+        try:
+            return read_arrow_state(plan_path, ex_path)
+        except (pa.ArrowInvalid, json.JSONDecodeError):
+            if not quarantine:
+                raise
+            for p in (plan_path, ex_path):
+                quarantine_file(profile_name, p)
+            log.exception("Estado colunar ilegível em %s; movido para *.corrupt", plan_path)
+            return None
+    try:
+        return ProfileJournal(*json_paths).load()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        if not quarantine:
+            raise
+        corrupt = quarantine_file(profile_name, json_paths[0])
+        log.exception("Estado ilegível em %s; movido para %s", json_paths[0], corrupt)
+        return None
+
+class JsonStorage:
+    """
+    Backend padrão: snapshot JSON + journal por perfil em DATA_DIR (só a semana atual)
+    """
+
+    def load(self, profile_name: str):
+        journal = get_profile_journal(profile_name)
+        try:
+            with span("storage.json.load"):
+                loaded = journal.load()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            # Só arquivo ilegível vai para o lado; erro de código sobe sem mexer nos dados
+            corrupt = quarantine_file(profile_name, journal.snapshot_path)
+            log.exception("Estado ilegível em %s; movido para %s", journal.snapshot_path, corrupt)
+            return None
+        if loaded is None and journal.journal_path.exists():
+            # Journal sem o snapshot em que se apoia: não dá para aplicar, e a primeira
+            # escrita (snapshot completo) o apagaria
+            corrupt = quarantine_file(profile_name, journal.journal_path)
+            log.warning("Journal sem snapshot em %s; movido para %s", journal.journal_path, corrupt)
+        return loaded
+
+    def write(self, profile_name: str, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict):
+        with span("storage.json.write"):
+            get_profile_journal(profile_name).write(plan_df, ex_df, scalars)
+        count("storage_writes")
+
+    def state_token(self, profile_name: str):
+        """
+        Muda sempre que o estado em disco muda (só stat, sem ler os arquivos)
+        """
+        return get_profile_journal(profile_name).token()
+
+# --- SQLite (histórico por semana ISO) ---
+SQLITE_PATH = DATA_DIR / "bodyassistant.db"
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plan_entries (
+    profile     TEXT    NOT NULL,
+    iso_week    TEXT    NOT NULL,  -- "2026-W42" (ordena como texto)
+    day         TEXT    NOT NULL,
+    meal        TEXT    NOT NULL,
+    rid         INTEGER NOT NULL,
+    description TEXT    NOT NULL DEFAULT '',
+    kcal        INTEGER NOT NULL DEFAULT 0,
+    protein_g   REAL,  -- macros (g); NULL nas semanas gravadas antes deles (estimados na leitura)
+    carbs_g     REAL,
+    fat_g       REAL,
+    fiber_g     REAL,
+    PRIMARY KEY (profile, iso_week, day, meal)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS activity_sessions (
+    profile     TEXT    NOT NULL,
+    iso_week    TEXT    NOT NULL,
+    rid         INTEGER NOT NULL,
+    day         TEXT    NOT NULL,
+    activity    TEXT    NOT NULL,
+    minutes     REAL    NOT NULL DEFAULT 0,
+    distance_km REAL    NOT NULL DEFAULT 0,
+    incline_pct REAL    NOT NULL DEFAULT 0,
+    intensity   TEXT    NOT NULL DEFAULT 'Moderada',
+    watch_met   REAL    NOT NULL DEFAULT 0,  -- MET medido (corrida do relógio); 0 = pelo catálogo
+    PRIMARY KEY (profile, iso_week, rid)
+) WITHOUT ROWID;
+-- Formato antigo (uma linha por dia): só lido, nas semanas gravadas antes de activity_sessions
+CREATE TABLE IF NOT EXISTS exercise_sessions (
+    profile      TEXT    NOT NULL,
+    iso_week     TEXT    NOT NULL,
+    day          TEXT    NOT NULL,
+    rid          INTEGER NOT NULL,
+    run_km       REAL    NOT NULL DEFAULT 0,
+    run_min      REAL    NOT NULL DEFAULT 0,
+    strength_min REAL    NOT NULL DEFAULT 0,
+    PRIMARY KEY (profile, iso_week, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS body_measurements (
+    profile         TEXT    NOT NULL,
+    iso_week        TEXT    NOT NULL,
+    weight_kg       REAL    NOT NULL,
+    height_cm       INTEGER NOT NULL,
+    activity_factor REAL    NOT NULL,
+    PRIMARY KEY (profile, iso_week)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_versions (
+    profile TEXT    NOT NULL PRIMARY KEY,
+    version INTEGER NOT NULL  -- versão do estado, para o merge entre sessões
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_plan_week ON plan_entries (iso_week, profile);
+CREATE INDEX IF NOT EXISTS idx_activity_week ON activity_sessions (iso_week, profile);
+CREATE INDEX IF NOT EXISTS idx_exercise_week ON exercise_sessions (iso_week, profile);
+CREATE INDEX IF NOT EXISTS idx_body_week ON body_measurements (iso_week, profile);
+"""
+
+PLAN_DB_COLUMNS = {
+    "Dia": "day", "Refeição": "meal", "Descrição": "description", "Calorias (kcal)": "kcal",
+    **dict(zip(MACRO_COLUMNS, ("protein_g", "carbs_g", "fat_g", "fiber_g"))),
+}
+EX_DB_COLUMNS = {
+    "Dia": "day", "Atividade": "activity", "Minutos": "minutes", "Distância (km)": "distance_km",
+    "Inclinação (%)": "incline_pct", "Intensidade": "intensity", "MET (relógio)": "watch_met",
+}
+LEGACY_EX_DB_COLUMNS = {"Dia": "day", "Corrida (km)": "run_km", "Corrida (min)": "run_min", "Musculação (min)": "strength_min"}
+
+def iso_week(d: date = None) -> str:
+    year, week, _ = (d or date.today()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+class SqliteStorage:
+    """
+    Backend SQLite com histórico: uma linha por (perfil, semana ISO, dia[, refeição]).
+    Uma conexão por processo (WAL), serializada por lock entre sessões e a thread de autosave.
+    read_only: abre um banco existente só para leitura (mode=ro), sem criar nem migrar nada.
+    """
+
+    def __init__(self, db_path: Path, read_only: bool = False):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if read_only:
+            uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+        else:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SQLITE_SCHEMA)
+        # Banco de antes dos macros: colunas novas no plano (NULL nas linhas já gravadas);
+        # só leitura, a consulta as traz como NULL
+        plan_cols = {r[1] for r in self._conn.execute("PRAGMA table_info(plan_entries)")}
+        for col in PLAN_DB_COLUMNS.values():
+            if col not in plan_cols and not read_only:
+                self._conn.execute(f"ALTER TABLE plan_entries ADD COLUMN {col} REAL")
+        self._plan_select = ", ".join(
+            col if col in plan_cols or not read_only else f"NULL AS {col}" for col in PLAN_DB_COLUMNS.values()
+        )
+        # Banco de antes do MET do relógio: 0 (pelo catálogo) nas linhas já gravadas
+        ex_cols = {r[1] for r in self._conn.execute("PRAGMA table_info(activity_sessions)")}
+        if ex_cols and "watch_met" not in ex_cols and not read_only:
+            self._conn.execute("ALTER TABLE activity_sessions ADD COLUMN watch_met REAL NOT NULL DEFAULT 0")
+        self._ex_select = ", ".join(
+            col if col in ex_cols or not read_only else f"0 AS {col}" for col in EX_DB_COLUMNS.values()
+        )
+
+    def load(self, profile_name: str, week: str = None):
+        """
+        Estado da semana (padrão: atual). Semana nova começa como cópia da última semana salva.
+        """
+        week = week or iso_week()
+        with span("storage.sqlite.load"), self._lock:
+            latest = self._conn.execute(
+                "SELECT MAX(iso_week) FROM body_measurements WHERE profile = ? AND iso_week <= ?",
+                (profile_name, week),
+            ).fetchone()[0]
+            if latest is None:
+                return self._import_json_profile(profile_name, week)
+            if latest != week:
+                self._roll_week(profile_name, latest, week)
+            return self._read_week(profile_name, week)
+
+    def read_latest(self, profile_name: str, week: str = None):
+        """
+        Estado da última semana gravada até `week` (padrão: atual), sem gravar nada (load
+        copia a semana para a atual e importa os arquivos). None se o perfil não está no banco.
+        """
+        week = week or iso_week()
+        with span("storage.sqlite.load"), self._lock:
+            latest = self._conn.execute(
+                "SELECT MAX(iso_week) FROM body_measurements WHERE profile = ? AND iso_week <= ?",
+                (profile_name, week),
+            ).fetchone()[0]
+            return None if latest is None else self._read_week(profile_name, latest)
+
+    def write(self, profile_name: str, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict, week: str = None):
+        with span("storage.sqlite.write"), self._lock:
+            self._write_week(profile_name, week or iso_week(), plan_df, ex_df, scalars)
+        count("storage_writes")
+
+    def state_token(self, profile_name: str):
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM state_versions WHERE profile = ?", (profile_name,)).fetchone()
+        return row[0] if row else None
+
+    def _write_week(self, profile_name: str, week: str, plan_df: pd.DataFrame, ex_df: pd.DataFrame, scalars: dict):
+        plan_rows = [
+            (profile_name, week, r["Dia"], r["Refeição"], int(r["rid"]), _as_text(r["Descrição"]), int(r["Calorias (kcal)"]),
+             *(r[c] for c in MACRO_COLUMNS))
+            for r in _records(as_macro_plan(plan_df))
+        ]
+        ex_rows = [
+            (profile_name, week, int(r["rid"]), _as_text(r["Dia"]), _as_text(r["Atividade"]), float(r["Minutos"]),
+             float(r["Distância (km)"]), float(r["Inclinação (%)"]), _as_text(r["Intensidade"]), float(r["MET (relógio)"]))
+            for r in as_activity_rows(ex_df).reset_index().to_dict(orient="records")
+        ]
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM plan_entries WHERE profile = ? AND iso_week = ?", (profile_name, week))
+            for table in ("activity_sessions", "exercise_sessions"):
+                self._conn.execute(f"DELETE FROM {table} WHERE profile = ? AND iso_week = ?", (profile_name, week))
+            self._conn.executemany("INSERT INTO plan_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", plan_rows)
+            self._conn.executemany("INSERT INTO activity_sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", ex_rows)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO body_measurements VALUES (?, ?, ?, ?, ?)",
+                (profile_name, week, float(scalars["weight_kg"]), int(scalars["height_cm"]),
+                 float(scalars["activity_factor"])),
+            )
+            if VERSION_KEY in scalars:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO state_versions VALUES (?, ?)", (profile_name, int(scalars[VERSION_KEY]))
+                )
+
+    def weekly_totals(self, profile_name: str, first_week: str, last_week: str) -> pd.DataFrame:
+        """
+        Totais por semana no intervalo [first_week, last_week] — uma consulta sobre os índices
+        """
+        sql = """
+            SELECT b.iso_week, b.weight_kg, b.height_cm, b.activity_factor,
+                   (SELECT SUM(kcal) FROM plan_entries p
+                     WHERE p.profile = b.profile AND p.iso_week = b.iso_week) AS intake_kcal,
+                   e.run_km, e.run_min, e.strength_min, e.exercise_min
+              FROM body_measurements b
+              LEFT JOIN (
+                    SELECT iso_week, SUM(run_km) AS run_km, SUM(run_min) AS run_min,
+                           SUM(strength_min) AS strength_min, SUM(exercise_min) AS exercise_min
+                      FROM (
+                            SELECT iso_week,
+                                   CASE WHEN activity = 'Corrida' THEN distance_km ELSE 0 END AS run_km,
+                                   CASE WHEN activity = 'Corrida' THEN minutes ELSE 0 END AS run_min,
+                                   CASE WHEN activity = 'Musculação' THEN minutes ELSE 0 END AS strength_min,
+                                   minutes AS exercise_min
+                              FROM activity_sessions
+                             WHERE profile = ? AND iso_week BETWEEN ? AND ?
+                            UNION ALL
+                            SELECT iso_week, run_km, run_min, strength_min, run_min + strength_min
+                              FROM exercise_sessions
+                             WHERE profile = ? AND iso_week BETWEEN ? AND ?
+                           )
+                     GROUP BY iso_week
+                   ) e ON e.iso_week = b.iso_week
+             WHERE b.profile = ? AND b.iso_week BETWEEN ? AND ?
+             ORDER BY b.iso_week
+        """
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=(profile_name, first_week, last_week) * 3)
+
+    def week_fingerprints(self, profile_name: str, first_week: str, last_week: str) -> list:
+        """
+        [(semana, impressão digital)] das semanas gravadas no intervalo, numa consulta:
+        contagens e somas (ponderadas pelo rid) das linhas de cada tabela da semana. Muda
+        quando a semana é regravada com outro conteúdo (cache de body_core.analytics).
+        """
+        sql = """
+            SELECT b.iso_week,
+                   b.weight_kg || '|' || b.height_cm || '|' || b.activity_factor
+                   || '|' || (SELECT COUNT(*) || ':' || TOTAL(kcal) || ':' || TOTAL(kcal * rid) || ':' || TOTAL(protein_g * rid)
+                                FROM plan_entries p WHERE p.profile = b.profile AND p.iso_week = b.iso_week)
+                   || '|' || (SELECT COUNT(*) || ':' || TOTAL(minutes * rid) || ':' || TOTAL(distance_km * rid)
+                                     || ':' || TOTAL(incline_pct * rid) || ':' || TOTAL(watch_met * rid)
+                                     || ':' || IFNULL(GROUP_CONCAT(day || activity || intensity), '')
+                                FROM activity_sessions a WHERE a.profile = b.profile AND a.iso_week = b.iso_week)
+                   || '|' || (SELECT COUNT(*) || ':' || TOTAL(run_km * rid) || ':' || TOTAL(run_min * rid)
+                                     || ':' || TOTAL(strength_min * rid)
+                                FROM exercise_sessions x WHERE x.profile = b.profile AND x.iso_week = b.iso_week)
+              FROM body_measurements b
+             WHERE b.profile = ? AND b.iso_week BETWEEN ? AND ?
+             ORDER BY b.iso_week
+        """
+        with self._lock:
+            return self._conn.execute(sql, (profile_name, first_week, last_week)).fetchall()
+
+    def week_rows(self, profile_name: str, weeks: list):
+        """
+        Linhas das semanas pedidas, com a coluna iso_week: (plano, atividades, medidas).
+        Plano só com Dia, kcal e proteína; semanas no formato antigo de exercício vêm
+        convertidas (as_activity_rows).
+        """
+        plans, acts, measures, legacy = [], [], [], []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for start in range(0, len(weeks), 500):  # limite de parâmetros do SQLite
+                    chunk = list(weeks[start:start + 500])
+                    where = f"profile = ? AND iso_week IN ({', '.join('?' * len(chunk))})"
+                    params = (profile_name, *chunk)
+                    plans.append(pd.read_sql_query(
+                        f"SELECT iso_week, day, kcal, protein_g FROM plan_entries WHERE {where}", self._conn, params=params
+                    ))
+                    acts.append(pd.read_sql_query(
+                        f"SELECT iso_week, rid, {self._ex_select} FROM activity_sessions "
+                        f"WHERE {where} ORDER BY iso_week, rid",
+                        self._conn, params=params,
+                    ))
+                    measures.append(pd.read_sql_query(
+                        f"SELECT iso_week, {', '.join(PROFILE_SCALARS)} FROM body_measurements WHERE {where}",
+                        self._conn, params=params,
+                    ))
+                    legacy.append(pd.read_sql_query(
+                        f"SELECT iso_week, rid, {', '.join(LEGACY_EX_DB_COLUMNS.values())} FROM exercise_sessions "
+                        f"WHERE {where} AND iso_week NOT IN (SELECT iso_week FROM activity_sessions WHERE {where}) "
+                        "ORDER BY iso_week, rid",
+                        self._conn, params=params * 2,
+                    ))
+            finally:
+                self._conn.execute("COMMIT")
+        plan = pd.concat(plans, ignore_index=True)
+        ex = pd.concat(acts, ignore_index=True).rename(columns={v: k for k, v in EX_DB_COLUMNS.items()})
+        old = pd.concat(legacy, ignore_index=True).rename(columns={v: k for k, v in LEGACY_EX_DB_COLUMNS.items()})
+        if len(old):
+            converted = [
+                as_activity_rows(rows.drop(columns=["iso_week"]).set_index("rid")).reset_index().assign(iso_week=week)
+                for week, rows in old.groupby("iso_week", sort=False)
+            ]
+            ex = pd.concat([ex, *converted], ignore_index=True)
+        return plan, ex, pd.concat(measures, ignore_index=True)
+
+    def _read_week(self, profile_name: str, week: str):
+        # Uma transação de leitura: no WAL as consultas veem o mesmo commit, sem bloquear quem grava
+        self._conn.execute("BEGIN")
+        try:
+            return self._read_week_tables(profile_name, week)
+        finally:
+            self._conn.execute("COMMIT")
+
+    def _read_week_tables(self, profile_name: str, week: str):
+        key = (profile_name, week)
+        plan = pd.read_sql_query(
+            f"SELECT rid, {self._plan_select} FROM plan_entries "
+            "WHERE profile = ? AND iso_week = ? ORDER BY rid",
+            self._conn, params=key,
+        ).rename(columns={v: k for k, v in PLAN_DB_COLUMNS.items()}).set_index("rid")
+        plan = as_macro_plan(plan)
+        ex = pd.read_sql_query(
+            f"SELECT rid, {self._ex_select} FROM activity_sessions "
+            "WHERE profile = ? AND iso_week = ? ORDER BY rid",
+            self._conn, params=key,
+        ).rename(columns={v: k for k, v in EX_DB_COLUMNS.items()}).set_index("rid")
+        if ex.empty:
+            # Semana gravada no formato antigo: lida já convertida (a próxima escrita migra)
+            legacy = pd.read_sql_query(
+                f"SELECT rid, {', '.join(LEGACY_EX_DB_COLUMNS.values())} FROM exercise_sessions "
+                "WHERE profile = ? AND iso_week = ? ORDER BY rid",
+                self._conn, params=key,
+            ).rename(columns={v: k for k, v in LEGACY_EX_DB_COLUMNS.items()}).set_index("rid")
+            ex = as_activity_rows(legacy) if not legacy.empty else init_exercise_df()
+        row = self._conn.execute(
+            "SELECT weight_kg, height_cm, activity_factor FROM body_measurements WHERE profile = ? AND iso_week = ?",
+            key,
+        ).fetchone()
+        version = self._conn.execute("SELECT version FROM state_versions WHERE profile = ?", (profile_name,)).fetchone()
+        return plan, ex, {**dict(zip(PROFILE_SCALARS, row)), VERSION_KEY: version[0] if version else 0}
+
+    def _roll_week(self, profile_name: str, from_week: str, to_week: str):
+        with self._conn:
+            self._conn.execute("BEGIN")
+            for table in ("plan_entries", "activity_sessions", "exercise_sessions", "body_measurements"):
+                cols = [r[1] for r in self._conn.execute(f"PRAGMA table_info({table})")]
+                rest = ", ".join(c for c in cols if c not in ("profile", "iso_week"))
+                self._conn.execute(
+                    f"INSERT INTO {table} (profile, iso_week, {rest}) "
+                    f"SELECT profile, ?, {rest} FROM {table} WHERE profile = ? AND iso_week = ?",
+                    (to_week, profile_name, from_week),
+                )
+
+    def _import_json_profile(self, profile_name: str, week: str):
+        # Primeira vez do perfil no banco: traz o estado dos backends de arquivo (JSON ou
+        # Arrow, o gravado por último), se existir; arquivo ilegível vai para o lado
+        loaded = read_saved_state(profile_name, quarantine=True)
+        if loaded is None:
+            return None
+        plan, ex, scalars = loaded
+        self._write_week(profile_name, week, plan, ex, scalars)
+        return self._read_week(profile_name, week)
+
+def import_json_states(storage: SqliteStorage, data_dir: Path = None) -> list:
+    """
+    Importação única: copia o estado de cada perfil dos backends de arquivo de data_dir
+    (state_*.json + journal ou .arrow, o gravado por último) para o SQLite, na semana ISO
+    da última modificação. Perfil com arquivo ilegível fica de fora (arquivo em *.corrupt).
+    Retorna os perfis importados.
+    """
+    data_dir = data_dir or DATA_DIR
+    by_slug = {_profile_slug(name): name for name in load_profile_registry(data_dir / "profiles.json")}
+    slugs = {p.name[len("state_"):-len(".json")] for p in data_dir.glob("state_*.json")}
+    slugs |= {p.name[len("state_"):-len(".plan.arrow")] for p in data_dir.glob("state_*.plan.arrow")}
+    imported = []
+    for slug in sorted(slugs):
+        profile_name = by_slug.get(slug, slug)
+        loaded = read_saved_state(profile_name, data_dir, quarantine=True)
+        if loaded is None:
+            if quarantined_files(profile_name):
+                log.warning("%s não importado: estado ilegível", profile_name)
+            continue
+        files = (state_path(profile_name, data_dir), journal_path(profile_name, data_dir), *arrow_paths(profile_name, data_dir))
+        week = iso_week(date.fromtimestamp(_mtime_ns(files) / 1e9))
+        storage.write(profile_name, *loaded, week=week)
+        imported.append(profile_name)
+    return imported
+
+# --- Backend selecionável ---
+# BODY_ASSISTANT_STORAGE=sqlite liga o histórico em SQLite, =arrow o formato colunar
+# (body_core.columnar); o padrão continua JSON.
+STORAGE_BACKEND = os.environ.get("BODY_ASSISTANT_STORAGE", "json")
+
+_STORAGE = None
+
+def get_storage():
+    global _STORAGE
+    with _SINGLETON_LOCK:
+        if _STORAGE is None:
+            if STORAGE_BACKEND == "sqlite":
+                _STORAGE = SqliteStorage(SQLITE_PATH)
+            elif STORAGE_BACKEND == "arrow":
+                from .columnar import ArrowStorage  # pyarrow só quando pedido
+
+                _STORAGE = ArrowStorage()
+            else:
+                _STORAGE = JsonStorage()
+        return _STORAGE
+
+def save_profile_state(
+    profile_name: str,
+    plan_df: pd.DataFrame,
+    ex_df: pd.DataFrame,
+    weight_kg: float,
+    height_cm: int,
+    activity_factor: float,
+    session=None,
+) -> bool:
+    """
+    Agenda o autosave do perfil. Não escreve nada se o estado é igual ao último salvo.
+    Os DataFrames são tratados como imutáveis (quem edita troca o objeto na session).
+    Com session (ProfileSession), grava só o que a sessão mudou, com merge por célula;
+    sem ela, o estado inteiro substitui o do disco.
+    """
+    from .concurrency import commit_profile_state  # concurrency importa este módulo
+
+    scalars = {
+        "weight_kg": float(weight_kg),
+        "height_cm": int(height_cm),
+        "activity_factor": float(activity_factor),
+    }
+    if session is not None:
+        return session.submit(plan_df, ex_df, scalars)
+    fingerprint = state_fingerprint(plan_df, ex_df, weight_kg, height_cm, activity_factor)
+    return get_autosave_writer().submit(
+        profile_name,
+        fingerprint,
+        partial(commit_profile_state, profile_name, None, {}, plan_df, ex_df, scalars),
+    )
+
+def load_profile_state(profile_name: str, default_weight: float, default_height: int, default_activity: float):
+    writer = get_autosave_writer()
+    writer.flush(profile_name)  # não ler por baixo de uma escrita ainda na fila
+    loaded = get_storage().load(profile_name)
+    if loaded is None:
+        return None
+    plan, ex, scalars = loaded
+    weight_kg = float(scalars.get("weight_kg", default_weight))
+    height_cm = int(scalars.get("height_cm", default_height))
+    activity_factor = float(scalars.get("activity_factor", default_activity))
+
+    writer.mark_clean(profile_name, state_fingerprint(plan, ex, weight_kg, height_cm, activity_factor))
+    return weight_kg, height_cm, activity_factor, plan, ex
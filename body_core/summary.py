@@ -0,0 +1,165 @@
+"""
+Tabelas derivadas: gasto do exercício por linha e totais por dia/semana (kcal e macros).
+"""
+import numpy as np
+import pandas as pd
+
+from .cache import memoized
+from .editing import EditorMerge
+from .activities import activity_catalog_version, get_activity_catalog
+from .macros import daily_macro_totals, macro_shortfalls
+from .plans import DAY_ORDER, MACRO_COLUMNS
+
+
+@memoized("exercise_calc", maxsize=512, ttl_s=3600, depends_on=activity_catalog_version)
+def compute_exercise_calc(ex_full: pd.DataFrame, weight_kg: float) -> pd.DataFrame:
+    """
+    Velocidade, MET e gasto de cada linha de atividade (lookup vetorizado no catálogo)
+    """
+    energy = get_activity_catalog().energy(
+        weight_kg,
+        ex_full["Atividade"].to_numpy(dtype=object),
+        ex_full["Minutos"].to_numpy(dtype=float),
+        ex_full["Distância (km)"].to_numpy(dtype=float),
+        ex_full["Inclinação (%)"].to_numpy(dtype=float),
+        ex_full["Intensidade"].to_numpy(dtype=object),
+        ex_full["MET (relógio)"].to_numpy(dtype=float) if "MET (relógio)" in ex_full else None,
+    )
+    ex_calc = ex_full.copy(deep=False)  # só acrescenta colunas: as de ex_full são as mesmas
+    ex_calc["Vel. média (km/h)"] = np.round(energy["speed"], 1)
+    ex_calc["MET (estim.)"] = np.round(energy["met"], 1)
+    ex_calc["Gasto (kcal)"] = np.rint(energy["kcal"]).astype(int)
+    return ex_calc
+
+class DailyAggregates:
+    """
+    Totais por dia (ingestão e exercício) e da semana, mantidos incrementalmente:
+    uma edição de célula atualiza só o dia dela. Guarda as referências dos frames
+    de onde os totais vieram para saber se ainda estão em sincronia.
+    """
+
+    def __init__(self, plan_df: pd.DataFrame, ex_df: pd.DataFrame, ex_calc: pd.DataFrame, weight_kg: float):
+        self.plan_ref = plan_df
+        self.plan_day = plan_df["Dia"].to_dict()  # rid -> Dia
+        self.intake = {d: int(v) for d, v in plan_df.groupby("Dia", observed=True)["Calorias (kcal)"].sum().items()}
+        self.week_intake = sum(self.intake.values())
+        self.macros = daily_macro_totals(plan_df)  # (dias de DAYS × macros), g
+        self.week_macros = self.macros.sum(axis=0)
+        self._set_exercise(ex_df, ex_calc, weight_kg)
+
+    def _set_exercise(self, ex_df: pd.DataFrame, ex_calc: pd.DataFrame, weight_kg: float):
+        self.ex_ref = ex_df
+        self.weight_kg = float(weight_kg)
+        self.ex_day = ex_calc["Dia"].to_dict()
+        self.ex_kcal = {rid: int(v) for rid, v in ex_calc["Gasto (kcal)"].items()}
+        self.exercise = {}
+        for rid, kcal in self.ex_kcal.items():
+            day = self.ex_day[rid]
+            self.exercise[day] = self.exercise.get(day, 0) + kcal
+        self.week_ex = sum(self.exercise.values())
+
+    def update(
+        self,
+        plan_base: pd.DataFrame,
+        plan_merge: EditorMerge,
+        ex_base: pd.DataFrame,
+        ex_merge: EditorMerge,
+        ex_calc: pd.DataFrame,
+        weight_kg: float,
+    ) -> bool:
+        """
+        Aplica as edições da rerun. False se os frames mudaram por outro caminho
+        (reset, cópia, recarga) e os totais precisam ser reconstruídos.
+        """
+        if plan_base is not self.plan_ref or ex_base is not self.ex_ref:
+            return False
+        return self.update_plan(plan_base, plan_merge) and self.update_exercise(ex_base, ex_merge, ex_calc, weight_kg)
+
+    def update_plan(self, plan_base: pd.DataFrame, plan_merge: EditorMerge) -> bool:
+        """
+        Só as edições do plano (a seção do plano roda sem a de exercícios)
+        """
+        if plan_base is not self.plan_ref:
+            return False
+        for rid, cells in plan_merge.changes.items():
+            day = self.plan_day[rid]
+            if "Calorias (kcal)" in cells:
+                delta = int(cells["Calorias (kcal)"]) - int(plan_merge.previous[rid]["Calorias (kcal)"])
+                self.intake[day] += delta
+                self.week_intake += delta
+            for k, col in enumerate(MACRO_COLUMNS):
+                if col in cells and day in DAY_ORDER:
+                    delta = float(cells[col]) - float(plan_merge.previous[rid][col])
+                    self.macros[DAY_ORDER[day], k] += delta
+                    self.week_macros[k] += delta
+        self.plan_ref = plan_merge.df
+        return True
+
+    def update_exercise(self, ex_base: pd.DataFrame, ex_merge: EditorMerge, ex_calc: pd.DataFrame, weight_kg: float) -> bool:
+        """
+        Só as edições dos exercícios; ex_calc já é o cálculo de ex_merge.df
+        """
+        if ex_base is not self.ex_ref:
+            return False
+        if (
+            float(weight_kg) != self.weight_kg
+            or ex_merge.reshaped
+            or any("Dia" in cells for cells in ex_merge.changes.values())
+        ):
+            # Peso muda o gasto de todas as linhas; linha nova, removida ou trocada de dia
+            # muda o total por dia: refaz a partir do ex_calc (poucas linhas por semana)
+            self._set_exercise(ex_merge.df, ex_calc, weight_kg)
+            return True
+        for rid in ex_merge.changes:
+            kcal = int(ex_calc.at[rid, "Gasto (kcal)"])
+            delta = kcal - self.ex_kcal[rid]
+            self.ex_kcal[rid] = kcal
+            self.exercise[self.ex_day[rid]] += delta
+            self.week_ex += delta
+        self.ex_ref = ex_merge.df
+        return True
+
+    def matches(self, plan_df: pd.DataFrame, ex_df: pd.DataFrame, weight_kg: float) -> bool:
+        """
+        Totais em sincronia com estes frames e este peso
+        """
+        return plan_df is self.plan_ref and ex_df is self.ex_ref and float(weight_kg) == self.weight_kg
+
+    def days(self) -> list:
+        return sorted(self.intake, key=lambda d: DAY_ORDER.get(d, 999))
+
+    def day_macros(self) -> np.ndarray:
+        """
+        Macros (g) dos dias de days(), na mesma ordem
+        """
+        zero = np.zeros(len(MACRO_COLUMNS))
+        return np.array([self.macros[DAY_ORDER[d]] if d in DAY_ORDER else zero for d in self.days()]).reshape(-1, len(MACRO_COLUMNS))
+
+    def summary_frame(self, daily_limit: int) -> pd.DataFrame:
+        days = self.days()
+        intake = np.array([self.intake[d] for d in days], dtype=int)
+        macros = np.round(self.day_macros(), 1)
+        return pd.DataFrame({
+            "Dia": days,
+            "Ingestão (kcal)": intake,
+            "Gasto total exercício (kcal)": np.array([self.exercise.get(d, 0) for d in days], dtype=int),
+            "Limite diário (kcal)": daily_limit,
+            "Diferença (Limite - Ingestão)": daily_limit - intake,
+            **{col: macros[:, k] for k, col in enumerate(MACRO_COLUMNS)},
+            "Proteína (g/kg)": np.round(macros[:, 0] / self.weight_kg, 2),
+        })
+
+    def limit_alerts(self, daily_limit: int):
+        """
+        ([(dia, excesso)], [(dia, falta)]) em relação ao limite diário
+        """
+        over = [(d, self.intake[d] - daily_limit) for d in self.days() if self.intake[d] > daily_limit]
+        under = [(d, daily_limit - self.intake[d]) for d in self.days() if self.intake[d] < daily_limit]
+        return over, under
+
+    def macro_alerts(self, targets: np.ndarray) -> dict:
+        """
+        {coluna: [(dia, falta em g)]} dos macros abaixo da meta diária (ver macro_targets)
+        """
+        days = [d for d in self.days() if d in DAY_ORDER]
+        return macro_shortfalls(self.macros, targets, days)
@@ -0,0 +1,446 @@
+"""
+Importação de corridas exportadas do relógio/app (GPX, TCX, CSV; também .gz).
+
+Os arquivos são lidos em streaming (iterparse/csv, cada ponto descartado logo depois de
+lido) e processados em blocos de CHUNK_POINTS pontos, então a memória não cresce com a
+duração do treino. Para cada segmento entre dois pontos, em NumPy sobre o bloco:
+distância (haversine, ou a distância acumulada do TCX/CSV quando houver), velocidade e
+MET pelas faixas de running_met_batch. Intervalos maiores que MAX_GAP_S (pausa) e
+velocidades fora de (RUN_MIN_SPEED_KMH, MAX_SPEED_KMH) (parado, salto de GPS) não
+contam como tempo em movimento.
+
+Cada arquivo vira um RunSummary (km, minutos em movimento, MET·min e minutos por faixa
+de MET); os resumos são agregados por data e, na tela, por dia da semana ISO escolhida
+na tabela de exercícios, com o MET dos segmentos na coluna MET (relógio).
+
+A data do treino é a do fuso gravado no arquivo (horário com offset, ex. -03:00); arquivo
+em UTC ("Z" ou sem fuso, como GPX/TCX costumam gravar) usa BODY_ASSISTANT_TZ (nome IANA,
+ex. America/Sao_Paulo) ou UTC — nunca o fuso da máquina que importa.
+
+    python -m body_core.tracks pasta_ou_arquivos... [--workers N] [--weight 80] [--out corridas.csv]
+"""
+import csv
+import gzip
+import io
+import logging
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from .exercise import RUN_MET_BANDS, RUN_MIN_SPEED_KMH, RUN_SPEED_EDGES_KMH, kcal_from_met, running_met_batch
+from .plans import DAYS
+
+log = logging.getLogger(__name__)
+
+CHUNK_POINTS = 4096
+MAX_GAP_S = 30.0         # intervalo maior entre pontos = pausa (auto-pause do relógio)
+MAX_SPEED_KMH = 30.0     # acima disso é salto de GPS, não corrida
+EARTH_RADIUS_M = 6371008.8
+TRACK_SUFFIXES = (".gpx", ".tcx", ".csv")
+TRACK_TZ = os.environ.get("BODY_ASSISTANT_TZ") or None  # fuso dos arquivos em UTC (padrão: UTC)
+
+# Cabeçalhos aceitos no CSV (minúsculos) -> campo do ponto
+CSV_ALIASES = {
+    "time": ("time", "timestamp", "datetime", "date_time", "data_hora"),
+    "lat": ("lat", "latitude"),
+    "lon": ("lon", "lng", "long", "longitude"),
+    "dist": ("distance", "distance_m", "dist_m", "distancia", "distancia_m"),
+}
+
+_TZ_SUFFIX = re.compile(r"[+-]\d\d:?\d\d$")
+
+
+@dataclass(frozen=True)
+class RunSummary:
+    source: str
+    start: float         # época (s) do primeiro ponto
+    points: int
+    distance_km: float
+    moving_min: float
+    met_min: float       # Σ MET × minutos dos segmentos em movimento
+    band_min: tuple      # minutos em movimento em cada faixa de RUN_MET_BANDS
+    utc_offset_s: float = None  # offset gravado no horário do arquivo; None = arquivo em UTC
+
+    @property
+    def date(self) -> date:
+        if self.utc_offset_s is not None:
+            tz = timezone(timedelta(seconds=self.utc_offset_s))
+        else:
+            tz = ZoneInfo(TRACK_TZ) if TRACK_TZ else timezone.utc
+        return datetime.fromtimestamp(self.start, tz).date()
+
+    @property
+    def day(self) -> str:
+        return DAYS[self.date.weekday()]
+
+    @property
+    def iso_week(self) -> str:
+        year, week, _ = self.date.isocalendar()
+        return f"{year}-W{week:02d}"
+
+    @property
+    def avg_speed_kmh(self) -> float:
+        return self.distance_km / (self.moving_min / 60.0) if self.moving_min else 0.0
+
+    @property
+    def avg_met(self) -> float:
+        return self.met_min / self.moving_min if self.moving_min else 0.0
+
+    def kcal(self, weight_kg: float) -> float:
+        """
+        Gasto somando os segmentos (cada um com o MET da sua velocidade)
+        """
+        return kcal_from_met(weight_kg, 1.0, self.met_min)
+
+# ============================================================
+# Leitura em streaming: pontos (tempo, lat, lon, distância acumulada em m)
+# ============================================================
+def _local(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+def _float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return float("nan")
+
+def _iter_xml_points(source, point_tag: str, read_point):
+    """
+    iterparse com a pilha de elementos abertos: cada ponto é lido e tirado do pai,
+    então a árvore em memória nunca passa de um ponto
+    """
+    stack = []
+    for event, el in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(el)
+            continue
+        stack.pop()
+        if _local(el.tag) == point_tag:
+            point = read_point(el)
+            if point is not None:
+                yield point
+            if stack:
+                stack[-1].remove(el)
+
+def _gpx_point(el):
+    when = next((c.text for c in el if _local(c.tag) == "time"), None)
+    if not when:
+        return None
+    return when.strip(), _float(el.get("lat")), _float(el.get("lon")), float("nan")
+
+def _tcx_point(el):
+    fields = {_local(c.tag): c.text for c in el.iter()}
+    when = fields.get("Time")
+    if not when:
+        return None
+    return (when.strip(), _float(fields.get("LatitudeDegrees")), _float(fields.get("LongitudeDegrees")),
+            _float(fields.get("DistanceMeters")))
+
+def _csv_float(row: list, i):
+    # Aceita vírgula decimal (planilhas em pt-BR)
+    return _float(row[i].replace(",", ".")) if i is not None and i < len(row) else float("nan")
+
+def _iter_csv_points(text_stream):
+    header_line = text_stream.readline()
+    if not header_line:
+        return
+    delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+    header = [h.strip().lower() for h in next(csv.reader([header_line], delimiter=delimiter))]
+    cols = {field: next((header.index(a) for a in aliases if a in header), None) for field, aliases in CSV_ALIASES.items()}
+    if cols["time"] is None:
+        raise ValueError(f"CSV sem coluna de tempo (aceitas: {', '.join(CSV_ALIASES['time'])})")
+    t_col, lat_col, lon_col, dist_col = cols["time"], cols["lat"], cols["lon"], cols["dist"]
+    for row in csv.reader(text_stream, delimiter=delimiter):
+        if len(row) <= t_col or not row[t_col].strip():
+            continue
+        yield row[t_col].strip(), _csv_float(row, lat_col), _csv_float(row, lon_col), _csv_float(row, dist_col)
+
+def iter_track_points(source, name: str):
+    """
+    Pontos do arquivo na ordem gravada. source: caminho ou arquivo binário aberto;
+    o formato vem da extensão de name (.gpx, .tcx, .csv, com ou sem .gz).
+    """
+    suffixes = [s.lower() for s in Path(name).suffixes]
+    owned = isinstance(source, (str, Path))
+    raw = open(source, "rb") if owned else source
+    try:
+        stream = raw
+        if suffixes and suffixes[-1] == ".gz":
+            stream = gzip.GzipFile(fileobj=raw)
+            suffixes = suffixes[:-1]
+        kind = suffixes[-1] if suffixes else ""
+        if kind == ".gpx":
+            yield from _iter_xml_points(stream, "trkpt", _gpx_point)
+        elif kind == ".tcx":
+            yield from _iter_xml_points(stream, "Trackpoint", _tcx_point)
+        elif kind == ".csv":
+            yield from _iter_csv_points(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        else:
+            raise ValueError(f"Formato não suportado: {name}")
+    finally:
+        if owned:
+            raw.close()
+
+# ============================================================
+# Segmentos (vetorizado por bloco)
+# ============================================================
+def _iso_epoch(text: str) -> float:
+    when = datetime.fromisoformat(text)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)  # GPX/TCX gravam em UTC
+    return when.timestamp()
+
+def _to_epoch(values: list) -> np.ndarray:
+    """
+    Tempos do bloco -> segundos desde a época. Aceita número (época) ou ISO 8601.
+    """
+    try:
+        return np.asarray(values, dtype=float)
+    except ValueError:
+        pass
+    if not _TZ_SUFFIX.search(values[0]):
+        try:
+            # Caminho rápido: o parser do NumPy converte o bloco de uma vez (UTC, sem offset)
+            stamps = np.array([v[:-1] if v.endswith("Z") else v for v in values], dtype="datetime64[ms]")
+            return stamps.astype(np.int64) / 1000.0
+        except ValueError:
+            pass
+    return np.array([_iso_epoch(v) for v in values])
+
+def _utc_offset_s(text: str):
+    """
+    Offset (s) gravado num horário ISO 8601 (+hh:mm/-hh:mm); None em UTC ("Z", sem fuso ou época)
+    """
+    if not isinstance(text, str) or not _TZ_SUFFIX.search(text):
+        return None
+    try:
+        return datetime.fromisoformat(text).utcoffset().total_seconds()
+    except (ValueError, AttributeError):
+        return None
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+class _RunAccumulator:
+    """
+    Soma os segmentos bloco a bloco; guarda só o último ponto do bloco anterior
+    """
+
+    def __init__(self):
+        self.prev = None
+        self.start = None
+        self.utc_offset_s = None
+        self.points = 0
+        self.distance_m = 0.0
+        self.moving_s = 0.0
+        self.met_min = 0.0
+        self.band_min = np.zeros(len(RUN_MET_BANDS))
+
+    def add(self, chunk: list):
+        t, lat, lon, dist = zip(*chunk)
+        if self.start is None:
+            self.utc_offset_s = _utc_offset_s(t[0])
+        t = _to_epoch(list(t))
+        lat, lon, dist = (np.asarray(c, dtype=float) for c in (lat, lon, dist))
+        self.points += len(t)
+        if self.start is None:
+            self.start = float(t[0])
+        if self.prev is not None:
+            t, lat, lon, dist = (np.concatenate(([p], a)) for p, a in zip(self.prev, (t, lat, lon, dist)))
+        self.prev = (t[-1], lat[-1], lon[-1], dist[-1])
+        if len(t) < 2:
+            return
+
+        dt = np.diff(t)
+        step = np.diff(dist)
+        seg_m = np.where(np.isnan(step), _haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:]), step)
+        moving = (dt > 0) & (dt <= MAX_GAP_S) & ~np.isnan(seg_m)
+        speed = np.where(moving, np.nan_to_num(seg_m) / np.where(moving, dt, 1.0) * 3.6, 0.0)
+        moving &= (speed > RUN_MIN_SPEED_KMH) & (speed <= MAX_SPEED_KMH)
+
+        minutes = dt[moving] / 60.0
+        met = running_met_batch(speed[moving])
+        self.distance_m += float(seg_m[moving].sum())
+        self.moving_s += float(dt[moving].sum())
+        self.met_min += float(met @ minutes)
+        bands = np.searchsorted(RUN_SPEED_EDGES_KMH, speed[moving], side="right")
+        self.band_min += np.bincount(bands, weights=minutes, minlength=len(RUN_MET_BANDS))
+
+    def summary(self, source: str):
+        if self.points < 2:
+            return None
+        return RunSummary(
+            source=source,
+            start=self.start,
+            points=self.points,
+            distance_km=self.distance_m / 1000.0,
+            moving_min=self.moving_s / 60.0,
+            met_min=self.met_min,
+            band_min=tuple(float(m) for m in self.band_min),
+            utc_offset_s=self.utc_offset_s,
+        )
+
+def read_run(source, name: str = None):
+    """
+    Resumo de um arquivo de treino (caminho ou arquivo aberto + name), ou None se tem
+    menos de dois pontos com horário
+    """
+    name = name or str(source)
+    acc = _RunAccumulator()
+    chunk = []
+    for point in iter_track_points(source, name):
+        chunk.append(point)
+        if len(chunk) == CHUNK_POINTS:
+            acc.add(chunk)
+            chunk = []
+    if chunk:
+        acc.add(chunk)
+    return acc.summary(name)
+
+# ============================================================
+# Pastas (pool de processos) e agregação
+# ============================================================
+def iter_track_files(paths):
+    """
+    Arquivos de treino de paths (arquivos ou pastas, recursivo), em ordem de nome
+    """
+    for p in map(Path, paths):
+        if p.is_dir():
+            yield from sorted(
+                f for f in p.rglob("*")
+                if f.is_file() and any(s in TRACK_SUFFIXES for s in (x.lower() for x in f.suffixes))
+            )
+        else:
+            yield p
+
+def _read_run_task(path: str):
+    try:
+        return read_run(path)
+    except Exception:
+        # Um arquivo ruim não derruba a importação da pasta
+        log.exception("Treino ilegível: %s", path)
+        return None
+
+def import_runs(paths, workers: int = None) -> list:
+    """
+    Resumos de todos os treinos em paths, em ordem de início. Com mais de um arquivo,
+    lê em paralelo num pool de `workers` processos (padrão: núcleos da máquina).
+    """
+    files = [str(f) for f in iter_track_files(paths)]
+    workers = min(workers or os.cpu_count() or 1, len(files) or 1)
+    if workers == 1:
+        runs = [_read_run_task(f) for f in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(_read_run_task, files, chunksize=max(1, len(files) // (workers * 4))))
+    return sorted((r for r in runs if r is not None), key=lambda r: r.start)
+
+def runs_by_date(runs: list, weight_kg: float = None):
+    """
+    Uma linha por data com treino: km, minutos em movimento, MET médio e (com peso) kcal
+    somando os segmentos
+    """
+    import pandas as pd
+
+    rows = {}
+    for r in runs:
+        row = rows.setdefault(r.date, {
+            "Data": r.date, "Semana": r.iso_week, "Dia": r.day, "Treinos": 0,
+            "Corrida (km)": 0.0, "Corrida (min)": 0.0, "MET·min": 0.0,
+        })
+        row["Treinos"] += 1
+        row["Corrida (km)"] += r.distance_km
+        row["Corrida (min)"] += r.moving_min
+        row["MET·min"] += r.met_min
+    frame = pd.DataFrame(sorted(rows.values(), key=lambda row: row["Data"]),
+                         columns=["Data", "Semana", "Dia", "Treinos", "Corrida (km)", "Corrida (min)", "MET·min"])
+    frame["MET médio"] = (frame["MET·min"] / frame["Corrida (min)"].where(frame["Corrida (min)"] > 0)).fillna(0.0)
+    if weight_kg is not None:
+        frame["Gasto por segmento (kcal)"] = np.rint(frame["MET·min"] * 3.5 * float(weight_kg) / 200.0).astype(int)
+    return frame.round({"Corrida (km)": 2, "Corrida (min)": 1, "MET·min": 1, "MET médio": 2})
+
+def week_run_rows(ex_df, runs: list, iso_week: str, add: bool = False) -> dict:
+    """
+    Estado de editor {edited_rows, added_rows, deleted_rows} (posições em ex_df) que leva
+    os treinos da semana para a tabela de exercícios — para merge_editor_rows. Por dia com
+    treino: uma linha de Corrida com km, minutos em movimento e o MET·min dos segmentos
+    (MET (relógio) = MET·min / minutos da linha, então o gasto da tabela é o dos segmentos),
+    na primeira Corrida do dia (as demais saem: deleted_rows) ou numa linha nova; add soma
+    ao que já está na primeira, com o MET dela (o medido ou o do catálogo).
+    """
+    totals = {}
+    for r in runs:
+        if r.iso_week == iso_week:
+            km, minutes, met_min = totals.get(r.day, (0.0, 0.0, 0.0))
+            totals[r.day] = (km + r.distance_km, minutes + r.moving_min, met_min + r.met_min)
+    is_run = (ex_df["Atividade"] == "Corrida").to_numpy()
+    days = ex_df["Dia"].to_numpy(dtype=object)
+    if add and is_run.any():
+        from .activities import get_activity_catalog
+
+        current_met = get_activity_catalog().energy(
+            0.0,
+            ex_df["Atividade"].to_numpy(dtype=object),
+            ex_df["Minutos"].to_numpy(dtype=float),
+            ex_df["Distância (km)"].to_numpy(dtype=float),
+            ex_df["Inclinação (%)"].to_numpy(dtype=float),
+            ex_df["Intensidade"].to_numpy(dtype=object),
+            ex_df["MET (relógio)"].to_numpy(dtype=float) if "MET (relógio)" in ex_df else None,
+        )["met"]
+    edited, added, deleted = {}, [], []
+    for day, (km, minutes, met_min) in totals.items():
+        positions = np.flatnonzero(is_run & (days == day))
+        if add and len(positions):
+            first = int(positions[0])
+            old_min = max(0.0, float(np.nan_to_num(ex_df["Minutos"].iat[first])))
+            km += float(np.nan_to_num(ex_df["Distância (km)"].iat[first]))
+            minutes += old_min
+            met_min += float(current_met[first]) * old_min
+        row_min = round(minutes, 1)
+        row = {"Minutos": row_min, "Distância (km)": round(km, 2), "MET (relógio)": met_min / row_min if row_min else 0.0}
+        if not len(positions):
+            added.append({"Dia": day, "Atividade": "Corrida", **row})
+            continue
+        if not add:
+            deleted.extend(int(p) for p in positions[1:])
+        edited[int(positions[0])] = row
+    return {"edited_rows": edited, "added_rows": added, "deleted_rows": deleted}
+
+def main(argv=None) -> int:
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m body_core.tracks", description="Importa corridas (GPX/TCX/CSV)")
+    parser.add_argument("paths", nargs="+", type=Path, help="arquivos ou pastas")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: núcleos da máquina)")
+    parser.add_argument("--weight", type=float, default=None, help="peso (kg) para a coluna de kcal")
+    parser.add_argument("--out", default=None, help="grava o resumo por data em CSV")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    t0 = time.perf_counter()
+    runs = import_runs(args.paths, workers=args.workers)
+    elapsed = time.perf_counter() - t0
+    frame = runs_by_date(runs, args.weight)
+    if args.out:
+        frame.to_csv(args.out, index=False)
+    else:
+        print(frame.to_string(index=False))
+    points = sum(r.points for r in runs)
+    log.info("%d treinos, %d pontos em %.2f s (%.0f mil pontos/s)", len(runs), points, elapsed,
+             points / elapsed / 1000 if elapsed else 0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,45 @@
 # app.py
-import json
-from pathlib import Path
-from dataclasses import dataclass
+import time
+from datetime import date, timedelta
+from functools import wraps
 
+import numpy as np
 import pandas as pd
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from body_core import instrument
+from body_core.cache import memo_stats
+from body_core.concurrency import ProfileSession
+from body_core.activities import INTENSITY_LEVELS, get_activity_catalog
+from body_core.analytics import PERIODS, downsample, load_history, over_limit_styles, page_slice
+from body_core.editing import (
+    EX_EDITABLE, PLAN_EDITABLE, diff_edited_rows, merge_editor_delta, merge_editor_rows, rows_view,
+)
+from body_core.foods import get_food_catalog
+from body_core.macros import follow_kcal, macro_targets
+from body_core.mealgen import DEFAULT_TOLERANCE_KCAL, MEAL_SHARES, generate_week_plan
+from body_core.metabolism import ACTIVITY_LEVELS, KCAL_PER_KG, daily_energy_budget
+from body_core.paths import DATA_DIR
+from body_core.plans import DAY_ORDER, DAYS, EXERCISE_ROW_DEFAULTS, MACRO_COLUMNS, MEALS, init_exercise_df, init_week_plan
+from body_core.profiles import load_profile_registry
+from body_core.simulation import scenario_sweep, sweep_heatmap, weight_projection_frame
+from body_core.storage import STORAGE_BACKEND, get_storage, iso_week, quarantined_files, save_profile_state
+from body_core.summary import DailyAggregates, compute_exercise_calc
+from body_core.tracks import read_run, runs_by_date, week_run_rows
 
 # ============================================================
 # Config
 # ============================================================
+# Copy-on-write do pandas: fatias e frames derivados (reset_index, drop, iloc) não copiam
+# até alguém escrever neles, e os frames do estado, compartilhados entre sessões
+# (SHARED_STATES), nunca são alterados no lugar
+pd.set_option("mode.copy_on_write", True)
+
+# cProfile de uma rerun só, pedido pelo painel de depuração na rerun anterior
+rerun_profiler = instrument.start_profile() if st.session_state.pop("profile_next_rerun", False) else None
+instrument.begin_rerun()
+
 st.set_page_config(page_title="Calorie tracker - Vitor & Thayná", layout="wide")
 
 # Tema claro via CSS (reforço; recomendável também usar .streamlit/config.toml com base="light")
@@ -24,293 +55,43 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# ============================================================
-# Constantes
-# ============================================================
-DAYS = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
-DAY_ORDER = {d: i for i, d in enumerate(DAYS)}
-MEALS = ["Whey pós-treino", "Almoço", "Lanche", "Jantar", "Ceia"]
-
-DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 
 # ============================================================
-# Perfis
+# Edição (delta do data_editor guardado na session)
 # ============================================================
-@dataclass
-class Profile:
-    name: str
-    age: int
-    weight_kg: float
-    sex: str  # "M" / "F"
-    daily_limit_kcal: int
-    default_height_cm: int
-    default_activity_factor: float
-
-PROFILES = {
-    "Vitor": Profile(
-        name="Vitor",
-        age=35,
-        weight_kg=97.0,
-        sex="M",
-        daily_limit_kcal=1500,
-        default_height_cm=180,
-        default_activity_factor=1.55,  # moderado
-    ),
-    "Thayná": Profile(
-        name="Thayná",
-        age=32,
-        weight_kg=63.0,
-        sex="F",
-        daily_limit_kcal=1300,
-        default_height_cm=169,
-        default_activity_factor=1.55,  # moderado
-    ),
-}
-
-# ============================================================
-# Cálculos (exercício)
-# ============================================================
-def kcal_from_met(weight_kg: float, minutes: float, met: float) -> float:
-    minutes = max(0.0, float(minutes))
-    met = max(0.0, float(met))
-    return met * 3.5 * float(weight_kg) / 200.0 * minutes
-
-def running_met_from_speed_kmh(speed_kmh: float) -> float:
-    v = max(0.0, float(speed_kmh))
-    if v <= 0.1:
-        return 0.0
-    if v < 5.0:
-        return 3.5   # caminhada
-    if v < 6.5:
-        return 5.0   # caminhada rápida / trote
-    if v < 8.0:
-        return 7.0   # trote / corrida leve
-    if v < 10.0:
-        return 9.8   # corrida moderada
-    if v < 12.0:
-        return 11.5  # forte
-    return 12.8      # muito forte
-
-def calc_running_kcal(weight_kg: float, distance_km: float, minutes: float):
-    minutes = max(0.0, float(minutes))
-    distance_km = max(0.0, float(distance_km))
-    if minutes <= 0.0 or distance_km <= 0.0:
-        return 0.0, 0.0, 0.0
-    hours = minutes / 60.0
-    speed = distance_km / hours
-    met = running_met_from_speed_kmh(speed)
-    kcal = kcal_from_met(weight_kg, minutes, met)
-    return kcal, speed, met
-
-# ============================================================
-# Cálculos (metabolismo)
-# ============================================================
-def bmr_mifflin_st_jeor(sex: str, weight_kg: float, height_cm: float, age: int) -> float:
+def editor_edited_rows(editor_key: str, view_ui: pd.DataFrame, edited_ui: pd.DataFrame, editable: dict) -> dict:
     """
-    BMR (kcal/dia) - Mifflin-St Jeor
+    Células editadas no data_editor: usa o delta do widget (edited_rows) quando disponível,
+    senão faz o diff contra o frame exibido
     """
-    w = float(weight_kg)
-    h = float(height_cm)
-    a = float(age)
-    if str(sex).upper() == "M":
-        return 10*w + 6.25*h - 5*a + 5
-    return 10*w + 6.25*h - 5*a - 161
-
-def tdee_kcal_day(bmr: float, activity_factor: float) -> float:
+    state = st.session_state.get(editor_key)
+    if isinstance(state, dict) and "edited_rows" in state:
+        return state["edited_rows"]
+    return diff_edited_rows(view_ui, edited_ui, editable)
+
+def by_day(df: pd.DataFrame) -> pd.DataFrame:
     """
-    TDEE sem exercício estruturado (kcal/dia)
+    Linhas em ordem de dia da semana (dentro do dia, na ordem do rid)
     """
-    return float(bmr) * float(activity_factor)
-
-# ============================================================
-# Plano alimentar sugerido (fechando por dia no limite)
-# ============================================================
-def meal_plan_template(profile_name: str) -> dict:
-    if profile_name == "Vitor":
-        plan = {
-            "Seg": {
-                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
-                "Almoço": ("Frango (180g) + salada (alface/rúcula/tomate) + abobrinha + arroz parboilizado (1/2 xíc)", 600),
-                "Lanche": ("Banana", 150),
-                "Jantar": ("Omelete (3 ovos) + salada grande + berinjela", 400),
-                "Ceia": ("Café com leite (sem açúcar)", 100),
-            },
-            "Ter": {
-                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
-                "Almoço": ("Frango (180g) + abóbora assada + salada + batata pequena", 600),
-                "Lanche": ("Mamão (300g)", 150),
-                "Jantar": ("Frango (150g) + salada + abobrinha", 400),
-                "Ceia": ("1 fruta (tangerina/pera pequena)", 100),
-            },
-            "Qua": {  # carne vermelha
-                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
-                "Almoço": ("Carne vermelha magra (150g) + salada + berinjela + arroz (1/3–1/2 xíc)", 650),
-                "Lanche": ("Uva (200g)", 150),
-                "Jantar": ("Creme de abóbora + frango desfiado (120g) + salada", 350),
-                "Ceia": ("Café com leite (sem açúcar)", 100),
-            },
-            "Qui": {
-                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
-                "Almoço": ("Frango (180g) + salada + abobrinha + batata média", 600),
-                "Lanche": ("Morango (250g)", 120),
-                "Jantar": ("Atum (1 lata) + 2 ovos + salada", 430),
-                "Ceia": ("Café com leite (sem açúcar)", 100),
-            },
-            "Sex": {  # carne vermelha
-                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
-                "Almoço": ("Frango (180g) + salada + abóbora + arroz (1/2 xíc)", 600),
-                "Lanche": ("Goiaba", 150),
-                "Jantar": ("Carne vermelha magra (130g) + salada + abobrinha", 400),
-                "Ceia": ("Café com leite (sem açúcar)", 100),
-            },
-            "Sáb": {  # refeição livre no almoço
-                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
-                "Almoço": ("REFEIÇÃO LIVRE (almoço)", 700),
-                "Lanche": ("Fruta leve (morangos ou tangerina)", 100),
-                "Jantar": ("Salada grande + frango (150g) (bem limpo)", 350),
-                "Ceia": ("Café com leite (sem açúcar)", 100),
-            },
-            "Dom": {
-                "Whey pós-treino": ("Whey + leite (250ml) + café (sem açúcar)", 250),
-                "Almoço": ("Frango (180g) + salada + legumes + arroz (1/2 xíc)", 600),
-                "Lanche": ("Pera", 150),
-                "Jantar": ("Omelete (3 ovos) + salada + abobrinha", 400),
-                "Ceia": ("Café com leite (sem açúcar)", 100),
-            },
-        }
-    else:
-        plan = {
-            "Seg": {
-                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
-                "Almoço": ("Frango (120g) + salada (alface/rúcula/tomate) + abobrinha + arroz (1/3–1/2 xíc)", 520),
-                "Lanche": ("Banana pequena", 120),
-                "Jantar": ("Omelete (2 ovos) + salada grande + berinjela", 380),
-                "Ceia": ("Café com leite (sem açúcar)", 80),
-            },
-            "Ter": {
-                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
-                "Almoço": ("Frango (120g) + abóbora assada + salada + batata pequena", 520),
-                "Lanche": ("Mamão (250–300g)", 130),
-                "Jantar": ("Frango (100g) + salada + abobrinha", 370),
-                "Ceia": ("Café com leite (sem açúcar)", 80),
-            },
-            "Qua": {  # carne vermelha
-                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
-                "Almoço": ("Carne vermelha magra (100g) + salada + berinjela + arroz (1/3 xíc)", 560),
-                "Lanche": ("Uva (150g)", 110),
-                "Jantar": ("Creme de abóbora + frango desfiado (80g) + salada", 350),
-                "Ceia": ("Café com leite (sem açúcar)", 80),
-            },
-            "Qui": {
-                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
-                "Almoço": ("Frango (120g) + salada + abobrinha + batata pequena", 520),
-                "Lanche": ("Morango (200g)", 100),
-                "Jantar": ("Atum (1 lata) OU frango (100g) + salada", 400),
-                "Ceia": ("Café com leite (sem açúcar)", 80),
-            },
-            "Sex": {  # carne vermelha
-                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
-                "Almoço": ("Frango (120g) + salada + abóbora + arroz (1/3–1/2 xíc)", 520),
-                "Lanche": ("Goiaba", 120),
-                "Jantar": ("Carne vermelha magra (90g) + salada + abobrinha", 380),
-                "Ceia": ("Café com leite (sem açúcar)", 80),
-            },
-            "Sáb": {  # refeição livre no almoço
-                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
-                "Almoço": ("REFEIÇÃO LIVRE (almoço)", 600),
-                "Lanche": ("Fruta leve", 100),
-                "Jantar": ("Salada grande + frango (100g)", 320),
-                "Ceia": ("Café com leite (sem açúcar)", 80),
-            },
-            "Dom": {
-                "Whey pós-treino": ("Whey + leite (200ml) + café (sem açúcar)", 200),
-                "Almoço": ("Frango (120g) + salada + legumes + arroz (1/3–1/2 xíc)", 520),
-                "Lanche": ("Pera ou tangerina", 120),
-                "Jantar": ("Omelete (2 ovos) + salada + abobrinha", 380),
-                "Ceia": ("Café com leite (sem açúcar)", 80),
-            },
-        }
-
-    tpl = {}
-    for d in DAYS:
-        for m in MEALS:
-            desc, kcal = plan[d][m]
-            tpl[(d, m)] = (desc, int(kcal))
-    return tpl
-
-def init_week_plan(profile_name: str) -> pd.DataFrame:
-    tpl = meal_plan_template(profile_name)
-    rows = []
-    rid = 1
-    for d in DAYS:
-        for m in MEALS:
-            desc, kcal = tpl.get((d, m), ("", 0))
-            rows.append({"rid": rid, "Dia": d, "Refeição": m, "Descrição": desc, "Calorias (kcal)": int(kcal)})
-            rid += 1
-    return pd.DataFrame(rows).set_index("rid")
-
-def init_exercise_df() -> pd.DataFrame:
-    rows = []
-    rid = 1
-    for d in DAYS:
-        rows.append({"rid": rid, "Dia": d, "Corrida (km)": 0.0, "Corrida (min)": 0.0, "Musculação (min)": 0.0})
-        rid += 1
-    return pd.DataFrame(rows).set_index("rid")
-
-# ============================================================
-# Persistência (JSON por perfil)
-# ============================================================
-def state_path(profile_name: str) -> Path:
-    safe = (
-        profile_name.lower()
-        .replace("ã", "a").replace("á", "a").replace("â", "a")
-        .replace(" ", "_")
-    )
-    return DATA_DIR / f"state_{safe}.json"
-
-def save_profile_state(
-    profile_name: str,
-    plan_df: pd.DataFrame,
-    ex_df: pd.DataFrame,
-    weight_kg: float,
-    height_cm: int,
-    activity_factor: float,
-):
-    payload = {
-        "weight_kg": float(weight_kg),
-        "height_cm": int(height_cm),
-        "activity_factor": float(activity_factor),
-        "plan": plan_df.reset_index().to_dict(orient="records"),
-        "exercise": ex_df.reset_index().to_dict(orient="records"),
-    }
-    state_path(profile_name).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-
-def load_profile_state(profile_name: str, default_weight: float, default_height: int, default_activity: float):
-    p = state_path(profile_name)
-    if not p.exists():
-        return None
-    try:
-        payload = json.loads(p.read_text(encoding="utf-8"))
-        weight_kg = float(payload.get("weight_kg", default_weight))
-        height_cm = int(payload.get("height_cm", default_height))
-        activity_factor = float(payload.get("activity_factor", default_activity))
-
-        plan = pd.DataFrame(payload.get("plan", []))
-        ex = pd.DataFrame(payload.get("exercise", []))
+    order = df["Dia"].map(DAY_ORDER).to_numpy(dtype=float)
+    if (np.diff(order) >= 0).all():
+        return df  # já em ordem: o próprio frame, sem cópia
+    return df.iloc[np.argsort(order, kind="stable")]
 
-        if not plan.empty and "rid" in plan.columns:
-            plan = plan.set_index("rid")
-        if not ex.empty and "rid" in ex.columns:
-            ex = ex.set_index("rid")
-
-        return weight_kg, height_cm, activity_factor, plan, ex
-    except Exception:
-        return None
+def editor_state(editor_key: str, view_ui: pd.DataFrame, edited_ui: pd.DataFrame, editable: dict) -> dict:
+    """
+    Estado de um data_editor com num_rows="dynamic" (edited_rows, added_rows, deleted_rows)
+    """
+    state = st.session_state.get(editor_key)
+    if isinstance(state, dict) and "edited_rows" in state:
+        return state
+    return {"edited_rows": diff_edited_rows(view_ui, edited_ui, editable), "added_rows": [], "deleted_rows": []}
 
 # ============================================================
 # Estado (session)
 # ============================================================
+instrument.section("estado")
 if "plans" not in st.session_state:
     st.session_state.plans = {}
 if "exercise" not in st.session_state:
@@ -322,16 +103,111 @@ if "height_cm" not in st.session_state:
 if "activity_factor" not in st.session_state:
     st.session_state.activity_factor = {}
 
-# Inicializa perfis
-for pname, prof in PROFILES.items():
-    if pname not in st.session_state.plans:
-        loaded = load_profile_state(pname, prof.weight_kg, prof.default_height_cm, prof.default_activity_factor)
-        if loaded is None:
-            st.session_state.weight[pname] = prof.weight_kg
-            st.session_state.height_cm[pname] = prof.default_height_cm
-            st.session_state.activity_factor[pname] = prof.default_activity_factor
-            st.session_state.plans[pname] = init_week_plan(pname)
-            st.session_state.exercise[pname] = init_exercise_df()
+if "sync" not in st.session_state:
+    st.session_state.sync = {}  # perfil -> ProfileSession (base em disco para o merge entre sessões)
+if "sync_conflicts" not in st.session_state:
+    st.session_state.sync_conflicts = {}
+
+if "profile_last_used" not in st.session_state:
+    st.session_state.profile_last_used = {}
+if "daily_aggs" not in st.session_state:
+    st.session_state.daily_aggs = {}
+if "section_inputs" not in st.session_state:
+    st.session_state.section_inputs = {}  # seção -> estado de entrada com que foi desenhada
+
+PROFILES = load_profile_registry()
+
+# Perfis fora de uso saem da sessão depois de PROFILE_IDLE_EVICT_S (o estado já está salvo)
+PROFILE_IDLE_EVICT_S = 15 * 60
+
+def ensure_profile_loaded(pname: str):
+    """
+    Carrega o perfil na sessão no primeiro acesso (do disco ou do template)
+    """
+    st.session_state.profile_last_used[pname] = time.monotonic()
+    if pname in st.session_state.plans:
+        return
+    prof = PROFILES[pname]
+    sync = st.session_state.sync[pname] = ProfileSession(pname)
+    loaded = sync.open()
+    if loaded is None:
+        st.session_state.weight[pname] = prof.weight_kg
+        st.session_state.height_cm[pname] = prof.default_height_cm
+        st.session_state.activity_factor[pname] = prof.default_activity_factor
+        st.session_state.plans[pname] = init_week_plan(pname)
+        st.session_state.exercise[pname] = init_exercise_df()
+        save_profile_state(
+            pname,
+            st.session_state.plans[pname],
+            st.session_state.exercise[pname],
+            st.session_state.weight[pname],
+            st.session_state.height_cm[pname],
+            st.session_state.activity_factor[pname],
+            session=sync,
+        )
+    else:
+        plan_df, ex_df, scalars = loaded
+        if plan_df is None or plan_df.empty:
+            plan_df = init_week_plan(pname)
+        if ex_df is None or ex_df.empty:
+            ex_df = init_exercise_df()
+        st.session_state.weight[pname] = float(scalars.get("weight_kg", prof.weight_kg))
+        st.session_state.height_cm[pname] = int(scalars.get("height_cm", prof.default_height_cm))
+        st.session_state.activity_factor[pname] = float(scalars.get("activity_factor", prof.default_activity_factor))
+        st.session_state.plans[pname] = plan_df
+        st.session_state.exercise[pname] = ex_df
+
+def pull_profile_changes(pname: str):
+    """
+    Traz para a sessão o que outras sessões gravaram no perfil. None se nada mudou;
+    senão a lista de conflitos (células mudadas aqui e lá)
+    """
+    pulled = st.session_state.sync[pname].pull(
+        st.session_state.plans[pname],
+        st.session_state.exercise[pname],
+        {
+            "weight_kg": st.session_state.weight[pname],
+            "height_cm": st.session_state.height_cm[pname],
+            "activity_factor": st.session_state.activity_factor[pname],
+        },
+    )
+    if pulled is None:
+        return None
+    plan_df, ex_df, scalars, conflicts = pulled
+    swap = {id(st.session_state.plans[pname]): plan_df, id(st.session_state.exercise[pname]): ex_df}
+    st.session_state.plans[pname] = plan_df
+    st.session_state.exercise[pname] = ex_df
+    if conflicts is None:
+        # Mesmo conteúdo, agora com os frames compartilhados: as seções desenhadas e os
+        # totais por dia continuam valendo, só trocam de referência (nada a redesenhar)
+        drawn = st.session_state.section_inputs
+        for name, inputs in drawn.items():
+            drawn[name] = tuple(swap.get(id(v), v) for v in inputs)
+        daily_agg = st.session_state.daily_aggs.get(pname)
+        if daily_agg is not None:
+            daily_agg.plan_ref = swap.get(id(daily_agg.plan_ref), daily_agg.plan_ref)
+            daily_agg.ex_ref = swap.get(id(daily_agg.ex_ref), daily_agg.ex_ref)
+        return None
+    for store, key, widget in (
+        (st.session_state.weight, "weight_kg", f"weight_{pname}"),
+        (st.session_state.height_cm, "height_cm", f"height_{pname}"),
+        (st.session_state.activity_factor, "activity_factor", f"activity_{pname}"),
+    ):
+        if store[pname] != scalars[key]:
+            store[pname] = scalars[key]
+            # Widget com key guarda o valor antigo: sem o estado dele, volta a usar value/index
+            st.session_state.pop(widget, None)
+    return conflicts
+
+def evict_idle_profiles(keep: set):
+    """
+    Tira da sessão os perfis não usados há PROFILE_IDLE_EVICT_S (ou removidos do cadastro)
+    """
+    now = time.monotonic()
+    for pname, last_used in list(st.session_state.profile_last_used.items()):
+        if pname in keep or (pname in PROFILES and now - last_used < PROFILE_IDLE_EVICT_S):
+            continue
+        if pname in st.session_state.plans:
             save_profile_state(
                 pname,
                 st.session_state.plans[pname],
@@ -339,291 +215,740 @@ for pname, prof in PROFILES.items():
                 st.session_state.weight[pname],
                 st.session_state.height_cm[pname],
                 st.session_state.activity_factor[pname],
+                session=st.session_state.sync[pname],
             )
-        else:
-            weight_kg, height_cm, activity_factor, plan_df, ex_df = loaded
-            if plan_df is None or plan_df.empty:
-                plan_df = init_week_plan(pname)
-            if ex_df is None or ex_df.empty:
-                ex_df = init_exercise_df()
-            st.session_state.weight[pname] = weight_kg
-            st.session_state.height_cm[pname] = height_cm
-            st.session_state.activity_factor[pname] = activity_factor
-            st.session_state.plans[pname] = plan_df
-            st.session_state.exercise[pname] = ex_df
+        for store in (
+            st.session_state.plans,
+            st.session_state.exercise,
+            st.session_state.weight,
+            st.session_state.height_cm,
+            st.session_state.activity_factor,
+            st.session_state.daily_aggs,
+            st.session_state.sync,
+        ):
+            store.pop(pname, None)
+        del st.session_state.profile_last_used[pname]
 
 # ============================================================
-# UI
+# Seções da página (fragmentos) e dependências
 # ============================================================
+# Cada seção roda como st.fragment: um widget dela reroda só a função da seção, não o
+# script. SECTION_DEPS é o grafo (seção -> seções cujo estado ela lê), em ordem de página,
+# e SECTION_OUTPUTS o que cada seção grava na sessão. Quando a rerun de um fragmento muda
+# o estado de que outra seção da tela depende, o app inteiro roda de novo
+# (st.rerun(scope="app")): um fragmento só escreve no próprio container. Mudança que só
+# a própria seção usa (filtro por dia, projeção) fica na rerun do fragmento. "autosave" é
+# uma seção sem tela: roda dentro da rerun do fragmento quando fica desatualizada.
+SECTION_DEPS = {
+    "perfil": (),
+    "exercicios": ("perfil",),
+    "plano": (),
+    "resumo_diario": ("perfil", "exercicios", "plano"),
+    "semana": ("perfil", "resumo_diario"),
+    "cenarios": ("perfil", "exercicios", "resumo_diario"),
+    "historico": ("perfil", "exercicios", "plano"),
+    "autosave": ("perfil", "exercicios", "plano"),
+}
+
+def daily_aggregates() -> DailyAggregates:
+    """
+    Totais por dia do perfil atual: os mantidos pelas seções de edição, ou refeitos se
+    os frames ou o peso mudaram por outro caminho (reset, cópia, recarga)
+    """
+    plan_df = st.session_state.plans[selected]
+    ex_df = st.session_state.exercise[selected]
+    weight_kg = st.session_state.weight[selected]
+    daily_agg = st.session_state.daily_aggs.get(selected)
+    if daily_agg is None or not daily_agg.matches(plan_df, ex_df, weight_kg):
+        daily_agg = DailyAggregates(plan_df, ex_df, compute_exercise_calc(ex_df, weight_kg), weight_kg)
+        st.session_state.daily_aggs[selected] = daily_agg
+    return daily_agg
+
+# Frames comparados por identidade (são imutáveis), escalares por valor
+SECTION_OUTPUTS = {
+    "perfil": lambda: (
+        st.session_state.weight[selected], st.session_state.height_cm[selected], st.session_state.activity_factor[selected]
+    ),
+    "exercicios": lambda: (st.session_state.exercise[selected],),
+    "plano": lambda: (st.session_state.plans[selected],),
+    "resumo_diario": lambda: (
+        daily_aggregates().week_intake, daily_aggregates().week_ex, tuple(np.round(daily_aggregates().week_macros, 1))
+    ),
+}
+
+SECTION_FUNCS = {}
+PLACED = {}  # seção -> tem tela (colocada na última rerun do app)
+PLACING = []  # seção sendo colocada pela rerun do app (vazia na rerun só de um fragmento)
+
+def section_inputs(name: str) -> tuple:
+    return tuple(v for dep in SECTION_DEPS[name] for v in SECTION_OUTPUTS[dep]())
+
+def is_stale(name: str) -> bool:
+    """
+    A seção foi desenhada a partir de outro estado das seções de que depende
+    """
+    drawn = st.session_state.section_inputs.get(name)
+    now = section_inputs(name)
+    return drawn is None or len(drawn) != len(now) or any(
+        a is not b and (isinstance(a, pd.DataFrame) or a != b) for a, b in zip(drawn, now)
+    )
+
+def page_section(name: str, fragment: bool = True):
+    """
+    Registra a função como a seção `name` (st.fragment, salvo fragment=False). Na rerun
+    só do fragmento, ao terminar, atualiza as seções que ficaram desatualizadas.
+    """
+    def register(body):
+        @wraps(body)
+        def run():
+            # Rerun só deste fragmento: abre e fecha a própria medição
+            root = not instrument.rerun_active()
+            if root:
+                instrument.begin_rerun()
+            try:
+                instrument.section(name)
+                st.session_state.section_inputs[name] = section_inputs(name)
+                body()
+                if not PLACING:
+                    refresh_downstream()
+            finally:
+                if root:
+                    instrument.end_rerun()
+
+        SECTION_FUNCS[name] = st.fragment(run) if fragment else run
+        return SECTION_FUNCS[name]
+    return register
+
+def place_section(name: str, on_page: bool = True):
+    """
+    Coloca a seção neste ponto da página (rerun do app) e a desenha
+    """
+    PLACED[name] = on_page
+    PLACING.append(name)
+    try:
+        SECTION_FUNCS[name]()
+    finally:
+        PLACING.pop()
+
+def refresh_downstream():
+    """
+    Depois da rerun só de um fragmento: seção da tela com o estado de entrada mudado refaz
+    o app inteiro (cada seção se desenha no seu lugar); seções sem tela rodam aqui.
+    """
+    stale = [name for name, deps in SECTION_DEPS.items() if deps and name in PLACED and is_stale(name)]
+    if any(PLACED[name] for name in stale):
+        st.rerun(scope="app")
+    for name in stale:
+        SECTION_FUNCS[name]()
+
+def rerun_section():
+    """
+    Redesenha a seção atual depois de um botão mudar o estado (as dependentes vêm
+    junto). Fora da rerun de um fragmento (rerun do app, AppTest), refaz o app.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+# ============================================================
+# Perfil
+# ============================================================
+instrument.section("cabecalho")
 st.title("📊 Calorie tracker — Vitor & Thayná")
 
-c1, c2, c3, c4 = st.columns([1.2, 1, 1, 1])
+ACTIVITY_VALUES = [af for _, af in ACTIVITY_LEVELS]
+WEIGHT_MIN_KG, WEIGHT_MAX_KG = 30.0, 250.0  # campo de peso e faixa dos cenários
+
+@page_section("perfil")
+def profile_section():
+    c2, c3, c4 = st.columns(3)
+    with c2:
+        weight_kg = st.number_input(
+            "Peso (kg)",
+            min_value=WEIGHT_MIN_KG, max_value=WEIGHT_MAX_KG,
+            value=float(st.session_state.weight[selected]),
+            step=0.1,
+            key=f"weight_{selected}",
+        )
+        st.session_state.weight[selected] = float(weight_kg)
+
+    with c3:
+        height_cm = st.number_input(
+            "Altura (cm)",
+            min_value=120, max_value=220,
+            value=int(st.session_state.height_cm[selected]),
+            step=1,
+            key=f"height_{selected}",
+        )
+        st.session_state.height_cm[selected] = int(height_cm)
+
+    with c4:
+        activity_choice = st.selectbox(
+            "Atividade (fora treino)",
+            options=ACTIVITY_LEVELS,
+            index=ACTIVITY_VALUES.index(
+                float(st.session_state.activity_factor[selected])
+            ) if float(st.session_state.activity_factor[selected]) in ACTIVITY_VALUES else 2,
+            format_func=lambda x: x[0],
+            key=f"activity_{selected}",
+        )
+        st.session_state.activity_factor[selected] = float(activity_choice[1])
+
+# Trocar de perfil muda tudo: o seletor fica fora dos fragmentos (rerun do app)
+c1, c_inputs = st.columns([1.2, 3])
 
 with c1:
     selected = st.selectbox("Selecione o perfil", list(PROFILES.keys()))
     prof = PROFILES[selected]
+    ensure_profile_loaded(selected)
+    evict_idle_profiles(keep={selected})
 
-with c2:
-    weight_kg = st.number_input(
-        "Peso (kg)",
-        min_value=30.0, max_value=250.0,
-        value=float(st.session_state.weight[selected]),
-        step=0.1,
-        key=f"weight_{selected}",
-    )
-    st.session_state.weight[selected] = float(weight_kg)
-
-with c3:
-    height_cm = st.number_input(
-        "Altura (cm)",
-        min_value=120, max_value=220,
-        value=int(st.session_state.height_cm[selected]),
-        step=1,
-        key=f"height_{selected}",
-    )
-    st.session_state.height_cm[selected] = int(height_cm)
-
-with c4:
-    activity_choice = st.selectbox(
-        "Atividade (fora treino)",
-        options=[
-            ("Sedentário (1.2)", 1.2),
-            ("Leve (1.375)", 1.375),
-            ("Moderado (1.55)", 1.55),
-            ("Alto (1.725)", 1.725),
-        ],
-        index=[1.2, 1.375, 1.55, 1.725].index(
-            float(st.session_state.activity_factor[selected])
-        ) if float(st.session_state.activity_factor[selected]) in [1.2, 1.375, 1.55, 1.725] else 2,
-        format_func=lambda x: x[0],
-        key=f"activity_{selected}",
-    )
-    activity_factor = float(activity_choice[1])
-    st.session_state.activity_factor[selected] = activity_factor
+with c_inputs:
+    place_section("perfil")
 
 st.caption("✅ Balanço semanal: Ingestão − (TDEE + Exercício). Negativo = déficit (emagrecimento).")
 st.caption(f"Limite diário do plano: {prof.daily_limit_kcal} kcal (referência por dia).")
+conflicts = st.session_state.sync_conflicts.pop(selected, None)
+if conflicts:
+    st.warning(
+        "⚠️ Outra sessão alterou as mesmas células deste perfil; ficou o valor desta sessão: "
+        + "; ".join(
+            f"{c.column}{'' if c.rid is None else f' (linha {c.rid})'}: {c.theirs} → {c.ours}" for c in conflicts[:5]
+        )
+        + (f" e mais {len(conflicts) - 5}" if len(conflicts) > 5 else "")
+    )
+
+for moved in quarantined_files(selected):
+    st.warning(f"⚠️ Arquivo de estado ilegível movido para {moved.name}; {selected} voltou ao plano padrão.")
 
 st.divider()
 
 # ============================================================
 # Exercícios
 # ============================================================
-st.subheader("🏃 Exercícios da semana (editável)")
-MUSC_MET_MODERADO = 6.0
-
-ex_df = st.session_state.exercise[selected].copy()
-
-# UI sem índice e sem rid
-ex_ui = ex_df.reset_index().drop(columns=["rid"], errors="ignore")
-
-ex_ui_edited = st.data_editor(
-    ex_ui,
-    use_container_width=True,
-    num_rows="fixed",
-    column_config={
-        "Dia": st.column_config.TextColumn(disabled=True),
-        "Corrida (km)": st.column_config.NumberColumn(min_value=0.0, max_value=200.0, step=0.1),
-        "Corrida (min)": st.column_config.NumberColumn(min_value=0.0, max_value=600.0, step=1.0),
-        "Musculação (min)": st.column_config.NumberColumn(min_value=0.0, max_value=600.0, step=5.0),
-    },
-    key=f"ex_editor_{selected}",
-)
+@page_section("exercicios")
+def exercise_section():
+    st.subheader("🏃 Exercícios da semana (editável)")
+
+    ex_df = st.session_state.exercise[selected]
+    weight_kg = st.session_state.weight[selected]
+    activities = get_activity_catalog()
+
+    # UI sem índice e sem rid, linhas em ordem de dia (quantas atividades quiser por dia)
+    ex_editor_key = f"ex_editor_{selected}"
+    ex_view = by_day(ex_df)
+    ex_ui = ex_view.reset_index().drop(columns=["rid"], errors="ignore")
+
+    ex_ui_edited = st.data_editor(
+        ex_ui,
+        use_container_width=True,
+        num_rows="dynamic",
+        column_config={
+            "Dia": st.column_config.SelectboxColumn(options=DAYS, required=True, default=EXERCISE_ROW_DEFAULTS["Dia"]),
+            "Atividade": st.column_config.SelectboxColumn(
+                options=activities.names, required=True, default=EXERCISE_ROW_DEFAULTS["Atividade"]
+            ),
+            "Minutos": st.column_config.NumberColumn(min_value=0.0, max_value=600.0, step=1.0, default=0.0),
+            "Distância (km)": st.column_config.NumberColumn(
+                min_value=0.0, max_value=300.0, step=0.1, default=0.0, help="Corrida e ciclismo: MET pela velocidade média"
+            ),
+            "Inclinação (%)": st.column_config.NumberColumn(
+                min_value=0.0, max_value=40.0, step=1.0, default=0.0, help="Caminhada: MET pela inclinação"
+            ),
+            "Intensidade": st.column_config.SelectboxColumn(
+                options=INTENSITY_LEVELS, default=EXERCISE_ROW_DEFAULTS["Intensidade"],
+                help="Musculação, HIIT, natação e ergométrica: MET pela intensidade",
+            ),
+            "MET (relógio)": st.column_config.NumberColumn(
+                min_value=0.0, max_value=25.0, step=0.1, default=0.0, format="%.2f",
+                help="MET médio dos segmentos da corrida importada; 0 = MET pelo catálogo",
+            ),
+        },
+        key=ex_editor_key,
+    )
 
-# Merge de volta pelo Dia
-ex_full = ex_df.copy()
-for _, row in ex_ui_edited.iterrows():
-    mask = (ex_full["Dia"] == row["Dia"])
-    ex_full.loc[mask, ["Corrida (km)", "Corrida (min)", "Musculação (min)"]] = [
-        float(row.get("Corrida (km)", 0) or 0),
-        float(row.get("Corrida (min)", 0) or 0),
-        float(row.get("Musculação (min)", 0) or 0),
-    ]
-st.session_state.exercise[selected] = ex_full
-
-# Calcula gastos
-kcal_run_list, speed_list, met_list, kcal_musc_list, kcal_total_list = [], [], [], [], []
-for _, r in ex_full.iterrows():
-    kcal_run, speed, met = calc_running_kcal(weight_kg, r["Corrida (km)"], r["Corrida (min)"])
-    kcal_musc = kcal_from_met(weight_kg, r["Musculação (min)"], MUSC_MET_MODERADO)
-    kcal_total = kcal_run + kcal_musc
-
-    kcal_run_list.append(kcal_run)
-    speed_list.append(speed)
-    met_list.append(met)
-    kcal_musc_list.append(kcal_musc)
-    kcal_total_list.append(kcal_total)
-
-ex_calc = ex_full.copy()
-ex_calc["Vel. média (km/h)"] = [round(x, 1) for x in speed_list]
-ex_calc["MET corrida (estim.)"] = [round(x, 1) for x in met_list]
-ex_calc["Gasto corrida (kcal)"] = [int(round(x)) for x in kcal_run_list]
-ex_calc["Gasto musculação (kcal)"] = [int(round(x)) for x in kcal_musc_list]
-ex_calc["Gasto total exercício (kcal)"] = [int(round(x)) for x in kcal_total_list]
-
-st.dataframe(
-    ex_calc[[
-        "Dia", "Corrida (km)", "Corrida (min)", "Vel. média (km/h)", "MET corrida (estim.)",
-        "Musculação (min)", "Gasto corrida (kcal)", "Gasto musculação (kcal)", "Gasto total exercício (kcal)"
-    ]],
-    use_container_width=True,
-    hide_index=True,
-)
+    # Merge de volta pelo rid: células alteradas, linhas novas (rid novo) e removidas
+    ex_merge = merge_editor_rows(
+        ex_df,
+        ex_view.index,
+        editor_state(ex_editor_key, ex_ui, ex_ui_edited, EX_EDITABLE),
+        EX_EDITABLE,
+        EXERCISE_ROW_DEFAULTS,
+    )
+    ex_full = ex_merge.df
+
+    # Calcula gastos (lookup vetorizado no catálogo; servido do cache se exercícios e peso não mudaram)
+    ex_calc = compute_exercise_calc(ex_full, weight_kg)
+
+    if ex_merge.changed:
+        st.session_state.exercise[selected] = ex_full
+        # Totais por dia: atualização incremental a partir das células editadas
+        daily_agg = st.session_state.daily_aggs.get(selected)
+        if daily_agg is not None and not daily_agg.update_exercise(ex_df, ex_merge, ex_calc, weight_kg):
+            del st.session_state.daily_aggs[selected]
+
+    if len(ex_calc):
+        st.dataframe(
+            by_day(ex_calc)[[
+                "Dia", "Atividade", "Minutos", "Distância (km)", "Vel. média (km/h)", "MET (estim.)", "Gasto (kcal)"
+            ]],
+            use_container_width=True,
+            hide_index=True,
+        )
 
-st.caption("Corrida/HIIT: usa velocidade média (km/h) para estimar MET. Musculação moderada fixa em MET=6.0.")
+    st.caption(
+        "MET pelo catálogo de atividades (Compendium): corrida e ciclismo pela velocidade média, "
+        "caminhada pela inclinação, musculação/HIIT/natação/ergométrica pela intensidade."
+    )
 
+    # Corridas do relógio: cada arquivo é lido uma vez (streaming) e o resumo fica na sessão
+    with st.expander("📥 Importar corridas do relógio (GPX/TCX/CSV)"):
+        uploads = st.file_uploader(
+            "Arquivos de treino", type=["gpx", "tcx", "csv", "gz"], accept_multiple_files=True, key=f"run_files_{selected}"
+        )
+        parsed = st.session_state.setdefault("run_imports", {})
+        runs = []
+        for upload in uploads or []:
+            if upload.file_id not in parsed:
+                try:
+                    parsed[upload.file_id] = read_run(upload, upload.name)
+                except Exception as e:
+                    parsed[upload.file_id] = None
+                    st.warning(f"{upload.name}: não foi possível ler ({e})")
+            if parsed[upload.file_id] is not None:
+                runs.append(parsed[upload.file_id])
+
+        if runs:
+            weeks = sorted({r.iso_week for r in runs})
+            r1, r2 = st.columns(2)
+            run_week = r1.selectbox("Semana (ISO) a importar", weeks, index=len(weeks) - 1, key=f"run_week_{selected}")
+            run_mode = r2.radio("Nos dias com treino", ["Substituir", "Somar"], horizontal=True, key=f"run_mode_{selected}")
+            st.dataframe(runs_by_date([r for r in runs if r.iso_week == run_week], weight_kg), use_container_width=True, hide_index=True)
+            st.caption(
+                "MET·min soma cada segmento com o MET da sua velocidade; na tabela entra uma Corrida por dia, "
+                "com esse MET na coluna MET (relógio)."
+            )
+            run_rows = week_run_rows(ex_full, runs, run_week, add=run_mode == "Somar")
+            if run_rows["deleted_rows"]:
+                dropped = ex_full["Dia"].iloc[run_rows["deleted_rows"]]
+                st.warning(
+                    f"Substituir remove {len(dropped)} outra(s) linha(s) de Corrida "
+                    f"({', '.join(dict.fromkeys(dropped))}): fica uma Corrida por dia, a do relógio. "
+                    "Para mantê-las, use Somar."
+                )
+            if st.button("Aplicar na semana", key=f"run_apply_{selected}"):
+                imported = merge_editor_rows(ex_full, ex_full.index, run_rows, EX_EDITABLE, EXERCISE_ROW_DEFAULTS)
+                if imported.changed:
+                    st.session_state.exercise[selected] = imported.df
+                rerun_section()
+
+place_section("exercicios")
 st.divider()
 
 # ============================================================
 # Plano alimentar
 # ============================================================
-st.subheader("🍽️ Plano alimentar (editável)")
-day_filter = st.selectbox("Filtrar por dia", ["Todos"] + DAYS, index=0, key=f"day_filter_{selected}")
-
-plan_full = st.session_state.plans[selected].copy()
-plan_view = plan_full.copy() if day_filter == "Todos" else plan_full[plan_full["Dia"] == day_filter].copy()
-
-# UI sem índice e sem rid
-plan_view_ui = plan_view.reset_index().drop(columns=["rid"], errors="ignore")
-
-plan_ui_edited = st.data_editor(
-    plan_view_ui,
-    use_container_width=True,
-    num_rows="fixed",
-    column_config={
-        "Dia": st.column_config.TextColumn(disabled=True),
-        "Refeição": st.column_config.TextColumn(disabled=True),
-        "Descrição": st.column_config.TextColumn(width="large"),
-        "Calorias (kcal)": st.column_config.NumberColumn(min_value=0, max_value=5000, step=10),
-    },
-    key=f"plan_editor_{selected}_{day_filter}",
-)
-
-plan_ui_edited["Calorias (kcal)"] = (
-    plan_ui_edited["Calorias (kcal)"]
-    .fillna(0)
-    .astype(int)
-    .clip(0, 20000)
-)
-
-# Merge por (Dia, Refeição)
-plan_full2 = plan_full.copy()
-for _, row in plan_ui_edited.iterrows():
-    mask = (plan_full2["Dia"] == row["Dia"]) & (plan_full2["Refeição"] == row["Refeição"])
-    plan_full2.loc[mask, ["Descrição", "Calorias (kcal)"]] = [row["Descrição"], int(row["Calorias (kcal)"])]
+@page_section("plano")
+def plan_section():
+    st.subheader("🍽️ Plano alimentar (editável)")
+    day_filter = st.selectbox("Filtrar por dia", ["Todos"] + DAYS, index=0, key=f"day_filter_{selected}")
+
+    plan_full = st.session_state.plans[selected]
+    # Visão do dia: fatia do plano (as linhas de um dia são contíguas), sem cópia
+    plan_view = plan_full if day_filter == "Todos" else rows_view(plan_full, plan_full["Dia"] == day_filter)
+
+    # UI sem índice e sem rid. Uma key por perfil: trocar o filtro muda os dados do editor
+    # (e o delta recomeça vazio), sem criar um widget novo na sessão a cada dia
+    plan_editor_key = f"plan_editor_{selected}"
+    plan_view_ui = plan_view.reset_index().drop(columns=["rid"], errors="ignore")
+
+    plan_ui_edited = st.data_editor(
+        plan_view_ui,
+        use_container_width=True,
+        num_rows="fixed",
+        column_config={
+            "Dia": st.column_config.TextColumn(disabled=True),
+            "Refeição": st.column_config.TextColumn(disabled=True),
+            "Descrição": st.column_config.TextColumn(width="large"),
+            "Calorias (kcal)": st.column_config.NumberColumn(min_value=0, max_value=5000, step=10),
+            **{col: st.column_config.NumberColumn(min_value=0.0, max_value=2000.0, step=0.1, format="%.1f") for col in MACRO_COLUMNS},
+        },
+        key=plan_editor_key,
+    )
 
-st.session_state.plans[selected] = plan_full2
+    # Merge pelo rid (as linhas do editor seguem a ordem de plan_view), só das células alteradas;
+    # kcal editada sem mexer nos macros leva os macros junto (mesma porção)
+    plan_merge = follow_kcal(merge_editor_delta(
+        plan_full,
+        plan_view.index,
+        editor_edited_rows(plan_editor_key, plan_view_ui, plan_ui_edited, PLAN_EDITABLE),
+        PLAN_EDITABLE,
+    ))
+    if plan_merge.changed:
+        st.session_state.plans[selected] = plan_merge.df
+        daily_agg = st.session_state.daily_aggs.get(selected)
+        if daily_agg is not None and not daily_agg.update_plan(plan_full, plan_merge):
+            del st.session_state.daily_aggs[selected]
+
+    # Catálogo: alimento + quantidade preenchem Descrição, kcal e macros de uma refeição do plano
+    with st.expander("🔎 Preencher refeição pelo catálogo de alimentos"):
+        catalog = get_food_catalog()
+        f1, f2 = st.columns([1, 2])
+        food_query = f1.text_input("Buscar alimento", key=f"food_query_{selected}", placeholder="ex.: frango grelhado")
+        food_id = f2.selectbox(
+            "Alimento",
+            catalog.search(food_query) if food_query else [],
+            format_func=lambda i: catalog.names[i],
+            # sem key: o widget recomeça (1º resultado) quando a lista de resultados muda
+        )
+        g1, g2, g3, g4 = st.columns(4)
+        food_grams = g1.number_input("Quantidade (g)", 1.0, 3000.0, 100.0, step=10.0, key=f"food_grams_{selected}")
+        food_day = g2.selectbox(
+            "Dia", DAYS, index=DAYS.index(day_filter) if day_filter in DAYS else 0, key=f"food_day_{selected}"
+        )
+        food_meal = g3.selectbox("Refeição", MEALS, key=f"food_meal_{selected}")
+        food_mode = g4.radio("Na refeição", ["Substituir", "Somar"], horizontal=True, key=f"food_mode_{selected}")
+
+        if food_id is not None:
+            food = catalog.food(food_id)
+            st.caption(
+                f"{food.describe(food_grams)}: **{food.kcal_for(food_grams)} kcal** · "
+                f"proteína {food.protein_g * food_grams:.0f} g · carboidrato {food.carbs_g * food_grams:.0f} g · "
+                f"gordura {food.fat_g * food_grams:.0f} g · fibra {food.fiber_g * food_grams:.0f} g"
+            )
+        if st.button("Preencher", disabled=food_id is None, key=f"food_fill_{selected}"):
+            plan_now = st.session_state.plans[selected]
+            target = plan_now.index[(plan_now["Dia"] == food_day) & (plan_now["Refeição"] == food_meal)]
+            if len(target):
+                rid = target[0]
+                desc, kcal = food.describe(food_grams), food.kcal_for(food_grams)
+                macros = np.array(food.macros_for(food_grams))
+                if food_mode == "Somar":
+                    old_desc = str(plan_now.at[rid, "Descrição"] or "")
+                    desc = f"{old_desc} + {desc}" if old_desc else desc
+                    kcal += int(plan_now.at[rid, "Calorias (kcal)"])
+                    macros = macros + plan_now.loc[rid, MACRO_COLUMNS].to_numpy(dtype=float)
+                cells = {"Descrição": desc, "Calorias (kcal)": kcal, **dict(zip(MACRO_COLUMNS, macros.tolist()))}
+                filled = merge_editor_delta(plan_now, [rid], {0: cells}, PLAN_EDITABLE)
+                if filled.changed:
+                    st.session_state.plans[selected] = filled.df
+                rerun_section()
+
+    # Gerador: refaz Descrição, kcal e macros da semana inteira no limite diário do perfil
+    with st.expander("🧮 Gerar plano da semana pelo limite diário"):
+        n1, n2 = st.columns([1, 2])
+        gen_tolerance = n1.number_input(
+            "Tolerância (kcal/dia abaixo do limite)", 10, 300, DEFAULT_TOLERANCE_KCAL, step=10, key=f"gen_tolerance_{selected}"
+        )
+        n2.caption(
+            f"Limite {prof.daily_limit_kcal} kcal/dia, dividido em "
+            + " · ".join(f"{m} {share:.0%}" for m, share in MEAL_SHARES.items())
+            + ". Sem repetir prato em dias seguidos (exceto os do dia a dia) nem além do máximo da semana."
+        )
+        if st.button("Gerar plano", key=f"gen_plan_{selected}"):
+            # Cada clique usa outra seed: gerar de novo dá outra combinação
+            gen_seed = st.session_state.setdefault("gen_seed", {}).get(selected, 0)
+            st.session_state.gen_seed[selected] = gen_seed + 1
+            generated = generate_week_plan(prof.daily_limit_kcal, tolerance_kcal=gen_tolerance, seed=gen_seed)
+            plan_now = st.session_state.plans[selected]
+            slots = plan_now.reset_index().drop_duplicates(["Dia", "Refeição"]).set_index(["Dia", "Refeição"])["rid"]
+            gen_rows = generated.join(slots, on=["Dia", "Refeição"], how="inner")
+            filled = merge_editor_delta(
+                plan_now,
+                gen_rows["rid"].tolist(),
+                {
+                    i: {"Descrição": desc, "Calorias (kcal)": int(kcal), **dict(zip(MACRO_COLUMNS, macros))}
+                    for i, (desc, kcal, macros) in enumerate(zip(
+                        gen_rows["Descrição"], gen_rows["Calorias (kcal)"], gen_rows[MACRO_COLUMNS].to_numpy().tolist()
+                    ))
+                },
+                PLAN_EDITABLE,
+            )
+            if filled.changed:
+                st.session_state.plans[selected] = filled.df
+            rerun_section()
 
+place_section("plano")
 st.divider()
 
 # ============================================================
 # Resumo por dia + alertas de limite
 # ============================================================
-st.subheader("📈 Resumo por dia (limite do plano)")
-plan_full = st.session_state.plans[selected].copy()
-
-daily_intake = (
-    plan_full.groupby("Dia", as_index=False)["Calorias (kcal)"]
-    .sum()
-    .rename(columns={"Calorias (kcal)": "Ingestão (kcal)"})
-)
+@page_section("resumo_diario")
+def daily_summary_section():
+    st.subheader("📈 Resumo por dia (limite do plano)")
+    daily_limit = int(prof.daily_limit_kcal)
+
+    daily_agg = daily_aggregates()
+    daily = daily_agg.summary_frame(daily_limit)
+    over, under = daily_agg.limit_alerts(daily_limit)
+
+    if over:
+        excedentes = ", ".join(f"{d} (+{kcal} kcal)" for d, kcal in over)
+        st.error(f"Acima do limite do plano em: {excedentes}")
+
+    if under:
+        faltas = ", ".join(f"{d} (-{kcal} kcal)" for d, kcal in under)
+        st.info(f"Abaixo do limite do plano em: {faltas}")
+
+    # Metas mínimas de macros: proteína pelo peso atual, gordura e fibra pelo limite diário
+    targets = macro_targets(st.session_state.weight[selected], daily_limit)
+    for col, short in daily_agg.macro_alerts(targets).items():
+        k = MACRO_COLUMNS.index(col)
+        faltas = ", ".join(f"{d} (-{g:.0f} g)" for d, g in short)
+        st.warning(f"{col.split(' (')[0]} abaixo da meta de {targets[k]:.0f} g/dia em: {faltas}")
+
+    cols_show = [
+        "Dia", "Ingestão (kcal)", "Gasto total exercício (kcal)", "Limite diário (kcal)", "Diferença (Limite - Ingestão)",
+        *MACRO_COLUMNS, "Proteína (g/kg)",
+    ]
 
-daily_ex = ex_calc[["Dia", "Gasto total exercício (kcal)"]].reset_index(drop=True)
+    st.dataframe(
+        daily[cols_show].style.apply(over_limit_styles, axis=None, column="Ingestão (kcal)", limit=daily_limit),
+        use_container_width=True,
+        hide_index=True,
+    )
 
-daily = daily_intake.merge(daily_ex, on="Dia", how="left")
-daily["Gasto total exercício (kcal)"] = daily["Gasto total exercício (kcal)"].fillna(0).astype(int)
+place_section("resumo_diario")
+st.divider()
 
-daily_limit = int(prof.daily_limit_kcal)
-daily["Limite diário (kcal)"] = daily_limit
-daily["Diferença (Limite - Ingestão)"] = daily["Limite diário (kcal)"] - daily["Ingestão (kcal)"]
+# ============================================================
+# Total da semana — balanço real + estimativa de perda de peso
+# ============================================================
+@page_section("semana")
+def week_section():
+    st.subheader("🧾 Total da semana — balanço energético real")
+
+    weight_kg = st.session_state.weight[selected]
+    height_cm = st.session_state.height_cm[selected]
+    activity_factor = st.session_state.activity_factor[selected]
+    daily_agg = daily_aggregates()
+    week_intake = int(daily_agg.week_intake)
+    week_ex = int(daily_agg.week_ex)
+
+    bmr_day, tdee_day = daily_energy_budget(prof.sex, weight_kg, height_cm, prof.age, activity_factor)  # sem exercício estruturado
+    week_tdee = int(round(tdee_day * 7))
+
+    # Balanço: ingestão - (tdee + exercício)
+    week_balance = int(round(week_intake - (week_tdee + week_ex)))
+
+    # Estimativa de variação de peso (1 kg ~ 7700 kcal)
+    # Negativo => perda; positivo => ganho.
+    kg_change_est = week_balance / KCAL_PER_KG
+
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Ingestão semanal (kcal)", f"{week_intake}")
+    k2.metric("Exercício semanal (kcal)", f"{week_ex}")
+    k3.metric("TDEE semanal (kcal) (BMR×atividade)", f"{week_tdee}")
+
+    if week_balance < 0:
+        k4.metric("Déficit semanal (kcal)", f"{week_balance}")
+        st.success(f"✅ Déficit de {abs(week_balance)} kcal na semana (tendência a emagrecimento).")
+    elif week_balance > 0:
+        k4.metric("Superávit semanal (kcal)", f"{week_balance}")
+        st.warning(f"⚠️ Superávit de {week_balance} kcal na semana (tendência a ganho/manutenção).")
+    else:
+        k4.metric("Saldo semanal (kcal)", "0")
+        st.info("Saldo neutro na semana (manutenção).")
+
+    # Estimativa em kg
+    if week_balance < 0:
+        st.write(f"📉 **Estimativa de perda de peso na semana:** ~ **{abs(kg_change_est):.2f} kg** (aprox.).")
+    elif week_balance > 0:
+        st.write(f"📈 **Estimativa de ganho de peso na semana:** ~ **{abs(kg_change_est):.2f} kg** (aprox.).")
+    else:
+        st.write("⚖️ **Estimativa de variação de peso:** ~ **0.00 kg**.")
 
-daily["__ord"] = daily["Dia"].map(DAY_ORDER).fillna(999).astype(int)
-daily = daily.sort_values("__ord").drop(columns=["__ord"])
+    st.caption("Obs.: estimativa aproximada (7700 kcal ≈ 1 kg). Peso real varia por água, glicogênio e retenção.")
 
-over = daily[daily["Ingestão (kcal)"] > daily_limit]
-under = daily[daily["Ingestão (kcal)"] < daily_limit]
+    week_macros = daily_agg.week_macros
+    st.caption(
+        "Macros da semana: "
+        + " · ".join(f"{col.split(' (')[0].lower()} {g:.0f} g" for col, g in zip(MACRO_COLUMNS, week_macros))
+        + f" · proteína média {week_macros[0] / len(DAYS) / weight_kg:.2f} g/kg/dia"
+    )
 
-if not over.empty:
-    excedentes = ", ".join([f"{r['Dia']} (+{int(r['Ingestão (kcal)'] - daily_limit)} kcal)" for _, r in over.iterrows()])
-    st.error(f"Acima do limite do plano em: {excedentes}")
+    st.markdown("**📆 Projeção de peso (repetindo esta semana)**")
+    proj_weeks = st.slider("Semanas de projeção", min_value=6, max_value=52, value=12, key=f"proj_weeks_{selected}")
+    projection = weight_projection_frame(
+        prof.sex, weight_kg, height_cm, prof.age, activity_factor, week_intake, week_ex, proj_weeks
+    )
+    st.line_chart(projection, x="Semana", y="Peso projetado (kg)")
+    final_kg = float(projection["Peso projetado (kg)"].iloc[-1])
+    st.caption(
+        f"Em {proj_weeks} semanas: ~ {final_kg:.1f} kg ({final_kg - weight_kg:+.1f} kg). "
+        "BMR/TDEE recalculados a cada semana com o peso projetado."
+    )
 
-if not under.empty:
-    faltas = ", ".join([f"{r['Dia']} (-{int(daily_limit - r['Ingestão (kcal)'])} kcal)" for _, r in under.iterrows()])
-    st.info(f"Abaixo do limite do plano em: {faltas}")
+place_section("semana")
+st.divider()
 
-def highlight_rows(row):
-    if int(row["Ingestão (kcal)"]) > daily_limit:
-        return ["background-color: rgba(255, 0, 0, 0.18)"] * len(row)
-    return [""] * len(row)
+# ============================================================
+# Cenários — varredura de atividade × peso × volume de treino
+# ============================================================
+@page_section("cenarios")
+def scenario_section():
+    if not st.toggle("🧪 Comparar cenários (atividade × peso × treino)", key=f"sweep_on_{selected}"):
+        return
+    weight_kg = st.session_state.weight[selected]
+    height_cm = st.session_state.height_cm[selected]
+    activity_factor = st.session_state.activity_factor[selected]
+    ex_full = st.session_state.exercise[selected]
+    week_intake = int(daily_aggregates().week_intake)
+
+    s1, s2, s3, s4 = st.columns(4)
+    sweep_af = s1.multiselect(
+        "Atividade",
+        options=ACTIVITY_VALUES,
+        default=ACTIVITY_VALUES,
+        format_func=lambda af: dict((v, k) for k, v in ACTIVITY_LEVELS)[af],
+        key=f"sweep_af_{selected}",
+    )
+    # Padrão: os 10 kg abaixo do peso atual, dentro da faixa do campo de peso
+    w_now = min(max(float(round(weight_kg)), WEIGHT_MIN_KG), WEIGHT_MAX_KG)
+    w_lo, w_hi = s2.slider(
+        "Peso (kg)", WEIGHT_MIN_KG, WEIGHT_MAX_KG, (max(WEIGHT_MIN_KG, w_now - 10.0), w_now), step=1.0,
+        key=f"sweep_w_{selected}",
+    )
+    km_lo, km_hi = s3.slider("Corrida (km/sem)", 0, 150, (0, 40), step=5, key=f"sweep_km_{selected}")
+    musc_lo, musc_hi = s4.slider("Musculação (min/sem)", 0, 900, (0, 300), step=30, key=f"sweep_musc_{selected}")
+
+    week_runs = ex_full[ex_full["Atividade"] == "Corrida"]
+    week_run_km = float(week_runs["Distância (km)"].sum())
+    week_run_min = float(week_runs["Minutos"].sum())
+    week_strength = ex_full.loc[ex_full["Atividade"] == "Musculação", "Intensidade"]
+    sweep = scenario_sweep(
+        prof.sex, prof.age, height_cm, week_intake,
+        sweep_af or [activity_factor],
+        np.arange(w_lo, w_hi + 0.5, 1.0),
+        np.arange(km_lo, km_hi + 1, 5),
+        np.arange(musc_lo, musc_hi + 1, 30),
+        run_speed_kmh=week_run_km / (week_run_min / 60.0) if week_run_min > 0 and week_run_km > 0 else 9.0,
+        strength_intensity=week_strength.mode().iloc[0] if len(week_strength) else "Moderada",
+    )
+    st.caption(f"{len(sweep)} combinações com a ingestão desta semana ({week_intake} kcal).")
 
-cols_show = ["Dia", "Ingestão (kcal)", "Gasto total exercício (kcal)", "Limite diário (kcal)", "Diferença (Limite - Ingestão)"]
+    h1, h2 = st.columns(2)
+    fixed_af = h1.selectbox("Atividade no mapa", sorted(sweep["Atividade"].unique()), key=f"sweep_map_af_{selected}")
+    fixed_musc = h2.selectbox(
+        "Musculação no mapa (min/sem)", sorted(sweep["Musculação (min/sem)"].unique()), key=f"sweep_map_musc_{selected}"
+    )
+    st.dataframe(
+        sweep_heatmap(
+            sweep, "Peso (kg)", "Corrida (km/sem)",
+            **{"Atividade": fixed_af, "Musculação (min/sem)": fixed_musc},
+        ),
+        use_container_width=True,
+    )
+    st.download_button(
+        "⬇️ Baixar todas as combinações (CSV)",
+        sweep.to_csv(index=False).encode("utf-8"),
+        file_name=f"cenarios_{selected}.csv",
+        mime="text/csv",
+    )
 
-st.dataframe(
-    daily[cols_show].style.apply(highlight_rows, axis=1),
-    use_container_width=True,
-    hide_index=True,
-)
+    st.divider()
 
-st.divider()
+place_section("cenarios")
 
 # ============================================================
-# Total da semana — balanço real + estimativa de perda de peso
+# Histórico — semanas gravadas, médias móveis e tabelas por página
 # ============================================================
-st.subheader("🧾 Total da semana — balanço energético real")
-
-week_intake = int(daily["Ingestão (kcal)"].sum())
-week_ex = int(daily["Gasto total exercício (kcal)"].sum())
-
-bmr_day = bmr_mifflin_st_jeor(prof.sex, weight_kg, height_cm, prof.age)
-tdee_day = tdee_kcal_day(bmr_day, activity_factor)  # sem exercício estruturado
-week_tdee = int(round(tdee_day * 7))
-
-# Balanço: ingestão - (tdee + exercício)
-week_balance = int(round(week_intake - (week_tdee + week_ex)))
-
-# Estimativa de variação de peso (1 kg ~ 7700 kcal)
-# Negativo => perda; positivo => ganho.
-kg_change_est = week_balance / 7700.0
-
-k1, k2, k3, k4 = st.columns(4)
-k1.metric("Ingestão semanal (kcal)", f"{week_intake}")
-k2.metric("Exercício semanal (kcal)", f"{week_ex}")
-k3.metric("TDEE semanal (kcal) (BMR×atividade)", f"{week_tdee}")
-
-if week_balance < 0:
-    k4.metric("Déficit semanal (kcal)", f"{week_balance}")
-    st.success(f"✅ Déficit de {abs(week_balance)} kcal na semana (tendência a emagrecimento).")
-elif week_balance > 0:
-    k4.metric("Superávit semanal (kcal)", f"{week_balance}")
-    st.warning(f"⚠️ Superávit de {week_balance} kcal na semana (tendência a ganho/manutenção).")
-else:
-    k4.metric("Saldo semanal (kcal)", "0")
-    st.info("Saldo neutro na semana (manutenção).")
-
-# Estimativa em kg
-if week_balance < 0:
-    st.write(f"📉 **Estimativa de perda de peso na semana:** ~ **{abs(kg_change_est):.2f} kg** (aprox.).")
-elif week_balance > 0:
-    st.write(f"📈 **Estimativa de ganho de peso na semana:** ~ **{abs(kg_change_est):.2f} kg** (aprox.).")
-else:
-    st.write("⚖️ **Estimativa de variação de peso:** ~ **0.00 kg**.")
-
-st.caption("Obs.: estimativa aproximada (7700 kcal ≈ 1 kg). Peso real varia por água, glicogênio e retenção.")
+HISTORY_RANGES = {"12 semanas": 12, "6 meses": 26, "1 ano": 52, "Tudo": None}
+HISTORY_GRAINS = ["Dia", "Semana", *PERIODS]
+HISTORY_PAGE_ROWS = 50
+HISTORY_CHART_POINTS = 300
+
+@page_section("historico")
+def history_section():
+    if not st.toggle("📚 Histórico (semanas gravadas)", key=f"history_on_{selected}"):
+        return
+    if STORAGE_BACKEND != "sqlite":
+        st.caption("Só a semana atual: o histórico por semana fica no SQLite (BODY_ASSISTANT_STORAGE=sqlite).")
+
+    h1, h2 = st.columns([1, 2])
+    span = h1.selectbox("Período", list(HISTORY_RANGES), index=2, key=f"history_range_{selected}")
+    grain = h2.radio("Tabela por", HISTORY_GRAINS, horizontal=True, key=f"history_grain_{selected}")
+    weeks_back = HISTORY_RANGES[span]
+    first_week = "0000-W01" if weeks_back is None else iso_week(date.today() - timedelta(weeks=weeks_back - 1))
+    # A semana atual vem da sessão (edições ainda na fila do autosave); as anteriores do cache
+    history = load_history(
+        prof, get_storage(), first_week,
+        current=(
+            st.session_state.plans[selected], st.session_state.exercise[selected], st.session_state.weight[selected],
+            st.session_state.height_cm[selected], st.session_state.activity_factor[selected],
+        ),
+    )
+    weekly = history.weekly
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Semanas", len(history))
+    adherence = history.adherence()
+    m2.metric("Aderência", "—" if np.isnan(adherence) else f"{adherence:.0f}%", help="Dias no limite entre os dias com refeições registradas")
+    m3.metric("Variação de peso", f"{weekly['Peso (kg)'].iloc[-1] - weekly['Peso (kg)'].iloc[0]:+.1f} kg")
+    m4.metric("Variação prevista", f"{weekly['Variação prevista (kg)'].sum():+.1f} kg")
+
+    if len(history) > 1:
+        rolling = history.rolling(4)
+        kcal_cols = [c for c in rolling.columns if "(kcal)" in c]
+        kg_cols = [c for c in rolling.columns if "kg/sem" in c]
+        st.caption("Médias móveis de 4 semanas")
+        st.line_chart(downsample(rolling[kcal_cols], HISTORY_CHART_POINTS))
+        st.line_chart(downsample(rolling[kg_cols], HISTORY_CHART_POINTS))
+
+    # Mais recente primeiro; só a página vai para a tela (e para o Styler)
+    if grain == "Dia":
+        table = history.days.iloc[::-1]
+    elif grain == "Semana":
+        table = weekly.iloc[::-1].reset_index()
+    else:
+        table = history.periods(PERIODS[grain]).iloc[::-1].reset_index()
+    pages = max(1, -(-len(table) // HISTORY_PAGE_ROWS))
+    page = st.number_input(
+        f"Página (de {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"history_page_{selected}_{grain}"
+    )
+    rows, _ = page_slice(table, page, HISTORY_PAGE_ROWS)
+    if grain == "Dia":
+        limit = int(prof.daily_limit_kcal)
+        rows = rows.style.apply(over_limit_styles, axis=None, column="Ingestão (kcal)", limit=limit)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    st.download_button(
+        "⬇️ Baixar tabela (CSV)",
+        table.to_csv(index=False).encode("utf-8"),
+        file_name=f"historico_{selected}_{grain.lower()}.csv",
+        mime="text/csv",
+        key=f"history_csv_{selected}",
+    )
 
-st.divider()
+    st.divider()
+
+place_section("historico")
 
 # ============================================================
 # SALVAR AUTOMÁTICO + AÇÕES
 # ============================================================
-save_profile_state(
-    selected,
-    st.session_state.plans[selected],
-    st.session_state.exercise[selected],
-    st.session_state.weight[selected],
-    st.session_state.height_cm[selected],
-    st.session_state.activity_factor[selected],
-)
+@page_section("autosave", fragment=False)
+def autosave_section():
+    save_profile_state(
+        selected,
+        st.session_state.plans[selected],
+        st.session_state.exercise[selected],
+        st.session_state.weight[selected],
+        st.session_state.height_cm[selected],
+        st.session_state.activity_factor[selected],
+        session=st.session_state.sync[selected],
+    )
+    # Gravações de outras sessões entram depois das edições desta rerun (o merge compara com a
+    # base que esta sessão via, então a mesma célula editada dos dois lados vira conflito)
+    pulled_conflicts = pull_profile_changes(selected)
+    if pulled_conflicts is not None:
+        st.session_state.sync_conflicts[selected] = pulled_conflicts
+        st.rerun()
+
+place_section("autosave", on_page=False)
 
+instrument.section("acoes")
 a1, a2 = st.columns([1, 1])
 
 with a1:
@@ -641,14 +966,18 @@ with a1:
             st.session_state.weight[selected],
             st.session_state.height_cm[selected],
             st.session_state.activity_factor[selected],
+            session=st.session_state.sync[selected],
         )
         st.rerun()
 
 with a2:
-    if st.button("📋 Copiar do outro perfil"):
-        other = "Thayná" if selected == "Vitor" else "Vitor"
-        st.session_state.plans[selected] = st.session_state.plans[other].copy()
-        st.session_state.exercise[selected] = st.session_state.exercise[other].copy()
+    others = [p for p in PROFILES if p != selected]
+    other = st.selectbox("Copiar de", others, key=f"copy_from_{selected}") if others else None
+    if st.button("📋 Copiar do outro perfil", disabled=other is None):
+        ensure_profile_loaded(other)
+        # Mesmos frames (imutáveis): cada edição depois copia só as colunas que mudar
+        st.session_state.plans[selected] = st.session_state.plans[other]
+        st.session_state.exercise[selected] = st.session_state.exercise[other]
 
         save_profile_state(
             selected,
@@ -657,5 +986,40 @@ with a2:
             st.session_state.weight[selected],
             st.session_state.height_cm[selected],
             st.session_state.activity_factor[selected],
+            session=st.session_state.sync[selected],
         )
         st.rerun()
+
+# ============================================================
+# Depuração — tempo por seção (BODY_ASSISTANT_TIMING=1)
+# ============================================================
+rerun_timing = instrument.end_rerun()
+if rerun_profiler is not None:
+    st.session_state.last_rerun_profile = instrument.stop_profile(
+        rerun_profiler, DATA_DIR / "profiling" / f"rerun_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+    )
+
+if rerun_timing is not None:
+    with st.expander("⏱️ Depuração — tempo por seção"):
+        st.caption(f"Esta rerun: {rerun_timing['total_s'] * 1000:.1f} ms")
+        st.dataframe(
+            pd.DataFrame(
+                [(name, v * 1000) for name, v in rerun_timing["spans"].items()],
+                columns=["Seção", "Esta rerun (ms)"],
+            ),
+            hide_index=True,
+        )
+        st.markdown("**Acumulado do processo**")
+        st.dataframe(
+            pd.DataFrame([
+                {"Seção": name, "Chamadas": v["calls"], "Média (ms)": v["mean_s"] * 1000, "Máx. (ms)": v["max_s"] * 1000}
+                for name, v in instrument.timing_stats().items()
+            ]),
+            hide_index=True,
+        )
+        st.json({"contadores": instrument.counter_stats(), "caches": memo_stats()}, expanded=False)
+        if st.button("🔬 Perfilar a próxima rerun (cProfile)"):
+            st.session_state.profile_next_rerun = True
+            st.rerun()
+        if "last_rerun_profile" in st.session_state:
+            st.code(st.session_state.last_rerun_profile, language="text")
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    DATA_DIR ("data", relativo) dentro de um diretório temporário, sem journals em memória
+    de outros testes
+    """
+    from body_core import storage
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "_JOURNALS", {})
+    monkeypatch.setattr(storage, "_QUARANTINED", {})
+    path = tmp_path / "data"
+    path.mkdir()
+    return path
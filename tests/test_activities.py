@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+import pytest
+
+from body_core import activities
+from body_core.activities import get_activity_catalog, parse_activity_csv
+from body_core.summary import compute_exercise_calc
+
+CSV = b"""atividade;parametro;a_partir_de;met
+Corrida;velocidade;0;3,5
+Corrida;velocidade;8;9,8
+Corrida;velocidade;10;11,5
+Caminhada;inclinacao;0;3,5
+Caminhada;inclinacao;6;8
+Remo;intensidade;1;4
+Remo;intensidade;3;8,5
+"""
+
+
+def test_band_lookup_for_a_mixed_batch():
+    catalog = parse_activity_csv(CSV)
+    codes = catalog.codes(["Corrida", "Corrida", "Caminhada", "Remo", "Remo", "Natação"])
+    assert codes.tolist() == [0, 0, 1, 2, 2, -1]
+    met = catalog.met(codes, [9.0, 10.0, 0.0, 0.0, 0.0, 0.0], [0, 0, 6, 0, 0, 0], [2, 2, 2, 1, 3, 2])
+    assert met.tolist() == [9.8, 11.5, 8.0, 4.0, 8.5, 0.0]
+
+def test_stopped_run_and_unknown_intensity():
+    catalog = parse_activity_csv(CSV)
+    energy = catalog.energy(80.0, ["Corrida", "Remo"], [30, 30], [0.0, 0.0], [0, 0], ["Moderada", "???"])
+    assert energy["met"].tolist() == [0.0, 4.0]  # parada; intensidade desconhecida = Moderada (nível 2)
+
+def test_bad_csv_is_rejected():
+    with pytest.raises(ValueError):
+        parse_activity_csv(b"nome,met\nCorrida,9\n")
+    with pytest.raises(ValueError):
+        parse_activity_csv(b"atividade,parametro,a_partir_de,met\nCorrida,ritmo,0,9\n")
+
+def test_catalog_reload_invalidates_the_exercise_memo(data_dir):
+    ex = pd.DataFrame({
+        "Dia": ["Seg"], "Atividade": ["Corrida"], "Minutos": [60.0], "Distância (km)": [9.0],
+        "Inclinação (%)": [0.0], "Intensidade": ["Moderada"],
+    })
+    path = activities.ACTIVITIES_PATH
+    path.write_bytes(CSV)
+    assert get_activity_catalog().version[0] == str(path)
+    before = compute_exercise_calc(ex, 80.0)["MET (estim.)"].iloc[0]
+    path.write_bytes(CSV.replace(b"8;9,8", b"8;10,4"))
+    os.utime(path, ns=(path.stat().st_mtime_ns + 10**9,) * 2)
+    after = compute_exercise_calc(ex, 80.0)["MET (estim.)"].iloc[0]
+    assert (before, after) == (9.8, 10.4)
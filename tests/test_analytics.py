@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from body_core.analytics import History
+from body_core.plans import DAYS
+from body_core.profiles import DEFAULT_PROFILES
+
+PROFILE = DEFAULT_PROFILES["Vitor"]
+
+
+def _history(intakes):
+    weeks = [f"2026-W{10 + i:02d}" for i in range(len(intakes))]
+    mats = np.zeros((len(weeks), len(DAYS), 3))
+    mats[..., 0] = intakes
+    scalars = np.tile([PROFILE.weight_kg, PROFILE.default_height_cm, PROFILE.default_activity_factor], (len(weeks), 1))
+    return History(PROFILE, weeks, mats, scalars)
+
+def test_unlogged_days_do_not_count_as_adherent():
+    limit = PROFILE.daily_limit_kcal
+    history = _history([
+        [limit - 100, limit + 200, 0, 0, 0, 0, 0],  # 2 dias registrados, 1 no limite
+        [0] * len(DAYS),                            # semana sem registro
+        [limit] * len(DAYS),
+    ])
+    weekly = history.weekly
+    assert weekly["Dias registrados"].tolist() == [2, 0, 7]
+    assert weekly["Dias no limite"].tolist() == [1, 0, 7]
+    assert weekly["Aderência (%)"].iloc[0] == 50.0
+    assert np.isnan(weekly["Aderência (%)"].iloc[1])
+    assert weekly["Aderência (%)"].iloc[2] == 100.0
+    assert history.adherence() == round(8 / 9 * 100, 1)
+
+def test_rolling_and_periods_weight_adherence_by_logged_days():
+    limit = PROFILE.daily_limit_kcal
+    history = _history([[limit + 1, 0, 0, 0, 0, 0, 0], [limit] * len(DAYS)])
+    rolling = history.rolling(4)["Aderência (%) · 4 sem"]
+    assert rolling.tolist() == [0.0, round(7 / 8 * 100, 1)]
+    periods = history.periods("M")
+    assert periods["Aderência (%)"].tolist() == [round(7 / 8 * 100, 1)]
+    assert periods["Ingestão (kcal/dia)"].tolist() == [round((limit + 1 + limit * len(DAYS)) / 8)]
+
+def test_periods_intake_without_logged_days():
+    periods = _history([[0] * len(DAYS)]).periods("M")
+    assert periods["Dias registrados"].tolist() == [0]
+    assert pd.isna(periods["Ingestão (kcal/dia)"].iloc[0])
+
+def test_history_without_any_logged_day():
+    history = _history([[0] * len(DAYS)])
+    assert np.isnan(history.adherence())
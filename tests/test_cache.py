@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from body_core.cache import content_key, memoized
+from body_core.plans import init_week_plan
+
+
+def test_large_arrays_are_keyed_by_content():
+    a = np.zeros(10_000)
+    b = a.copy()
+    b[5_000] = 1.0  # fora do trecho que o repr mostra
+    assert repr(a) == repr(b)
+    assert content_key(a) != content_key(b)
+    assert content_key(a) == content_key(a.copy())
+    assert content_key(a) != content_key(a.astype(np.float32))
+    assert content_key(a) != content_key(a.reshape(100, 100))
+    assert content_key((1, a)) != content_key((1, b))
+
+def test_equal_frames_share_a_key():
+    df = pd.DataFrame({"x": [1, 2, 3]})
+    assert content_key(df) == content_key(df.copy())
+    assert content_key(df) != content_key(df.astype(float))
+
+def test_caller_mutation_does_not_reach_the_cache():
+    plan = init_week_plan("Vitor")
+    original = int(plan["Calorias (kcal)"].iloc[0])
+    plan.iloc[0, plan.columns.get_loc("Calorias (kcal)")] = original + 999
+    assert int(init_week_plan("Vitor")["Calorias (kcal)"].iloc[0]) == original
+
+def test_memoized_dict_is_private():
+    calls = []
+
+    @memoized("test_private_dict")
+    def build(n):
+        calls.append(n)
+        return {"n": n}
+
+    first = build(1)
+    first["n"] = 99
+    assert build(1) == {"n": 1}
+    assert calls == [1]
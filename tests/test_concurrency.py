@@ -0,0 +1,81 @@
+import pandas as pd
+
+from body_core.concurrency import Conflict, cell_changes, commit_profile_state, merge_changes
+from body_core.plans import init_exercise_df, init_week_plan
+from body_core.storage import VERSION_KEY, get_storage
+
+SCALARS = {"weight_kg": 80.0, "height_cm": 178, "activity_factor": 1.55}
+KCAL = "Calorias (kcal)"
+
+
+def _state(plan=None, scalars=None):
+    return (init_week_plan("Vitor") if plan is None else plan), init_exercise_df(), dict(scalars or SCALARS)
+
+def _edit(plan, **cells):
+    plan = plan.copy()
+    for rid, value in cells.items():
+        plan.at[int(rid[1:]), KCAL] = value
+    return plan
+
+def test_disjoint_edits_merge_without_conflict():
+    base = _state()
+    current = _state(_edit(base[0], r2=500))  # outra sessão mudou o rid 2
+    changes = cell_changes(base, _edit(base[0], r1=111), base[1], base[2])
+    records, conflicts = merge_changes(base, current, changes, {})
+    assert records == [["plan", 1, KCAL, 111]]
+    assert conflicts == []
+
+def test_same_cell_is_a_conflict_and_last_write_wins():
+    base = _state()
+    current = _state(_edit(base[0], r1=500))
+    changes = cell_changes(base, _edit(base[0], r1=111), base[1], base[2])
+    records, conflicts = merge_changes(base, current, changes, {})
+    assert records == [["plan", 1, KCAL, 111]]
+    assert conflicts == [Conflict("plan", 1, KCAL, 500, 111)]
+
+def test_own_earlier_write_is_not_a_conflict():
+    base = _state()
+    current = _state(_edit(base[0], r1=111))  # gravado antes por esta mesma sessão
+    changes = cell_changes(base, _edit(base[0], r1=222), base[1], base[2])
+    records, conflicts = merge_changes(base, current, changes, {("plan", 1, KCAL): 111})
+    assert records == [["plan", 1, KCAL, 222]] and conflicts == []
+
+def test_new_row_with_taken_rid_is_remapped():
+    base = _state()
+    new_rid = int(base[0].index.max()) + 1
+    row = base[0].loc[[1]].rename(index={1: new_rid})
+    theirs = pd.concat([base[0], row.assign(**{KCAL: 1})])
+    ours = pd.concat([base[0], row.assign(**{KCAL: 2})])
+    remap = {}
+    records, conflicts = merge_changes(base, _state(theirs), cell_changes(base, ours, base[1], base[2]), {}, remap)
+    assert remap == {("plan", new_rid): new_rid + 1}
+    assert {r[1] for r in records} == {new_rid + 1} and conflicts == []
+
+def test_edit_on_row_removed_elsewhere_is_dropped():
+    base = _state()
+    current = _state(base[0].drop(index=1))
+    changes = cell_changes(base, _edit(base[0], r1=111), base[1], base[2])
+    assert merge_changes(base, current, changes, {}) == ([], [])
+
+def test_commit_merges_two_sessions_from_the_same_base(data_dir):
+    first = commit_profile_state("Vitor", None, {}, *_state())
+    assert first.replaced and first.version == 1
+    base = get_storage().load("Vitor")
+
+    a = commit_profile_state("Vitor", base, {}, _edit(base[0], r1=111), base[1], base[2])
+    b = commit_profile_state("Vitor", base, {}, _edit(base[0], r2=222), base[1], {**base[2], "weight_kg": 79.0})
+    assert (a.version, b.version) == (2, 3)
+    assert a.conflicts == b.conflicts == []
+    plan, _, scalars = get_storage().load("Vitor")
+    assert plan.at[1, KCAL] == 111 and plan.at[2, KCAL] == 222
+    assert scalars["weight_kg"] == 79.0 and scalars[VERSION_KEY] == 3
+
+    c = commit_profile_state("Vitor", base, {}, _edit(base[0], r1=333), base[1], base[2])
+    assert c.conflicts == [Conflict("plan", 1, KCAL, 111, 333)]
+    assert get_storage().load("Vitor")[0].at[1, KCAL] == 333
+
+def test_commit_without_changes_keeps_the_version(data_dir):
+    commit_profile_state("Vitor", None, {}, *_state())
+    base = get_storage().load("Vitor")
+    result = commit_profile_state("Vitor", base, {}, *base)
+    assert result.version == 1 and not result.applied
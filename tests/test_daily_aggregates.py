@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from body_core.editing import EX_EDITABLE, PLAN_EDITABLE, EditorMerge, merge_editor_delta, merge_editor_rows
+from body_core.plans import DAYS, EXERCISE_ROW_DEFAULTS, init_week_plan
+from body_core.summary import DailyAggregates, compute_exercise_calc
+
+
+def _exercise():
+    return pd.DataFrame(
+        {"Dia": ["Seg", "Seg", "Qua"], "Atividade": ["Corrida", "Musculação", "Ciclismo"],
+         "Minutos": [30.0, 45.0, 60.0], "Distância (km)": [5.0, 0.0, 20.0],
+         "Inclinação (%)": [0.0, 0.0, 0.0], "Intensidade": ["Moderada", "Vigorosa", "Moderada"]},
+        index=pd.Index([1, 2, 3], name="rid"),
+    )
+
+def _fresh(plan, ex, weight_kg):
+    return DailyAggregates(plan, ex, compute_exercise_calc(ex, weight_kg), weight_kg)
+
+def test_incremental_updates_match_a_full_rebuild():
+    rng = random.Random(0)
+    plan, ex, weight_kg = init_week_plan("Vitor"), _exercise(), 80.0
+    agg = _fresh(plan, ex, weight_kg)
+    for step in range(60):
+        kind = rng.choice(["kcal", "macro", "minutes", "day", "add", "weight"])
+        plan_merge, ex_merge = EditorMerge(plan, {}), EditorMerge(ex, {})
+        plan_pos, ex_pos = rng.randrange(len(plan)), rng.randrange(len(ex))
+        if kind == "kcal":
+            plan_merge = merge_editor_delta(plan, plan.index, {plan_pos: {"Calorias (kcal)": rng.randrange(900)}}, PLAN_EDITABLE)
+        elif kind == "macro":
+            plan_merge = merge_editor_delta(plan, plan.index, {plan_pos: {"Proteína (g)": rng.randrange(80)}}, PLAN_EDITABLE)
+        elif kind == "minutes":
+            ex_merge = merge_editor_delta(ex, ex.index, {ex_pos: {"Minutos": float(rng.randrange(10, 90))}}, EX_EDITABLE)
+        elif kind == "day":
+            ex_merge = merge_editor_delta(ex, ex.index, {ex_pos: {"Dia": rng.choice(DAYS)}}, EX_EDITABLE)
+        elif kind == "add":
+            added = {"added_rows": [{"Dia": rng.choice(DAYS), "Atividade": "HIIT", "Minutos": 20.0}]}
+            ex_merge = merge_editor_rows(ex, ex.index, added, EX_EDITABLE, EXERCISE_ROW_DEFAULTS)
+        else:
+            weight_kg = round(weight_kg - 0.3, 1)
+        ex_calc = compute_exercise_calc(ex_merge.df, weight_kg)
+        assert agg.update(plan, plan_merge, ex, ex_merge, ex_calc, weight_kg), step
+        plan, ex = plan_merge.df, ex_merge.df
+        assert agg.matches(plan, ex, weight_kg)
+
+        full = _fresh(plan, ex, weight_kg)
+        assert agg.week_intake == full.week_intake and agg.week_ex == full.week_ex, (step, kind)
+        np.testing.assert_allclose(agg.week_macros, full.week_macros, atol=1e-3)
+        pd.testing.assert_frame_equal(agg.summary_frame(1500), full.summary_frame(1500))
+
+def test_frames_changed_elsewhere_need_a_rebuild():
+    plan, ex = init_week_plan("Vitor"), _exercise()
+    agg = _fresh(plan, ex, 80.0)
+    other = init_week_plan("Thayná")
+    merge = merge_editor_delta(other, other.index, {0: {"Calorias (kcal)": 1}}, PLAN_EDITABLE)
+    assert not agg.update_plan(other, merge)
+    assert not agg.matches(plan, ex, 81.0)
@@ -0,0 +1,61 @@
+from body_core.editing import EX_EDITABLE, PLAN_EDITABLE, merge_editor_delta, merge_editor_rows
+from body_core.plans import EXERCISE_ROW_DEFAULTS, init_exercise_df, init_week_plan
+
+
+def test_delta_applies_by_rid_not_position():
+    plan = init_week_plan("Vitor")
+    view = plan[plan["Dia"] == "Ter"]  # o editor mostra só a terça: posição 0 é o rid 6
+    merged = merge_editor_delta(plan, view.index, {0: {"Calorias (kcal)": 321}}, PLAN_EDITABLE)
+    assert merged.changes == {6: {"Calorias (kcal)": 321}}
+    assert merged.previous == {6: {"Calorias (kcal)": int(plan.at[6, "Calorias (kcal)"])}}
+    assert merged.df.at[6, "Calorias (kcal)"] == 321
+    assert merged.df.at[1, "Calorias (kcal)"] == plan.at[1, "Calorias (kcal)"]
+
+def test_base_frame_is_untouched_and_unedited_columns_are_shared():
+    plan = init_week_plan("Vitor")
+    before = plan["Calorias (kcal)"].tolist()
+    merged = merge_editor_delta(plan, plan.index, {2: {"Calorias (kcal)": 10}}, PLAN_EDITABLE)
+    assert plan["Calorias (kcal)"].tolist() == before
+    assert merged.df["Calorias (kcal)"].dtype == plan["Calorias (kcal)"].dtype
+    assert merged.df["Descrição"].equals(plan["Descrição"])
+
+def test_no_change_returns_the_same_frame():
+    plan = init_week_plan("Vitor")
+    same = int(plan["Calorias (kcal)"].iloc[0])
+    merged = merge_editor_delta(plan, plan.index, {0: {"Calorias (kcal)": same}, 99: {"Calorias (kcal)": 1}}, PLAN_EDITABLE)
+    assert merged.df is plan
+    assert not merged.changed
+
+def test_values_are_normalized_and_read_only_columns_ignored():
+    plan = init_week_plan("Vitor")
+    merged = merge_editor_delta(
+        plan, plan.index, {0: {"Calorias (kcal)": -50, "Descrição": None, "Dia": "Dom"}}, PLAN_EDITABLE,
+    )
+    assert merged.changes[1] == {"Calorias (kcal)": 0, "Descrição": ""}
+    assert merged.df.at[1, "Dia"] == plan.at[1, "Dia"]
+
+def test_rows_added_and_deleted():
+    ex = init_exercise_df()
+    first = merge_editor_rows(
+        ex, ex.index, {"added_rows": [{"Dia": "Seg", "Atividade": "Corrida", "Minutos": 30}, {"Dia": "Ter"}]},
+        EX_EDITABLE, EXERCISE_ROW_DEFAULTS,
+    )
+    assert first.reshaped
+    assert first.df.index.tolist() == [1, 2]
+    assert first.df.at[1, "Minutos"] == 30.0
+    assert first.df.at[2, "Atividade"] == EXERCISE_ROW_DEFAULTS["Atividade"]
+    second = merge_editor_rows(
+        first.df, first.df.index,
+        {"edited_rows": {1: {"Minutos": 45}}, "deleted_rows": [0], "added_rows": [{"Dia": "Qua"}]},
+        EX_EDITABLE, EXERCISE_ROW_DEFAULTS,
+    )
+    assert second.df.index.tolist() == [2, 3]
+    assert second.df.at[2, "Minutos"] == 45.0
+    assert second.changes == {2: {"Minutos": 45.0}}
+    assert list(second.df.dtypes) == list(ex.dtypes)
+
+def test_delta_keeps_float32_macros():
+    plan = init_week_plan("Vitor")
+    merged = merge_editor_delta(plan, plan.index, {0: {"Proteína (g)": 31.25}}, PLAN_EDITABLE)
+    assert merged.df["Proteína (g)"].dtype == "float32"
+    assert merged.changes == {1: {"Proteína (g)": round(31.25, 1)}}
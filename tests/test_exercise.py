@@ -0,0 +1,65 @@
+import numpy as np
+
+from body_core.activities import SEED_ACTIVITIES_PATH, parse_activity_csv
+from body_core.exercise import (
+    RUN_MIN_SPEED_KMH, RUN_SPEED_EDGES_KMH, calc_running_kcal, calc_running_kcal_batch,
+    kcal_from_met_batch, running_met_batch,
+)
+
+
+def _met_ladder(speed_kmh):
+    # O if encadeado que o lookup por faixa substituiu
+    v = max(0.0, float(speed_kmh))
+    if v <= 0.1:
+        return 0.0
+    if v < 5.0:
+        return 3.5
+    if v < 6.5:
+        return 5.0
+    if v < 8.0:
+        return 7.0
+    if v < 10.0:
+        return 9.8
+    if v < 12.0:
+        return 11.5
+    return 12.8
+
+def _kcal_ladder(weight_kg, distance_km, minutes):
+    minutes, distance_km = max(0.0, float(minutes)), max(0.0, float(distance_km))
+    if minutes <= 0.0 or distance_km <= 0.0:
+        return 0.0, 0.0, 0.0
+    speed = distance_km / (minutes / 60.0)
+    met = _met_ladder(speed)
+    return met * 3.5 * float(weight_kg) / 200.0 * minutes, speed, met
+
+EDGES = [-1.0, 0.0, RUN_MIN_SPEED_KMH, np.nextafter(RUN_MIN_SPEED_KMH, 1.0)] + [
+    v for edge in RUN_SPEED_EDGES_KMH for v in (np.nextafter(edge, 0.0), edge, np.nextafter(edge, 99.0))
+] + [9.0, 30.0]
+
+
+def test_met_bands_match_the_ladder_at_the_edges():
+    assert running_met_batch(EDGES).tolist() == [_met_ladder(v) for v in EDGES]
+
+def test_batch_matches_the_ladder_on_a_random_sample():
+    rng = np.random.default_rng(0)
+    km = np.round(rng.uniform(-1, 20, 2000), 2)
+    minutes = np.round(rng.uniform(-5, 120, 2000), 1)
+    minutes[:50] = 0.0
+    weight = rng.uniform(40, 150, 2000)
+    kcal, speed, met = calc_running_kcal_batch(weight, km, minutes)
+    expected = np.array([_kcal_ladder(w, d, m) for w, d, m in zip(weight, km, minutes)])
+    np.testing.assert_allclose(kcal, expected[:, 0], rtol=1e-12)
+    np.testing.assert_allclose(speed, expected[:, 1], rtol=1e-12)
+    assert met.tolist() == expected[:, 2].tolist()
+    assert calc_running_kcal(80.0, 10.0, 60.0) == _kcal_ladder(80.0, 10.0, 60.0)
+
+def test_kcal_from_met_clips_negatives():
+    assert kcal_from_met_batch(80.0, [-10, 30], [6.0, -1.0]).tolist() == [0.0, 0.0]
+    assert kcal_from_met_batch(80.0, 30, 6.0) == 6.0 * 3.5 * 80.0 / 200.0 * 30
+
+def test_run_bands_match_the_seed_catalog():
+    catalog = parse_activity_csv(SEED_ACTIVITIES_PATH.read_bytes())
+    speeds = np.array(EDGES[2:])
+    codes = catalog.codes(["Corrida"] * len(speeds))
+    met = catalog.met(codes, speeds, np.zeros(len(speeds)), np.full(len(speeds), 2))
+    assert met.tolist() == running_met_batch(speeds).tolist()
@@ -0,0 +1,49 @@
+import numpy as np
+
+from body_core import foods
+
+CSV = """nome;energia kcal;proteína;carboidrato;lipídeos
+Frango peito grelhado;159;32,0;0;2,5
+Frango coxa assada;215;28,0;0;11,0
+Batata doce cozida;77;0,6;18,4;0,1
+Pão francês;300;8,0;58,6;3,1
+""".encode()
+
+
+def _catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(foods, "INDEX_CACHE_DIR", tmp_path / "cache")
+    csv_path = tmp_path / "foods.csv"
+    csv_path.write_bytes(CSV)
+    return csv_path, foods.build_or_load_index(csv_path)
+
+def test_prefix_and_accent_insensitive_search(tmp_path, monkeypatch):
+    _, catalog = _catalog(tmp_path, monkeypatch)
+    assert [catalog.names[i] for i in catalog.search("frang")] == ["Frango coxa assada", "Frango peito grelhado"]
+    assert [catalog.names[i] for i in catalog.search("pao fr")] == ["Pão francês"]
+    food = catalog.food(catalog.search("batata doce")[0])
+    assert food.kcal_for(200) == 154
+    assert food.macros_for(100) == [0.6, 18.4, 0.1, 0.0]
+
+def test_fuzzy_search_finds_typos(tmp_path, monkeypatch):
+    _, catalog = _catalog(tmp_path, monkeypatch)
+    assert catalog.names[catalog.search("frnago grelhdo")[0]] == "Frango peito grelhado"
+    assert catalog.search("") == []
+
+def test_cached_index_matches_fresh_build(tmp_path, monkeypatch):
+    csv_path, built = _catalog(tmp_path, monkeypatch)
+    cached = foods.build_or_load_index(csv_path)
+    assert cached is not built
+    assert cached.names == built.names and cached.trigrams == built.trigrams
+    np.testing.assert_array_equal(cached.kcal_g, built.kcal_g)
+    assert cached.search("frnago") == built.search("frnago")
+
+def test_mismatched_or_unreadable_cache_is_rebuilt(tmp_path, monkeypatch):
+    csv_path, _ = _catalog(tmp_path, monkeypatch)
+    (cache_path,) = (tmp_path / "cache").iterdir()
+    # Cache de outro CSV com o nome deste: o hash gravado no arquivo não confere
+    other = foods.parse_food_csv(b"nome,kcal\nArroz,130\n")
+    np.savez(cache_path, format=np.int64(foods.INDEX_FORMAT), source=np.array("outro"), **other.to_arrays())
+    assert len(foods.build_or_load_index(csv_path)) == 4
+    cache_path.write_bytes(b"lixo")
+    assert len(foods.build_or_load_index(csv_path)) == 4
+    assert len(foods.build_or_load_index(csv_path)) == 4  # regravado
@@ -0,0 +1,7 @@
+from body_core.importcheck import IMPORT_BUDGET_MS, measure
+
+
+def test_calculators_import_within_budget():
+    result = measure()
+    assert result["heavy"] == [], f"módulos pesados no import: {result['heavy']}"
+    assert result["ms"] <= IMPORT_BUDGET_MS, f"{result['ms']:.1f} ms > {IMPORT_BUDGET_MS:.0f} ms"
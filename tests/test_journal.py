@@ -0,0 +1,90 @@
+import json
+
+from body_core import storage
+from body_core.editing import set_cells
+from body_core.paths import journal_path, state_path
+from body_core.plans import init_week_plan
+from body_core.storage import ProfileJournal
+
+SCALARS = {"weight_kg": 80.0, "height_cm": 178, "activity_factor": 1.55}
+
+
+def _journal():
+    return ProfileJournal(state_path("Vitor"), journal_path("Vitor"))
+
+def _exercise():
+    import pandas as pd
+
+    return pd.DataFrame(
+        {"Dia": ["Seg"], "Atividade": ["Corrida"], "Minutos": [30.0], "Distância (km)": [5.0],
+         "Inclinação (%)": [0.0], "Intensidade": ["Moderada"]},
+        index=pd.Index([1], name="rid"),
+    )
+
+def test_edit_is_appended_and_replayed(data_dir):
+    plan, ex = init_week_plan("Vitor"), _exercise()
+    writer = _journal()
+    writer.write(plan, ex, SCALARS)  # primeira escrita: snapshot
+    assert not journal_path("Vitor").exists()
+
+    edited = set_cells(plan, "Calorias (kcal)", [3], [777])
+    writer.write(edited, ex, {**SCALARS, "weight_kg": 79.5})
+    lines = [json.loads(line) for line in journal_path("Vitor").read_text(encoding="utf-8").splitlines()]
+    assert ["plan", 3, "Calorias (kcal)", 777] in lines
+    assert ["profile", None, "weight_kg", 79.5] in lines
+    assert lines[-1] == ["profile", None, "version", 2]
+
+    loaded_plan, _, scalars = _journal().load()
+    assert loaded_plan.at[3, "Calorias (kcal)"] == 777
+    assert loaded_plan["Calorias (kcal)"].dtype == plan["Calorias (kcal)"].dtype
+    assert scalars["weight_kg"] == 79.5 and scalars["version"] == 2
+
+def test_rows_added_and_removed_survive_replay(data_dir):
+    plan, ex = init_week_plan("Vitor"), _exercise()
+    writer = _journal()
+    writer.write(plan, ex, SCALARS)
+    more = ex.copy()
+    more.loc[2] = ["Ter", "Musculação", 45.0, 0.0, 0.0, "Vigorosa"]
+    writer.write(plan, more, SCALARS)
+    writer.write(plan, more.drop(index=[1]), SCALARS)
+
+    _, loaded_ex, scalars = _journal().load()
+    assert loaded_ex.index.tolist() == [2]
+    assert loaded_ex.at[2, "Atividade"] == "Musculação"
+    assert loaded_ex.at[2, "Minutos"] == 45.0
+    assert scalars["version"] == 3
+
+def test_open_batch_and_torn_line_are_ignored(data_dir):
+    plan, ex = init_week_plan("Vitor"), _exercise()
+    first = _journal()
+    first.write(plan, ex, SCALARS)
+    plan = set_cells(plan, "Calorias (kcal)", [2], [222])
+    first.write(plan, ex, SCALARS)
+    with open(journal_path("Vitor"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(["plan", 1, "Calorias (kcal)", 1]) + "\n")  # lote sem o registro de versão
+        f.write('["plan", 2, "Calorias')  # append interrompido
+    loaded_plan, _, scalars = _journal().load()
+    assert loaded_plan.at[1, "Calorias (kcal)"] == plan.at[1, "Calorias (kcal)"]
+    assert loaded_plan.at[2, "Calorias (kcal)"] == 222
+    assert scalars["version"] == 2
+
+    # A próxima escrita corta a linha incompleta antes de acrescentar
+    writer = _journal()
+    writer.load()
+    writer.write(set_cells(plan, "Calorias (kcal)", [4], [444]), ex, SCALARS)
+    loaded_plan, _, _ = _journal().load()
+    assert loaded_plan.at[4, "Calorias (kcal)"] == 444
+
+def test_compaction_folds_the_journal_into_the_snapshot(data_dir, monkeypatch):
+    monkeypatch.setattr(storage, "JOURNAL_COMPACT_BYTES", 200)
+    plan, ex = init_week_plan("Vitor"), _exercise()
+    writer = _journal()
+    writer.write(plan, ex, SCALARS)
+    for i in range(5):
+        plan = set_cells(plan, "Calorias (kcal)", [1 + i], [100 + i])
+        writer.write(plan, ex, SCALARS)
+    # O snapshot foi reescrito no caminho e o journal não passa do limite
+    assert json.loads(state_path("Vitor").read_text(encoding="utf-8"))["version"] > 1
+    assert not journal_path("Vitor").exists() or journal_path("Vitor").stat().st_size <= 200
+    loaded_plan, _, _ = _journal().load()
+    assert loaded_plan["Calorias (kcal)"].iloc[:5].tolist() == [100, 101, 102, 103, 104]
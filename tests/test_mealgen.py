@@ -0,0 +1,42 @@
+import numpy as np
+
+from body_core.mealgen import DishPool, generate_week_plans, get_dish_pool
+from body_core.plans import DAYS, MEALS
+
+LIMITS = [1300, 1500, 1800, 2000, 2400]
+FEASIBLE = LIMITS[:-1]  # em 2400 o cardápio-semente só fecha o total repetindo o almoço
+TOLERANCE = 50
+
+
+def _dishes(pool, plan):
+    by_description = {pool.describe(o): int(pool.opt_dish[o]) for o in range(len(pool.opt_dish))}
+    return np.array([by_description[d] for d in plan["Descrição"]]).reshape(len(DAYS), len(MEALS))
+
+def test_daily_totals_within_tolerance_below_the_limit():
+    for limit, plan in zip(LIMITS, generate_week_plans(LIMITS, tolerance_kcal=TOLERANCE)):
+        totals = plan.groupby("Dia", sort=False)["Calorias (kcal)"].sum()
+        assert list(totals.index) == list(DAYS)
+        assert ((totals <= limit) & (totals >= limit - TOLERANCE)).all(), (limit, totals.tolist())
+
+def test_weekly_limit_and_no_repeat_on_consecutive_days():
+    pool = get_dish_pool()
+    for plan in generate_week_plans(FEASIBLE, pool, seed=3):
+        dishes = _dishes(pool, plan)
+        counts = np.bincount(dishes.ravel(), minlength=len(pool))
+        assert (counts <= pool.max_week).all()
+        limited = pool.max_week < len(DAYS)
+        for today, tomorrow in zip(dishes[:-1], dishes[1:]):
+            repeated = np.intersect1d(today, tomorrow)
+            assert not limited[repeated].any()
+
+def test_plans_have_the_week_layout():
+    batch = generate_week_plans([1500, 1800], seed=7)
+    assert all(len(plan) == len(DAYS) * len(MEALS) for plan in batch)
+    assert list(batch[0].index) == list(range(1, len(DAYS) * len(MEALS) + 1))
+
+def test_describe_formats_only_the_portion():
+    pool = DishPool(MEALS, [f"Prato 1.5 {m}" for m in MEALS], [300] * len(MEALS), [2] * len(MEALS))
+    half = int(np.flatnonzero((pool.opt_dish == 0) & (pool.opt_portion == 1.5))[0])
+    whole = int(np.flatnonzero((pool.opt_dish == 0) & (pool.opt_portion == 1.0))[0])
+    assert pool.describe(half) == f"Prato 1.5 {MEALS[0]} (porção ×1,5)"
+    assert pool.describe(whole) == f"Prato 1.5 {MEALS[0]}"
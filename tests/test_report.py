@@ -0,0 +1,90 @@
+import os
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import synthetic_exercise, synthetic_plan, write_profile_dir
+from body_core.columnar import json_to_arrow, write_arrow_state
+from body_core.paths import arrow_paths
+from body_core.report import WEEK_ROW, newer_backends, run_report
+from body_core.storage import SqliteStorage
+
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+def _report(data_dir, backend):
+    writer = ListWriter()
+    stats = run_report(data_dir, writer, workers=1, backend=backend)
+    week = {r[0]: r for r in writer.rows if r[1] == WEEK_ROW}
+    return stats, week
+
+def test_json_profiles(tmp_path):
+    profiles = write_profile_dir(tmp_path, 3)
+    stats, week = _report(tmp_path, "json")
+    assert stats == {"profiles": 3, "rows": 3 * 8, "skipped": 0}
+    assert sorted(week) == sorted(p.name for p in profiles)
+
+def test_arrow_only_data_dir(tmp_path):
+    write_profile_dir(tmp_path, 3)
+    json_to_arrow(tmp_path)
+    for p in tmp_path.glob("state_*.json"):
+        p.unlink()
+    stats, _ = _report(tmp_path, "arrow")
+    assert stats == {"profiles": 3, "rows": 3 * 8, "skipped": 0}
+
+def test_newest_file_format_wins(tmp_path):
+    profiles = write_profile_dir(tmp_path, 1)
+    _, before = _report(tmp_path, "json")
+    plan = synthetic_plan(1).assign(**{"Calorias (kcal)": 100})
+    scalars = {"weight_kg": 70.0, "height_cm": 170, "activity_factor": 1.2, "version": 2}
+    write_arrow_state(*arrow_paths(profiles[0].name, tmp_path), plan, synthetic_exercise(1), scalars)
+    _, after = _report(tmp_path, "json")
+    assert after[profiles[0].name][2] == 100 * len(plan) != before[profiles[0].name][2]
+
+    # Voltando para o JSON: o snapshot mais novo vale de novo
+    snapshot = tmp_path / "state_perfil_0.json"
+    os.utime(snapshot, ns=(snapshot.stat().st_mtime_ns + 10**9,) * 2)
+    _, again = _report(tmp_path, "json")
+    assert again == before
+
+def test_sqlite_backend(tmp_path):
+    profiles = write_profile_dir(tmp_path, 2)
+    db = SqliteStorage(tmp_path / "bodyassistant.db")
+    plan = synthetic_plan(1).assign(**{"Calorias (kcal)": 200})
+    db.write(profiles[0].name, plan, synthetic_exercise(1), {"weight_kg": 75.0, "height_cm": 175, "activity_factor": 1.4})
+    stats, week = _report(tmp_path, "sqlite")
+    assert stats["profiles"] == 2
+    assert week[profiles[0].name][2] == 200 * len(plan)  # do banco
+    _, from_files = _report(tmp_path, "json")
+    assert week[profiles[1].name] == from_files[profiles[1].name]  # fora do banco: dos arquivos
+    assert newer_backends(tmp_path, "json") == ["sqlite"]
+    assert newer_backends(tmp_path, "sqlite") == []
+
+def test_profile_without_state_is_skipped(tmp_path):
+    write_profile_dir(tmp_path, 2)
+    (tmp_path / "state_perfil_1.json").unlink()
+    stats, week = _report(tmp_path, "json")
+    assert stats == {"profiles": 1, "rows": 8, "skipped": 1}
+    assert list(week) == ["Perfil 0"]
+
+def test_report_leaves_data_dir_untouched(tmp_path):
+    write_profile_dir(tmp_path, 2)
+    (tmp_path / "profiles.json").unlink()
+    before = sorted(p.name for p in tmp_path.iterdir())
+    stats, _ = _report(tmp_path, "sqlite")  # sem banco: arquivos, sem criar o banco
+    assert stats["skipped"] == 2  # perfis padrão, sem estado salvo aqui
+    assert sorted(p.name for p in tmp_path.iterdir()) == before
+
+def test_sqlite_opened_read_only(tmp_path):
+    profiles = write_profile_dir(tmp_path, 1)
+    db = SqliteStorage(tmp_path / "bodyassistant.db")
+    db.write(profiles[0].name, synthetic_plan(1), synthetic_exercise(1), {"weight_kg": 75.0, "height_cm": 175, "activity_factor": 1.4})
+    reader = SqliteStorage(tmp_path / "bodyassistant.db", read_only=True)
+    assert reader.read_latest(profiles[0].name) is not None
+    with pytest.raises(sqlite3.OperationalError):
+        reader._conn.execute("DELETE FROM plan_entries")
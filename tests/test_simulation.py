@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from body_core.simulation import scenario_sweep
+from body_core.summary import compute_exercise_calc
+
+
+def _week(weight_kg, run_km, run_min, strength_min, intensity):
+    ex = pd.DataFrame({
+        "Dia": ["Seg", "Ter"],
+        "Atividade": ["Corrida", "Musculação"],
+        "Minutos": [run_min, strength_min],
+        "Distância (km)": [run_km, 0.0],
+        "Inclinação (%)": [0.0, 0.0],
+        "Intensidade": ["Moderada", intensity],
+    })
+    return compute_exercise_calc(ex, weight_kg)["Gasto (kcal)"].sum()
+
+def test_sweep_matches_the_exercise_table():
+    for intensity in ("Leve", "Moderada", "Vigorosa"):
+        sweep = scenario_sweep(
+            "M", 35, 178, 14000, [1.55], [80.0], [30.0], [180.0], run_speed_kmh=10.5, strength_intensity=intensity,
+        )
+        expected = _week(80.0, 30.0, 30.0 / 10.5 * 60.0, 180.0, intensity)
+        assert abs(sweep["Exercício semanal (kcal)"].iloc[0] - expected) <= 1
+
+def test_sweep_without_exercise():
+    sweep = scenario_sweep("F", 30, 165, 10000, [1.2, 1.55], np.arange(60, 63), [0], [0])
+    assert len(sweep) == 6
+    assert (sweep["Exercício semanal (kcal)"] == 0).all()
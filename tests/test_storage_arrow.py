@@ -0,0 +1,32 @@
+from benchmarks.synthetic import synthetic_exercise, write_profile_dir
+from body_core import storage
+from body_core.columnar import ArrowStorage, json_to_arrow
+from body_core.paths import arrow_paths
+from body_core.plans import init_exercise_df, init_week_plan
+
+SCALARS = {"weight_kg": 80.0, "height_cm": 178, "activity_factor": 1.55}
+
+
+def test_unreadable_arrow_is_quarantined(data_dir):
+    ArrowStorage().write("Vitor", init_week_plan("Vitor"), init_exercise_df(), SCALARS)
+    plan_path, _ = arrow_paths("Vitor")
+    plan_path.write_bytes(b"not arrow")
+    assert ArrowStorage().load("Vitor") is None
+    assert sorted(p.name for p in storage.quarantined_files("Vitor")) == [
+        "state_vitor.exercise.arrow.corrupt", "state_vitor.plan.arrow.corrupt",
+    ]
+
+def test_sqlite_imports_arrow_states(tmp_path):
+    profiles = write_profile_dir(tmp_path, 2)
+    json_to_arrow(tmp_path)
+    for p in tmp_path.glob("state_*.json"):
+        p.unlink()
+    db = storage.SqliteStorage(tmp_path / "bodyassistant.db")
+    assert storage.import_json_states(db, tmp_path) == sorted(p.name for p in profiles)
+    plan, _, scalars = db.read_latest(profiles[0].name)
+    assert len(plan) > 0 and scalars["weight_kg"] == profiles[0].weight_kg
+
+def test_watch_met_roundtrip(data_dir):
+    ex = synthetic_exercise(1).assign(**{"MET (relógio)": 9.25})
+    ArrowStorage().write("Vitor", init_week_plan("Vitor"), ex, SCALARS)
+    assert ArrowStorage().load("Vitor")[1]["MET (relógio)"].tolist() == [9.25] * len(ex)
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from benchmarks.synthetic import synthetic_exercise
+from body_core import storage
+from body_core.paths import journal_path, state_path
+from body_core.plans import init_exercise_df, init_week_plan
+
+SCALARS = {"weight_kg": 80.0, "height_cm": 178, "activity_factor": 1.55}
+
+
+def test_roundtrip(data_dir):
+    plan = init_week_plan("Vitor")
+    storage.JsonStorage().write("Vitor", plan, init_exercise_df(), SCALARS)
+    loaded_plan, _, scalars = storage.JsonStorage().load("Vitor")
+    assert loaded_plan["Calorias (kcal)"].tolist() == plan["Calorias (kcal)"].tolist()
+    assert scalars["weight_kg"] == 80.0
+
+def test_unreadable_snapshot_is_quarantined(data_dir):
+    state_path("Vitor").write_text("{ não é json", encoding="utf-8")
+    assert storage.JsonStorage().load("Vitor") is None
+    assert not state_path("Vitor").exists()
+    assert [p.name for p in storage.quarantined_files("Vitor")] == ["state_vitor.json.corrupt"]
+
+def test_code_error_keeps_the_file(data_dir, monkeypatch):
+    storage.JsonStorage().write("Vitor", init_week_plan("Vitor"), init_exercise_df(), SCALARS)
+    storage._JOURNALS.clear()
+
+    def broken(df):
+        raise KeyError("bug")
+
+    monkeypatch.setattr(storage, "as_macro_plan", broken)
+    with pytest.raises(KeyError):
+        storage.JsonStorage().load("Vitor")
+    assert state_path("Vitor").exists()
+    assert storage.quarantined_files("Vitor") == []
+
+def test_journal_without_snapshot(data_dir):
+    journal_path("Vitor").write_text(json.dumps(["profile", None, "weight_kg", 79.0]) + "\n", encoding="utf-8")
+    assert storage.JsonStorage().load("Vitor") is None
+    assert not journal_path("Vitor").exists()
+    assert [p.name for p in storage.quarantined_files("Vitor")] == ["state_vitor.journal.jsonl.corrupt"]
+
+def test_exercise_written_before_watch_met(data_dir, monkeypatch):
+    storage.JsonStorage().write("Vitor", init_week_plan("Vitor"), synthetic_exercise(1), SCALARS)
+    payload = json.loads(state_path("Vitor").read_text(encoding="utf-8"))
+    for row in payload["exercise"]:
+        del row["MET (relógio)"]
+    state_path("Vitor").write_text(json.dumps(payload), encoding="utf-8")
+    monkeypatch.setattr(storage, "_JOURNALS", {})
+    _, ex, _ = storage.JsonStorage().load("Vitor")
+    assert len(ex) == len(synthetic_exercise(1)) and ex["MET (relógio)"].eq(0).all()
@@ -0,0 +1,58 @@
+import pytest
+
+from benchmarks.synthetic import synthetic_exercise, write_profile_dir
+from body_core import storage
+from body_core.columnar import ArrowStorage
+from body_core.paths import arrow_paths, state_path
+from body_core.plans import init_exercise_df, init_week_plan
+
+SCALARS = {"weight_kg": 80.0, "height_cm": 178, "activity_factor": 1.55}
+
+
+@pytest.fixture
+def db(data_dir):
+    return storage.SqliteStorage(data_dir / "data" / "bodyassistant.db")
+
+def test_imports_the_json_state_on_first_load(db):
+    storage.JsonStorage().write("Vitor", init_week_plan("Vitor"), init_exercise_df(), SCALARS)
+    plan, _, scalars = db.load("Vitor")
+    assert len(plan) == len(init_week_plan("Vitor")) and scalars["weight_kg"] == 80.0
+
+def test_unreadable_snapshot_is_quarantined(db):
+    state_path("Vitor").write_text("{ não é json", encoding="utf-8")
+    assert db.load("Vitor") is None
+    assert not state_path("Vitor").exists()
+    assert [p.name for p in storage.quarantined_files("Vitor")] == ["state_vitor.json.corrupt"]
+
+def test_unreadable_arrow_is_quarantined(db):
+    ArrowStorage().write("Vitor", init_week_plan("Vitor"), init_exercise_df(), SCALARS)
+    arrow_paths("Vitor")[0].write_bytes(b"not arrow")
+    assert db.load("Vitor") is None
+    assert len(storage.quarantined_files("Vitor")) == 2
+
+def test_non_utf8_snapshot_is_quarantined(db):
+    state_path("Vitor").write_bytes(b'{"plan": "\xff"}')
+    assert db.load("Vitor") is None
+    assert [p.name for p in storage.quarantined_files("Vitor")] == ["state_vitor.json.corrupt"]
+
+def test_import_skips_unreadable_profiles(data_dir, tmp_path):
+    profiles = write_profile_dir(tmp_path, 3)
+    broken = tmp_path / "state_perfil_1.json"
+    broken.write_text("{ não é json", encoding="utf-8")
+    db = storage.SqliteStorage(tmp_path / "bodyassistant.db")
+    imported = storage.import_json_states(db, tmp_path)
+    assert imported == [profiles[0].name, profiles[2].name]
+    assert (tmp_path / "state_perfil_1.json.corrupt").exists()
+
+def test_watch_met_roundtrip_and_migration(data_dir):
+    path = data_dir / "bodyassistant.db"
+    ex = synthetic_exercise(1).assign(**{"MET (relógio)": 9.25})
+    db = storage.SqliteStorage(path)
+    db.write("Vitor", init_week_plan("Vitor"), ex, SCALARS)
+    assert db.read_latest("Vitor")[1]["MET (relógio)"].tolist() == [9.25] * len(ex)
+
+    # Banco de antes da coluna: a abertura a acrescenta, 0 (pelo catálogo) nas linhas gravadas
+    db._conn.execute("ALTER TABLE activity_sessions DROP COLUMN watch_met")
+    db._conn.close()
+    assert storage.SqliteStorage(path, read_only=True).read_latest("Vitor")[1]["MET (relógio)"].eq(0).all()
+    assert storage.SqliteStorage(path).read_latest("Vitor")[1]["MET (relógio)"].eq(0).all()
@@ -0,0 +1,187 @@
+import gzip
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from body_core import tracks
+from body_core.editing import EX_EDITABLE, merge_editor_rows
+from body_core.exercise import RUN_SPEED_EDGES_KMH, running_met_batch
+from body_core.plans import EXERCISE_ROW_DEFAULTS
+from body_core.summary import compute_exercise_calc
+from body_core.tracks import RunSummary, read_run, runs_by_date, week_run_rows
+
+M_PER_DEG_LAT = tracks.EARTH_RADIUS_M * np.pi / 180.0
+START = datetime(2026, 3, 9, 23, 50, tzinfo=timezone.utc)  # segunda, 23:50 UTC
+
+
+def _points(speeds_kmh, step_s=5.0, start=START):
+    """
+    (horário, lat, lon, distância acumulada em m) de uma reta para o norte, um segmento
+    de step_s por velocidade
+    """
+    t, lat, dist = start, -23.5, 0.0
+    out = [(t, lat, -46.6, dist)]
+    for kmh in speeds_kmh:
+        meters = kmh / 3.6 * step_s
+        t, lat, dist = t + timedelta(seconds=step_s), lat + meters / M_PER_DEG_LAT, dist + meters
+        out.append((t, lat, -46.6, dist))
+    return out
+
+def _gpx(points):
+    pts = "".join(
+        f'<trkpt lat="{lat:.9f}" lon="{lon:.9f}"><ele>760</ele><time>{t.strftime("%Y-%m-%dT%H:%M:%SZ")}</time></trkpt>'
+        for t, lat, lon, _ in points
+    )
+    return f'<?xml version="1.0"?><gpx xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>{pts}</trkseg></trk></gpx>'
+
+def _tcx(points, tz):
+    pts = "".join(
+        f"<Trackpoint><Time>{t.astimezone(tz).isoformat()}</Time><Position><LatitudeDegrees>{lat:.9f}</LatitudeDegrees>"
+        f"<LongitudeDegrees>{lon:.9f}</LongitudeDegrees></Position><DistanceMeters>{d:.3f}</DistanceMeters></Trackpoint>"
+        for t, lat, lon, d in points
+    )
+    return (
+        '<?xml version="1.0"?><TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">'
+        f"<Activities><Activity Sport=\"Running\"><Lap><Track>{pts}</Track></Lap></Activity></Activities>"
+        "</TrainingCenterDatabase>"
+    )
+
+def _expected(speeds_kmh, step_s=5.0):
+    speeds = np.asarray(speeds_kmh, dtype=float)
+    minutes = np.full(len(speeds), step_s / 60.0)
+    return speeds @ minutes / 60.0, minutes.sum(), running_met_batch(speeds) @ minutes
+
+def test_gpx_segments_speed_and_met(tmp_path):
+    speeds = [8.5] * 40 + [11.5] * 40 + [14.5] * 20
+    path = tmp_path / "treino.gpx"
+    path.write_text(_gpx(_points(speeds)))
+    run = read_run(path)
+    km, minutes, met_min = _expected(speeds)
+    assert run.points == len(speeds) + 1
+    assert run.distance_km == pytest.approx(km, rel=1e-6)
+    assert run.moving_min == pytest.approx(minutes)
+    assert run.met_min == pytest.approx(met_min, rel=1e-6)
+    bands = np.bincount(np.searchsorted(RUN_SPEED_EDGES_KMH, speeds, side="right"), minlength=len(run.band_min))
+    assert np.allclose(run.band_min, bands * 5.0 / 60.0)
+
+def test_pauses_and_gps_jumps_are_not_moving(tmp_path):
+    points = _points([10.0] * 12)
+    # pausa maior que MAX_GAP_S, depois um salto de GPS (velocidade acima de MAX_SPEED_KMH)
+    t, lat, lon, _ = points[-1]
+    points.append((t + timedelta(seconds=tracks.MAX_GAP_S + 30), lat + 10 / M_PER_DEG_LAT, lon, float("nan")))
+    t, lat, lon, _ = points[-1]
+    points.append((t + timedelta(seconds=5), lat + 500 / M_PER_DEG_LAT, lon, float("nan")))
+    path = tmp_path / "pausa.gpx"
+    path.write_text(_gpx(points))
+    run = read_run(path)
+    assert run.moving_min == pytest.approx(1.0)
+    assert run.distance_km == pytest.approx(10.0 / 60.0, rel=1e-6)
+
+def test_chunks_match_one_pass(tmp_path, monkeypatch):
+    speeds = list(np.linspace(7.0, 16.0, 101))
+    path = tmp_path / "treino.gpx"
+    path.write_text(_gpx(_points(speeds)))
+    whole = read_run(path)
+    monkeypatch.setattr(tracks, "CHUNK_POINTS", 7)
+    chunked = read_run(path)
+    assert chunked.points == whole.points
+    assert chunked.distance_km == pytest.approx(whole.distance_km)
+    assert chunked.met_min == pytest.approx(whole.met_min)
+    assert np.allclose(chunked.band_min, whole.band_min)
+
+def test_tcx_uses_recorded_distance_and_offset(tmp_path):
+    speeds = [12.5] * 60
+    path = tmp_path / "treino.tcx.gz"
+    path.write_bytes(gzip.compress(_tcx(_points(speeds), timezone(timedelta(hours=-3))).encode()))
+    run = read_run(path)
+    km, minutes, met_min = _expected(speeds)
+    assert run.distance_km == pytest.approx(km, rel=1e-6)
+    assert run.met_min == pytest.approx(met_min, rel=1e-6)
+    # 23:50 UTC = 20:50 em -03:00: o dia é o do relógio
+    assert run.utc_offset_s == -3 * 3600
+    assert run.date == date(2026, 3, 9)
+
+def test_csv_with_semicolons_and_decimal_commas(tmp_path):
+    speeds = [9.0] * 30
+    rows = ["timestamp;latitude;longitude;distancia_m"] + [
+        f"{t.timestamp():.0f};{lat:.9f};{lon:.9f};{d:.3f}".replace(".", ",") for t, lat, lon, d in _points(speeds)
+    ]
+    path = tmp_path / "treino.csv"
+    path.write_text("\n".join(rows), encoding="utf-8")
+    run = read_run(path)
+    km, minutes, met_min = _expected(speeds)
+    assert run.distance_km == pytest.approx(km, rel=1e-6)
+    assert run.moving_min == pytest.approx(minutes)
+    assert run.met_min == pytest.approx(met_min, rel=1e-6)
+
+def test_csv_without_time_column(tmp_path):
+    path = tmp_path / "sem_tempo.csv"
+    path.write_text("lat,lon\n-23.5,-46.6\n")
+    with pytest.raises(ValueError):
+        read_run(path)
+
+def test_utc_files_use_the_configured_zone(tmp_path, monkeypatch):
+    path = tmp_path / "treino.gpx"
+    path.write_text(_gpx(_points([10.0] * 240)))  # 23:50 UTC de segunda até 00:10 de terça
+    monkeypatch.setattr(tracks, "TRACK_TZ", None)
+    run = read_run(path)
+    assert run.utc_offset_s is None
+    assert (run.date, run.day) == (date(2026, 3, 9), "Seg")
+    monkeypatch.setattr(tracks, "TRACK_TZ", "Asia/Tokyo")
+    assert (run.date, run.day) == (date(2026, 3, 10), "Ter")
+
+def _run(day_offset, km, minutes, met_min):
+    start = datetime(2026, 3, 9 + day_offset, 12, tzinfo=timezone.utc).timestamp()
+    return RunSummary("x.gpx", start, 100, km, minutes, met_min, (minutes,), utc_offset_s=0.0)
+
+def _ex():
+    return pd.DataFrame({
+        "Dia": ["Seg", "Seg", "Ter", "Qua"],
+        "Atividade": ["Corrida", "Corrida", "Musculação", "Corrida"],
+        "Minutos": [30.0, 20.0, 45.0, 40.0],
+        "Distância (km)": [5.0, 3.0, 0.0, 7.0],
+        "Inclinação (%)": [0.0] * 4,
+        "Intensidade": ["Moderada"] * 4,
+        "MET (relógio)": [0.0] * 4,
+    }, index=pd.Index([1, 2, 3, 4], name="rid"))
+
+def _apply(ex, state):
+    return merge_editor_rows(ex, ex.index, state, EX_EDITABLE, EXERCISE_ROW_DEFAULTS).df
+
+def test_week_run_rows_replace_keeps_the_segment_kcal():
+    ex = _ex()
+    runs = [_run(0, 6.1, 33.33, 330.0), _run(0, 2.0, 12.0, 90.0), _run(2, 4.0, 25.0, 240.0), _run(7, 9.0, 50.0, 500.0)]
+    state = week_run_rows(ex, runs, "2026-W11")
+    assert state["deleted_rows"] == [1]
+    assert sorted(state["edited_rows"]) == [0, 3]
+    assert state["added_rows"] == []
+    seg = state["edited_rows"][0]
+    assert (seg["Minutos"], seg["Distância (km)"]) == (45.3, 8.1)
+
+    out = _apply(ex, state)
+    assert len(out) == 3
+    calc = compute_exercise_calc(out, 70.0).set_index("Dia")
+    assert calc.loc["Seg", "Gasto (kcal)"] == round(runs[0].kcal(70.0) + runs[1].kcal(70.0))
+    assert calc.loc["Qua", "Gasto (kcal)"] == round(runs[2].kcal(70.0))
+
+def test_week_run_rows_add_and_new_day():
+    ex = _ex()
+    run = _run(5, 5.0, 30.0, 300.0)  # sábado: dia sem Corrida, linha nova
+    state = week_run_rows(ex, [_run(0, 5.0, 30.0, 300.0), run], "2026-W11", add=True)
+    assert state["deleted_rows"] == []
+    assert state["added_rows"] == [{"Dia": "Sáb", "Atividade": "Corrida", "Minutos": 30.0, "Distância (km)": 5.0,
+                                    "MET (relógio)": 10.0}]
+    out = _apply(ex, state)
+    calc = compute_exercise_calc(out, 80.0)
+    before = compute_exercise_calc(ex, 80.0)["Gasto (kcal)"]
+    # Somar: a primeira Corrida de segunda fica com o gasto dela (MET do catálogo) + o dos segmentos
+    assert abs(calc["Gasto (kcal)"].iat[0] - (before.iat[0] + run.kcal(80.0))) <= 1
+    assert calc["Gasto (kcal)"].iat[-1] == round(run.kcal(80.0))
+
+def test_runs_by_date_sums_each_day():
+    frame = runs_by_date([_run(0, 5.0, 30.0, 300.0), _run(0, 3.0, 20.0, 180.0), _run(1, 4.0, 24.0, 250.0)], 70.0)
+    assert frame["Treinos"].tolist() == [2, 1]
+    assert frame["Corrida (km)"].tolist() == [8.0, 4.0]
+    assert frame["MET médio"].iat[0] == pytest.approx(9.6)